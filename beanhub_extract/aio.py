@@ -0,0 +1,113 @@
+import asyncio
+import concurrent.futures
+import itertools
+import threading
+import typing
+
+from .data_types import Fingerprint
+from .data_types import Transaction
+from .data_types import TransactionBatch
+from .extractors import detect_extractor as detect_extractor_blocking
+from .extractors.base import DEFAULT_BATCH_SIZE
+from .extractors.base import ExtractorBase
+
+# number of transactions to pull from the blocking extractor in each call in the executor
+DEFAULT_CHUNK_SIZE = 1000
+
+T = typing.TypeVar("T")
+
+
+class ThreadedIterator(typing.Generic[T]):
+    """Pull items from a blocking generator in an executor without blocking the event loop. Items are pulled only
+    when the consumer asks for the next chunk, so that a slow consumer slows down the reading of the input file.
+
+    """
+
+    def __init__(
+        self,
+        generator: typing.Generator[T, None, None],
+        chunk_size: int,
+        executor: concurrent.futures.Executor | None = None,
+    ):
+        if chunk_size < 1:
+            raise ValueError("Chunk size should be at least 1")
+        self.generator = generator
+        self.chunk_size = chunk_size
+        self.executor = executor
+        # a generator cannot be closed while it's running in another thread, so we need to wait for it
+        self._lock = threading.Lock()
+
+    def _take(self) -> list[T]:
+        with self._lock:
+            return list(itertools.islice(self.generator, self.chunk_size))
+
+    def _close(self):
+        with self._lock:
+            self.generator.close()
+
+    async def iter_chunks(self) -> typing.AsyncGenerator[list[T], None]:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(self.executor, self._take)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            await loop.run_in_executor(self.executor, self._close)
+
+
+async def detect_extractor(
+    input_file: typing.TextIO, executor: concurrent.futures.Executor | None = None
+) -> typing.Type[ExtractorBase] | None:
+    """Detect the extractor of the given file in the executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, detect_extractor_blocking, input_file)
+
+
+class AsyncExtractor:
+    """Wrap an extractor to extract transactions as an async iterator. All the file reading and parsing run in the
+    given executor, or the default executor of the event loop if it's None, in chunks of `chunk_size`
+    transactions.
+
+    """
+
+    def __init__(
+        self,
+        extractor: ExtractorBase,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        executor: concurrent.futures.Executor | None = None,
+    ):
+        if chunk_size < 1:
+            raise ValueError("Chunk size should be at least 1")
+        self.extractor = extractor
+        self.chunk_size = chunk_size
+        self.executor = executor
+
+    async def detect(self) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.extractor.detect)
+
+    async def fingerprint(self) -> Fingerprint | None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.extractor.fingerprint)
+
+    async def __aiter__(self) -> typing.AsyncGenerator[Transaction, None]:
+        iterator = ThreadedIterator(
+            self.extractor(), chunk_size=self.chunk_size, executor=self.executor
+        )
+        async for chunk in iterator.iter_chunks():
+            for transaction in chunk:
+                yield transaction
+
+    async def iter_batches(
+        self, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> typing.AsyncGenerator[TransactionBatch, None]:
+        """Generate transactions in columnar batches, each batch is built in the executor"""
+        iterator = ThreadedIterator(
+            self.extractor.iter_batches(batch_size=batch_size),
+            chunk_size=1,
+            executor=self.executor,
+        )
+        async for (batch,) in iterator.iter_chunks():
+            yield batch
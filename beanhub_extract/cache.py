@@ -0,0 +1,135 @@
+import hashlib
+import importlib.metadata
+import os
+import pathlib
+import pickle
+import tempfile
+import typing
+
+from .data_types import Transaction
+from .extractors import detect_extractor
+from .extractors.base import ExtractorBase
+
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+HASH_BLOCK_SIZE = 1024 * 1024
+ENTRY_SUFFIX = ".pickle"
+
+
+def get_library_version() -> str:
+    try:
+        return importlib.metadata.version("beanhub-extract")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def hash_file(path: str | pathlib.Path) -> str:
+    hash = hashlib.sha256()
+    with open(path, "rb") as fo:
+        while True:
+            block = fo.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            hash.update(block)
+    return hash.hexdigest()
+
+
+class ExtractionCache:
+    """On-disk cache of extracted transactions for each file, keyed by the path, size, mtime and content hash of
+    the file, plus the extractor name and library version. Entries are written into temporary files and renamed
+    into place atomically, and a hit touches the entry file, so that multiple processes can share the same cache
+    directory, and the least recently used entries are evicted first when it grows over `max_size` bytes.
+
+    Entries are pickled, so the cache directory should only be writable by trusted users.
+
+    """
+
+    def __init__(self, directory: str | pathlib.Path, max_size: int = DEFAULT_MAX_SIZE):
+        self.directory = pathlib.Path(directory)
+        self.max_size = max_size
+        self.version = get_library_version()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def make_key(
+        self, path: str | pathlib.Path, extractor_cls: typing.Type[ExtractorBase]
+    ) -> str:
+        stat = os.stat(path)
+        hash = hashlib.sha256()
+        for value in (
+            self.version,
+            extractor_cls.EXTRACTOR_NAME,
+            os.fspath(path),
+            str(stat.st_size),
+            str(stat.st_mtime_ns),
+            hash_file(path),
+        ):
+            hash.update(value.encode("utf8"))
+            hash.update(b"\0")
+        return hash.hexdigest()
+
+    def get(self, key: str) -> list[Transaction] | None:
+        entry_path = self.directory / (key + ENTRY_SUFFIX)
+        try:
+            with open(entry_path, "rb") as fo:
+                transactions = pickle.load(fo)
+            # mark it as recently used for eviction
+            os.utime(entry_path)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return
+        return transactions
+
+    def put(self, key: str, transactions: list[Transaction]):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fo:
+                pickle.dump(transactions, fo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.directory / (key + ENTRY_SUFFIX))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the total size is within the max size"""
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(ENTRY_SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            total_size += stat.st_size
+        if total_size <= self.max_size:
+            return
+        entries.sort()
+        for _, size, entry_path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.unlink(entry_path)
+            except FileNotFoundError:
+                # removed by another process already
+                pass
+            total_size -= size
+
+    def extract(
+        self,
+        path: str | pathlib.Path,
+        extractor_cls: typing.Type[ExtractorBase] | None = None,
+    ) -> list[Transaction]:
+        """Extract transactions from the given file, or return the cached ones if the file hasn't changed"""
+        with open(path, "rt") as fo:
+            if extractor_cls is None:
+                extractor_cls = detect_extractor(fo)
+                if extractor_cls is None:
+                    raise ValueError(f"Cannot detect extractor for file {path}")
+                fo.seek(os.SEEK_SET)
+            key = self.make_key(path, extractor_cls)
+            transactions = self.get(key)
+            if transactions is not None:
+                return transactions
+            transactions = list(extractor_cls(fo)())
+        self.put(key, transactions)
+        return transactions
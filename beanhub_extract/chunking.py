@@ -0,0 +1,191 @@
+import csv
+import io
+import typing
+
+from .record_reader import OffsetRecordReader
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+DEFAULT_HEADER_READ_SIZE = 64 * 1024
+# bisect_records scans the records linearly once the range is narrowed down to this size
+DEFAULT_SCAN_SIZE = 64 * 1024
+QUOTE = b'"'
+NEWLINE = b"\n"
+BLANK_LINES = (b"\n\n", b"\n\r\n")
+
+
+def find_header_end(input_file: typing.BinaryIO) -> int:
+    """Find the byte offset right after the header record of the given binary CSV file"""
+    input_file.seek(0)
+    quote_count = 0
+    while True:
+        line = input_file.readline()
+        if not line:
+            break
+        quote_count += line.count(QUOTE)
+        # a newline ends the record only when it's outside quotes
+        if quote_count % 2 == 0:
+            break
+    return input_file.tell()
+
+
+def read_bounded_header(
+    input_file: typing.BinaryIO,
+    encoding: str = "utf-8",
+    size: int = DEFAULT_HEADER_READ_SIZE,
+) -> list[str] | None:
+    """Read the header fields of the given binary CSV file by reading at most `size` bytes from the current
+    position. Returns None if the header record doesn't end within the bound, or it cannot be decoded or parsed.
+    Only ASCII-compatible encodings are supported.
+
+    """
+    data = input_file.read(size)
+    end = None
+    quote_count = 0
+    search = 0
+    while True:
+        index = data.find(NEWLINE, search)
+        if index == -1:
+            break
+        quote_count += data.count(QUOTE, search, index)
+        if quote_count % 2 == 0:
+            end = index + 1
+            break
+        search = index + 1
+    if end is None:
+        if len(data) >= size:
+            # the header is longer than the bound, most likely not a CSV file
+            return
+        end = len(data)
+    try:
+        return next(csv.reader(io.StringIO(data[:end].decode(encoding))), None)
+    except (UnicodeDecodeError, csv.Error):
+        return
+
+
+def find_record_boundaries(
+    input_file: typing.BinaryIO,
+    chunk_size: int,
+    start: int = 0,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> list[int]:
+    """Split the given binary CSV file from `start` into byte ranges with roughly `chunk_size` bytes, and return
+    the boundaries including the start and end offsets. Each boundary is moved forward to the next newline outside
+    quotes, so that every chunk begins with a real record, even when there are quoted fields with newlines.
+
+    The quote parity is tracked by counting the quote bytes in large blocks, which is much cheaper than parsing the
+    file. It's wrong after a quote character in an unquoted field, such as `12" PIZZA`, which the csv module accepts
+    as a literal, so the boundaries need to be verified by parsing the ranges. Only ASCII-compatible encodings are
+    supported.
+
+    """
+    if chunk_size < 1:
+        raise ValueError("Chunk size should be at least 1")
+    input_file.seek(start)
+    boundaries = [start]
+    target = start + chunk_size
+    offset = start
+    # number of quotes between start and the beginning of the current block
+    quote_count = 0
+    while True:
+        block = input_file.read(block_size)
+        if not block:
+            break
+        search = max(target - offset, 0)
+        while search < len(block):
+            index = block.find(NEWLINE, search)
+            if index == -1:
+                break
+            if (quote_count + block.count(QUOTE, 0, index)) % 2 == 0:
+                boundary = offset + index + 1
+                boundaries.append(boundary)
+                target = boundary + chunk_size
+                search = target - offset
+            else:
+                search = index + 1
+        quote_count += block.count(QUOTE)
+        offset += len(block)
+    if boundaries[-1] < offset:
+        boundaries.append(offset)
+    return boundaries
+
+
+def count_records(
+    input_file: typing.BinaryIO,
+    start: int,
+    end: int | None = None,
+    encoding: str = "utf-8",
+) -> int | None:
+    """Count the non-blank records of the given binary CSV file between the byte offsets `start` and `end`, or to
+    the end of file if `end` is None. The start offset needs to be a record boundary. Returns None if the end offset
+    is not a record boundary, i.e. it's in the middle of a record, or the records cannot be parsed strictly.
+
+    Unlike `find_record_boundaries`, the records are read with the csv tokenizer, as the quote parity goes wrong
+    with quote characters in unquoted fields, and two of them even cancel each other out without being noticed.
+    Only ASCII-compatible encodings are supported.
+
+    """
+    reader = OffsetRecordReader(input_file, encoding, start, strict=True)
+    count = 0
+    try:
+        while end is None or reader.position < end:
+            record = reader.read_record()
+            if record is None:
+                break
+            if record[2]:
+                count += 1
+    except (csv.Error, UnicodeDecodeError):
+        return
+    if end is not None and reader.position != end:
+        return
+    return count
+
+
+def bisect_records(
+    input_file: typing.BinaryIO,
+    predicate: typing.Callable[[list[str]], bool],
+    start: int,
+    end: int,
+    encoding: str = "utf-8",
+    scan_size: int = DEFAULT_SCAN_SIZE,
+) -> int:
+    """Find the byte offset of the first record between the byte offsets `start` and `end` of the given binary CSV
+    file matching the predicate, or `end` if there's none. The records need to be sorted in the way that the
+    predicate is False for the records before it and True for the rest. Both offsets need to be record boundaries.
+
+    Each step probes the first record after the middle offset, found by skipping to the next newline, which is only
+    a record boundary if it's outside quotes. Once a probe fails to parse, or the range is narrowed down to
+    `scan_size` bytes, it scans the remaining records linearly. For files with quoted newlines, verify the result
+    with `count_records`. Only ASCII-compatible encodings are supported.
+
+    """
+    low, high = start, end
+    while high - low > scan_size:
+        mid = (low + high) // 2
+        input_file.seek(mid - 1)
+        reader = OffsetRecordReader(
+            input_file, encoding, mid - 1 + len(input_file.readline())
+        )
+        probe = None
+        try:
+            while probe is None:
+                record = reader.read_record()
+                if record is None or record[0] >= high:
+                    break
+                record_start, record_end, values = record
+                if values:
+                    probe = record_start, record_end, predicate(values)
+        except (csv.Error, UnicodeDecodeError, ValueError):
+            break
+        if probe is None:
+            break
+        record_start, record_end, matched = probe
+        if matched:
+            high = record_start
+        else:
+            low = record_end
+    for record_start, _, values in OffsetRecordReader(input_file, encoding, low):
+        if record_start >= high:
+            break
+        if predicate(values):
+            return record_start
+    return high
@@ -0,0 +1,140 @@
+import bz2
+import gzip
+import lzma
+import typing
+import zipfile
+import zlib
+
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_BZIP2 = "bzip2"
+COMPRESSION_XZ = "xz"
+COMPRESSION_ZIP = "zip"
+# the magic bytes at the beginning of compressed files and archives
+MAGIC_NUMBERS = {
+    COMPRESSION_GZIP: b"\x1f\x8b",
+    COMPRESSION_BZIP2: b"BZh",
+    COMPRESSION_XZ: b"\xfd7zXZ\x00",
+    COMPRESSION_ZIP: b"PK\x03\x04",
+}
+MAGIC_SIZE = max(len(magic) for magic in MAGIC_NUMBERS.values())
+# decompressing streams, they are seekable but seeking backward decompresses the data from the beginning again, so
+# they should only be read sequentially or rewound
+DECOMPRESSED_TYPES = (gzip.GzipFile, bz2.BZ2File, lzma.LZMAFile, zipfile.ZipExtFile)
+# errors raised while reading corrupted or truncated compressed files and archives, gzip and bzip2 ones are OSError
+DECOMPRESSION_ERRORS = (
+    OSError,
+    EOFError,
+    lzma.LZMAError,
+    zlib.error,
+    zipfile.BadZipFile,
+)
+
+
+def peek_magic(input_file: typing.BinaryIO) -> bytes:
+    """Read the first bytes of the given binary file from the current position without consuming them. Files
+    without `peek` need to be seekable, otherwise nothing is read
+
+    """
+    peek = getattr(input_file, "peek", None)
+    if peek is not None:
+        return peek(MAGIC_SIZE)[:MAGIC_SIZE]
+    try:
+        position = input_file.tell()
+        data = input_file.read(MAGIC_SIZE)
+        input_file.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return b""
+    return data
+
+
+def detect_compression(input_file: typing.BinaryIO) -> str | None:
+    """Detect the compression of the given binary file by its magic bytes, returns None if it's not compressed"""
+    data = peek_magic(input_file)
+    for compression, magic in MAGIC_NUMBERS.items():
+        if data.startswith(magic):
+            return compression
+
+
+def is_decompressed(input_file: typing.BinaryIO) -> bool:
+    """Check if the given binary file is a decompressing stream, which doesn't support random access"""
+    return isinstance(input_file, DECOMPRESSED_TYPES)
+
+
+def make_member_name(archive_name: str | None, member_name: str) -> str:
+    if archive_name is None:
+        return member_name
+    return f"{archive_name}/{member_name}"
+
+
+def open_zip_archive(input_file: typing.BinaryIO) -> zipfile.ZipFile:
+    """Open the given seekable binary file as a zip archive, raises ValueError if it's not a valid one"""
+    try:
+        return zipfile.ZipFile(input_file)
+    except zipfile.BadZipFile as exc:
+        raise ValueError(f"Invalid zip archive: {exc}") from exc
+
+
+def iter_zip_members(
+    input_file: typing.BinaryIO, name: str | None = None
+) -> typing.Generator[tuple[str, typing.BinaryIO], None, None]:
+    """Open the file members of the given zip archive one by one, and yield (name, decompressing stream) for each
+    of them. The name is the member path after the archive name. Each member is closed when the next one is opened,
+    and the archive itself needs to be seekable. Raises ValueError if it's not a valid zip archive
+
+    """
+    with open_zip_archive(input_file) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            with archive.open(info) as member_file:
+                yield make_member_name(name, info.filename), member_file
+
+
+def open_single_zip_member(
+    input_file: typing.BinaryIO, name: str | None = None
+) -> tuple[str, typing.BinaryIO]:
+    """Open the only file member of the given zip archive, and return its name and the decompressing stream.
+    Raises ValueError if it's not a valid zip archive, or it doesn't have exactly one file, as the members of an
+    archive with multiple files need to be extracted one by one with `iter_zip_members`
+
+    """
+    with open_zip_archive(input_file) as archive:
+        infos = [info for info in archive.infolist() if not info.is_dir()]
+        if len(infos) != 1:
+            raise ValueError(
+                f"Expected a zip archive with a single file, but got {len(infos)} files"
+            )
+        # the member stays readable after the archive is closed
+        return make_member_name(name, infos[0].filename), archive.open(infos[0])
+
+
+def open_decompressed(input_file: typing.BinaryIO, compression: str) -> typing.BinaryIO:
+    """Open a decompressing stream reading the given gzip, bzip2 or xz file. The data is decompressed while reading,
+    nothing is written to disk. Closing the stream doesn't close the given file
+
+    """
+    if compression == COMPRESSION_GZIP:
+        return gzip.GzipFile(fileobj=input_file, mode="rb")
+    if compression == COMPRESSION_BZIP2:
+        return bz2.BZ2File(input_file, mode="rb")
+    if compression == COMPRESSION_XZ:
+        return lzma.LZMAFile(input_file, mode="rb")
+    raise ValueError(f"Unsupported compression {compression}")
+
+
+def iter_archive_members(
+    input_file: typing.BinaryIO, name: str | None = None
+) -> typing.Generator[tuple[str | None, typing.BinaryIO], None, None]:
+    """Yield (name, binary file) for each file in the given binary file. Zip archives yield their members one by
+    one, compressed files yield the decompressing stream, and other files yield themselves, all with the given name
+    except the zip members
+
+    """
+    compression = detect_compression(input_file)
+    if compression is None:
+        yield name, input_file
+    elif compression == COMPRESSION_ZIP:
+        yield from iter_zip_members(input_file, name)
+    else:
+        with open_decompressed(input_file, compression) as decompressed:
+            yield name, decompressed
@@ -0,0 +1,235 @@
+import hashlib
+import math
+import operator
+import pathlib
+import sqlite3
+import typing
+
+from .data_types import Transaction
+
+# the number of keys the Bloom filter is sized for, more keys only increase its false positive rate
+DEFAULT_CAPACITY = 10_000_000
+DEFAULT_ERROR_RATE = 0.01
+# the number of new keys to insert into the exact store at once
+DEFAULT_FLUSH_SIZE = 10_000
+KEY_SIZE = 16
+KEY_SEPARATOR = "\x00"
+NO_FILE = object()
+# the fields identifying a transaction without a transaction id, the ones which may change between exports of the
+# same transaction, such as the status, category or note, are left out. the text fields after the date, timestamp
+# and amount are compared with the cases and spaces normalized
+CONTENT_KEY_FIELDS = (
+    "date",
+    "timestamp",
+    "amount",
+    "currency",
+    "desc",
+    "bank_desc",
+    "reference",
+    "type",
+    "source_account",
+    "dest_account",
+    "last_four_digits",
+)
+get_content_values = operator.attrgetter(*CONTENT_KEY_FIELDS)
+
+
+def make_dedup_key(transaction: Transaction) -> bytes:
+    """Compute the content key of the given transaction, which is the same for the same transaction in different
+    exports. It's made of the transaction id if there's one, such as Plaid transactions, otherwise the normalized
+    values of `CONTENT_KEY_FIELDS`. Transactions from different extractors never share a key
+
+    """
+    transaction_id = transaction.transaction_id
+    if transaction_id is not None and transaction_id.strip():
+        values = [transaction.extractor, "id", transaction_id.strip()]
+    else:
+        date, timestamp, amount, *texts = get_content_values(transaction)
+        values = [
+            transaction.extractor,
+            "content",
+            "" if date is None else date.isoformat(),
+            "" if timestamp is None else timestamp.isoformat(),
+            # so that 1.50 and 1.5 are the same amount
+            "" if amount is None else str(amount.normalize()),
+            *[" ".join(text.split()).casefold() if text else "" for text in texts],
+        ]
+    return hashlib.blake2b(
+        KEY_SEPARATOR.join(values).encode("utf8"), digest_size=KEY_SIZE
+    ).digest()
+
+
+class BloomFilter:
+    """Bloom filter of fixed size keys, which are already uniformly distributed hash values. It tells if a key is
+    definitely new or possibly added before, with the memory usage bounded by the capacity
+
+    """
+
+    def __init__(self, capacity: int, error_rate: float = DEFAULT_ERROR_RATE):
+        if capacity < 1:
+            raise ValueError("Capacity should be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("Error rate should be between 0 and 1")
+        self.bit_count = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self.bits
+        bit_count = self.bit_count
+        # double hashing with the two halves of the key
+        position = int.from_bytes(key[:8], "little")
+        step = int.from_bytes(key[8:16], "little") | 1
+        for _ in range(self.hash_count):
+            position %= bit_count
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+            position += step
+        return True
+
+    def add(self, key: bytes) -> bool:
+        """Add the given key, returns True if it was possibly added before"""
+        bits = self.bits
+        bit_count = self.bit_count
+        position = int.from_bytes(key[:8], "little")
+        step = int.from_bytes(key[8:16], "little") | 1
+        found = True
+        for _ in range(self.hash_count):
+            position %= bit_count
+            index = position >> 3
+            mask = 1 << (position & 7)
+            if not bits[index] & mask:
+                bits[index] |= mask
+                found = False
+            position += step
+        return found
+
+
+class Deduplicator:
+    """Streaming deduplication of transactions from overlapping exports. Each key is checked against a Bloom filter
+    first, and only the possibly seen ones are checked against the exact store, which is a SQLite database of the
+    keys on disk, so that the memory usage is bounded no matter how many transactions there are.
+
+    The same content key may appear multiple times in a file for different transactions, such as two coffees on the
+    same day. The n-th occurrence of a key in a file is a duplicate only if a previous file had at least n of them,
+    so the transactions of a file need to be generated together, as the extractors do.
+
+    The database is a temporary file removed on close by default. With a path, it's kept for deduplicating against
+    the transactions seen in the previous runs
+
+    """
+
+    def __init__(
+        self,
+        path: str | pathlib.Path | None = None,
+        capacity: int = DEFAULT_CAPACITY,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+    ):
+        self.bloom_filter = BloomFilter(capacity, error_rate)
+        self.flush_size = flush_size
+        # an empty path opens a temporary database on disk, which is removed when it's closed
+        self.connection = sqlite3.connect("" if path is None else path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS keys ("
+            "key BLOB PRIMARY KEY, "
+            # the max number of occurrences of the key in a file
+            "count INTEGER NOT NULL, "
+            # the file the key was seen in last time, and the number of occurrences in it
+            "file_seq INTEGER NOT NULL, "
+            "file_count INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self.file_seq = 0
+        for key, file_seq in self.connection.execute("SELECT key, file_seq FROM keys"):
+            self.bloom_filter.add(key)
+            self.file_seq = max(self.file_seq, file_seq)
+        # the file of the last transaction, it's a placeholder before the first one
+        self._file: str | None | object = NO_FILE
+        # new keys not inserted into the database yet, key to the number of occurrences in the current file
+        self._pending: dict[bytes, int] = {}
+        # number of keys checked against the exact store, for telling how effective the Bloom filter is
+        self.lookup_count = 0
+
+    def __enter__(self) -> "Deduplicator":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def flush(self):
+        """Insert the pending new keys into the exact store, and commit the changes"""
+        with self.connection:
+            if self._pending:
+                self.connection.executemany(
+                    "INSERT INTO keys (key, count, file_seq, file_count) VALUES (?, ?, ?, ?)",
+                    [
+                        (key, count, self.file_seq, count)
+                        for key, count in self._pending.items()
+                    ],
+                )
+        self._pending.clear()
+
+    def is_duplicate(self, transaction: Transaction) -> bool:
+        """Check if the given transaction is a duplicate of one in the previous files, and record it"""
+        if transaction.file != self._file:
+            # the pending keys are counted in the current file, insert them before moving to the next one
+            self.flush()
+            self._file = transaction.file
+            self.file_seq += 1
+        key = make_dedup_key(transaction)
+        if not self.bloom_filter.add(key):
+            self._add_pending(key)
+            return False
+        pending_count = self._pending.get(key)
+        if pending_count is not None:
+            # seen in the current file only
+            self._pending[key] = pending_count + 1
+            return False
+        self.lookup_count += 1
+        row = self.connection.execute(
+            "SELECT count, file_seq, file_count FROM keys WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            # a false positive of the Bloom filter
+            self._add_pending(key)
+            return False
+        count, file_seq, file_count = row
+        # the index of this occurrence in the current file
+        index = file_count if file_seq == self.file_seq else 0
+        # committed with the next flush
+        self.connection.execute(
+            "UPDATE keys SET count = ?, file_seq = ?, file_count = ? WHERE key = ?",
+            (max(count, index + 1), self.file_seq, index + 1, key),
+        )
+        return index < count
+
+    def _add_pending(self, key: bytes):
+        self._pending[key] = 1
+        if len(self._pending) >= self.flush_size:
+            self.flush()
+
+    def __call__(
+        self, transactions: typing.Iterable[Transaction]
+    ) -> typing.Generator[Transaction, None, None]:
+        """Generate the given transactions without the duplicates"""
+        for transaction in transactions:
+            if not self.is_duplicate(transaction):
+                yield transaction
+
+
+def dedup_transactions(
+    transactions: typing.Iterable[Transaction],
+    capacity: int = DEFAULT_CAPACITY,
+    error_rate: float = DEFAULT_ERROR_RATE,
+) -> typing.Generator[Transaction, None, None]:
+    """Generate the given transactions without the duplicates from overlapping exports, with a temporary
+    `Deduplicator`
+
+    """
+    with Deduplicator(capacity=capacity, error_rate=error_rate) as deduplicator:
+        yield from deduplicator(transactions)
@@ -0,0 +1,369 @@
+import collections
+import concurrent.futures
+import csv
+import dataclasses
+import io
+import os
+import pathlib
+import time
+import traceback
+import typing
+
+from .chunking import DEFAULT_HEADER_READ_SIZE
+from .chunking import find_record_boundaries
+from .chunking import read_bounded_header
+from .compression import DECOMPRESSION_ERRORS
+from .compression import iter_archive_members
+from .data_types import Fingerprint
+from .data_types import Transaction
+from .extractors import ALL_EXTRACTORS
+from .extractors import detect_extractor
+from .extractors import detect_extractor_by_header
+from .extractors.base import ExtractorBase
+from .extractors.base import open_input
+from .observer import ExtractorObserver
+from .record_reader import OffsetRecordReader
+from .reverse_reader import is_ascii_compatible
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+@dataclasses.dataclass
+class FileResult:
+    # the path of the extracted file
+    path: str | pathlib.Path
+    # name of the detected extractor, None if we cannot find one for the file
+    extractor: str | None = None
+    # fingerprint of the file
+    fingerprint: Fingerprint | None = None
+    # extracted transactions in lineno order
+    transactions: list[Transaction] = dataclasses.field(default_factory=list)
+    # the formatted exception if we failed to process the file
+    error: str | None = None
+
+
+@dataclasses.dataclass
+class FileStats:
+    # the path of the file relative to the root folder
+    path: str
+    # name of the detected extractor
+    extractor: str
+    # size of the file in bytes, the size of the whole archive for the files in a zip archive
+    size: int
+    # number of extracted transactions
+    transaction_count: int = 0
+    # time spent on extracting the file in seconds, including the time the consumer took
+    elapsed: float = 0.0
+    # the formatted exception if we failed to extract the file
+    error: str | None = None
+
+
+def extract_file(path: str | pathlib.Path) -> FileResult:
+    """Detect extractor, compute fingerprint and extract transactions for the given file. Files compressed with
+    gzip, bzip2 or xz, and zip archives with a single file, are decompressed while reading
+
+    """
+    try:
+        with open(path, "rb") as binary_fo:
+            fo = open_input(binary_fo)
+            extractor_cls = detect_extractor(fo)
+            if extractor_cls is None:
+                return FileResult(path=path)
+            fo.seek(os.SEEK_SET)
+            extractor = extractor_cls(fo)
+            fingerprint = extractor.fingerprint()
+            fo.seek(os.SEEK_SET)
+            return FileResult(
+                path=path,
+                extractor=extractor_cls.EXTRACTOR_NAME,
+                fingerprint=fingerprint,
+                transactions=list(extractor()),
+            )
+    except Exception as exc:
+        return FileResult(path=path, error="".join(traceback.format_exception(exc)))
+
+
+def extract_files(
+    paths: typing.Iterable[str | pathlib.Path],
+    workers: int | None = None,
+    max_in_flight: int | None = None,
+) -> typing.Generator[FileResult, None, None]:
+    """Extract given files in a process pool with `workers` processes, and generate the results in the same order
+    as the given paths. At most `max_in_flight` files are submitted or waiting to be consumed at the same time to
+    keep the memory usage bounded. Errors of a file are reported in its result without stopping the others.
+
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if max_in_flight is None:
+        max_in_flight = workers * 2
+    if workers < 1 or max_in_flight < 1:
+        raise ValueError("Workers and max in flight should be at least 1")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: collections.deque[
+            tuple[str | pathlib.Path, concurrent.futures.Future]
+        ] = collections.deque()
+        for path in paths:
+            pending.append((path, executor.submit(extract_file, path)))
+            if len(pending) >= max_in_flight:
+                yield get_file_result(*pending.popleft())
+        while pending:
+            yield get_file_result(*pending.popleft())
+
+
+def get_file_result(
+    path: str | pathlib.Path, future: concurrent.futures.Future
+) -> FileResult:
+    try:
+        return future.result()
+    except Exception as exc:
+        # the worker process itself may fail, such as getting killed or failing to pickle the result
+        return FileResult(path=path, error="".join(traceback.format_exception(exc)))
+
+
+def read_chunk(
+    path: str | pathlib.Path, encoding: str, header_end: int, start: int, end: int
+) -> typing.TextIO:
+    """Read the header and the given byte range of a CSV file, and return them as a text file. Newlines are
+    translated the same as a file opened in text mode, so that the values are the same as the sequential extractor
+
+    """
+    with open(path, "rb") as fo:
+        header = fo.read(header_end)
+        fo.seek(start)
+        data = header + fo.read(end - start)
+    return io.TextIOWrapper(io.BytesIO(data), encoding=encoding, newline=None)
+
+
+def count_chunk_rows(
+    path: str | pathlib.Path, encoding: str, start: int, end: int
+) -> int | None:
+    """Count rows in the given byte range of a CSV file starting at a record boundary. Returns None if the range
+    doesn't end at a record boundary, i.e. the end offset is inside a quoted field. The rows are parsed in strict
+    mode for that, so that it fails instead of taking the rest of the range as the quoted field
+
+    """
+    with read_chunk(path, encoding, header_end=0, start=start, end=end) as fo:
+        try:
+            return sum(1 for values in csv.reader(fo, strict=True) if values)
+        except csv.Error:
+            return
+
+
+def extract_chunk(
+    path: str | pathlib.Path,
+    filename: str,
+    extractor_name: str,
+    encoding: str,
+    header_end: int,
+    start: int,
+    end: int,
+    lineno_offset: int,
+    row_count: int,
+) -> list[Transaction]:
+    """Extract transactions in the given byte range of a CSV file, with lineno and reversed_lineno adjusted by
+    the number of rows before the chunk and the total number of rows
+
+    """
+    with read_chunk(path, encoding, header_end=header_end, start=start, end=end) as fo:
+        extractor = ALL_EXTRACTORS[extractor_name](fo, single_pass=True)
+        transactions = []
+        for values in extractor._extract_values():
+            lineno = values["lineno"] + lineno_offset
+            values["file"] = filename
+            values["lineno"] = lineno
+            values["reversed_lineno"] = lineno - row_count - 1
+            transactions.append(Transaction(**values))
+    return transactions
+
+
+def extract_file_in_chunks(
+    path: str | pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase] | None = None,
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encoding: str = "utf-8",
+) -> typing.Generator[Transaction, None, None]:
+    """Extract transactions from a single large CSV file in parallel. The file is split into byte ranges aligned to
+    record boundaries. Rows in each range are counted first, then each range is extracted in its own worker with
+    the global lineno and reversed_lineno, so that the output is exactly the same as the sequential extractor.
+
+    The boundaries are found with quote parity, which is wrong after a quote character in an unquoted field, such as
+    `12" PIZZA`. Counting the rows of a range from a real boundary tells if its end is also a real one, so that
+    all the boundaries are verified by the counting. If any of them is not, the file is extracted sequentially.
+
+    """
+    if not is_ascii_compatible(encoding):
+        raise ValueError(f"Encoding {encoding} is not supported")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    with open(path, "rt", encoding=encoding) as fo:
+        filename = fo.name
+        if extractor_cls is None:
+            extractor_cls = detect_extractor(fo)
+            if extractor_cls is None:
+                raise ValueError(f"Cannot detect extractor for file {path}")
+        header = OffsetRecordReader(fo.buffer, encoding).read_record()
+        header_end = 0 if header is None else header[1]
+        boundaries = find_record_boundaries(
+            fo.buffer, chunk_size=chunk_size, start=header_end
+        )
+    ranges = list(zip(boundaries, boundaries[1:]))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        row_counts = list(
+            executor.map(
+                count_chunk_rows,
+                [path] * len(ranges),
+                [encoding] * len(ranges),
+                *zip(*ranges),
+            )
+        )
+        if None not in row_counts:
+            total = sum(row_counts)
+            lineno_offset = 0
+            pending: collections.deque[concurrent.futures.Future] = collections.deque()
+            for (start, end), row_count in zip(ranges, row_counts):
+                pending.append(
+                    executor.submit(
+                        extract_chunk,
+                        path=path,
+                        filename=filename,
+                        extractor_name=extractor_cls.EXTRACTOR_NAME,
+                        encoding=encoding,
+                        header_end=header_end,
+                        start=start,
+                        end=end,
+                        lineno_offset=lineno_offset,
+                        row_count=total,
+                    )
+                )
+                lineno_offset += row_count
+                # keep only a few chunks in flight, so that the memory usage is bounded by the chunk size
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+            return
+    with open(path, "rt", encoding=encoding) as fo:
+        yield from extractor_cls(fo)()
+
+
+def iter_tree_files(
+    root: str | pathlib.Path,
+) -> typing.Generator[tuple[str, os.DirEntry], None, None]:
+    """Walk the given folder lazily and yield (path relative to root, dir entry) for each file in name order, with
+    the files of a folder before its sub-folders. Symbolic links to folders are not followed to avoid cycles.
+
+    """
+    stack: list[tuple[str, str]] = [(os.fspath(root), "")]
+    while stack:
+        folder, relative_folder = stack.pop()
+        with os.scandir(folder) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        sub_folders = []
+        for entry in entries:
+            relative_path = os.path.join(relative_folder, entry.name)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    sub_folders.append((entry.path, relative_path))
+                elif entry.is_file():
+                    yield relative_path, entry
+            except OSError:
+                continue
+        # reversed, so that sub-folders are popped in name order
+        stack.extend(reversed(sub_folders))
+
+
+def extract_tree_file(
+    path: str,
+    input_file: typing.BinaryIO,
+    size: int,
+    encoding: str,
+    header_read_size: int,
+    on_file: typing.Callable[[FileStats], None] | None,
+    observer: ExtractorObserver | None,
+) -> typing.Generator[Transaction, None, None]:
+    """Detect the extractor of the given binary file in a tree and extract its transactions with the `file`
+    attribute set to the given path. The file is skipped if there's no matching extractor
+
+    """
+    try:
+        fieldnames = read_bounded_header(
+            input_file, encoding=encoding, size=header_read_size
+        )
+        input_file.seek(0)
+    except DECOMPRESSION_ERRORS:
+        # such as a corrupted or truncated compressed file
+        return
+    if fieldnames is None:
+        return
+    extractor_cls = detect_extractor_by_header(fieldnames)
+    if extractor_cls is None:
+        return
+    stats = FileStats(path=path, extractor=extractor_cls.EXTRACTOR_NAME, size=size)
+    start_time = time.perf_counter()
+    with io.TextIOWrapper(input_file, encoding=encoding) as fo:
+        values_iter = extractor_cls(fo, observer=observer)._iter_values()
+        while True:
+            # only the errors of the extraction are caught, not the ones thrown in by the consumer
+            try:
+                values = next(values_iter, None)
+            except Exception as exc:
+                stats.error = "".join(traceback.format_exception(exc))
+                break
+            if values is None:
+                break
+            # set the relative path on the values, instead of rebuilding each transaction afterward
+            values["file"] = path
+            stats.transaction_count += 1
+            yield Transaction(**values)
+    stats.elapsed = time.perf_counter() - start_time
+    if on_file is not None:
+        on_file(stats)
+
+
+def extract_tree(
+    root: str | pathlib.Path,
+    on_file: typing.Callable[[FileStats], None] | None = None,
+    encoding: str = "utf-8",
+    header_read_size: int = DEFAULT_HEADER_READ_SIZE,
+    observer: ExtractorObserver | None = None,
+) -> typing.Generator[Transaction, None, None]:
+    """Extract transactions from all the supported files under the given folder, with the `file` attribute
+    relative to the root folder. The extractor of each file is detected by reading at most `header_read_size` bytes,
+    and files without a matching extractor are skipped. After each extracted file, `on_file` is called with its
+    stats. Errors in a file are reported in its stats without stopping the others, while the errors raised by
+    `on_file` are not caught. The optional observer is passed to the extractor of each file. Files compressed with
+    gzip, bzip2 or xz are decompressed while reading, and the files in zip archives are extracted one by one with
+    the path of the archive followed by their paths in the archive. Compressed files and archives too corrupted to
+    read the header of are skipped.
+
+    """
+    if not is_ascii_compatible(encoding):
+        raise ValueError(f"Encoding {encoding} is not supported")
+    for relative_path, entry in iter_tree_files(root):
+        try:
+            fo = open(entry.path, "rb")
+        except OSError:
+            continue
+        with fo:
+            size = os.fstat(fo.fileno()).st_size
+            members = iter_archive_members(fo, relative_path)
+            while True:
+                try:
+                    member = next(members, None)
+                except (ValueError, *DECOMPRESSION_ERRORS):
+                    # it's not a valid zip archive, or the next member cannot be read
+                    break
+                if member is None:
+                    break
+                path, member_file = member
+                yield from extract_tree_file(
+                    path,
+                    member_file,
+                    size=size,
+                    encoding=encoding,
+                    header_read_size=header_read_size,
+                    on_file=on_file,
+                    observer=observer,
+                )
@@ -1,7 +1,13 @@
 import os
+import time
 import typing
 
+from ..observer import ExtractorObserver
+from ..observer import PHASE_DETECT
 from .base import ExtractorBase
+from .base import InputFile
+from .base import open_input
+from .base import read_header
 from .chase import ChaseCreditCardExtractor
 from .csv import CSVExtractor
 from .mercury import MercuryExtractor
@@ -17,8 +23,56 @@ ALL_EXTRACTORS: dict[str, typing.Type[ExtractorBase]] = {
 }
 
 
-def detect_extractor(input_file: typing.TextIO) -> typing.Type[ExtractorBase]:
-    for extractor_cls in ALL_EXTRACTORS.values():
-        input_file.seek(os.SEEK_SET)
-        if extractor_cls(input_file).detect():
+def build_header_index(
+    extractors: typing.Iterable[typing.Type[ExtractorBase]],
+) -> tuple[
+    dict[tuple[str, ...], typing.Type[ExtractorBase]],
+    list[typing.Type[ExtractorBase]],
+]:
+    header_index = {}
+    required_header_extractors = []
+    for extractor_cls in extractors:
+        if extractor_cls.HEADER_FIELDS is not None:
+            # the first one wins, same as checking them in order
+            header_index.setdefault(extractor_cls.HEADER_FIELDS, extractor_cls)
+        if extractor_cls.REQUIRED_HEADER_FIELDS is not None:
+            required_header_extractors.append(extractor_cls)
+    return header_index, required_header_extractors
+
+
+# exact header fields to extractor mapping, and the extractors accepting any header with their required fields
+HEADER_INDEX, REQUIRED_HEADER_EXTRACTORS = build_header_index(ALL_EXTRACTORS.values())
+
+
+def detect_extractor_by_header(
+    fieldnames: typing.Sequence[str],
+) -> typing.Type[ExtractorBase] | None:
+    """Find the extractor for the given header fields"""
+    extractor_cls = HEADER_INDEX.get(tuple(fieldnames))
+    if extractor_cls is not None:
+        return extractor_cls
+    fieldname_set = frozenset(fieldnames)
+    for extractor_cls in REQUIRED_HEADER_EXTRACTORS:
+        if extractor_cls.REQUIRED_HEADER_FIELDS.issubset(fieldname_set):
             return extractor_cls
+
+
+def detect_extractor(
+    input_file: InputFile, observer: ExtractorObserver | None = None
+) -> typing.Type[ExtractorBase] | None:
+    if observer is not None:
+        start = time.perf_counter()
+    try:
+        input_file = open_input(input_file)
+    except ValueError:
+        # such as a zip archive with multiple files, which need to be detected one by one
+        fieldnames = None
+    else:
+        input_file.seek(os.SEEK_SET)
+        fieldnames = read_header(input_file)
+    extractor_cls = None
+    if fieldnames is not None:
+        extractor_cls = detect_extractor_by_header(fieldnames)
+    if observer is not None:
+        observer.on_phase(None, PHASE_DETECT, time.perf_counter() - start)
+    return extractor_cls
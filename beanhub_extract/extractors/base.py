@@ -1,18 +1,1034 @@
+import codecs
+import csv
+import dataclasses
+import datetime
+import hashlib
+import io
+import itertools
+import mmap
+import os
+import pathlib
+import time
 import typing
 
+from ..chunking import bisect_records
+from ..chunking import count_records
+from ..compression import COMPRESSION_ZIP
+from ..compression import detect_compression
+from ..compression import is_decompressed
+from ..compression import open_decompressed
+from ..compression import open_single_zip_member
+from ..data_types import BATCH_COLUMN_FIELDS
+from ..data_types import DateRange
+from ..data_types import ExtractionCursor
 from ..data_types import Fingerprint
+from ..data_types import LazyTransaction
 from ..data_types import Transaction
+from ..data_types import TRANSACTION_FIELDS
+from ..data_types import TransactionBatch
+from ..observer import ExtractorObserver
+from ..observer import PHASE_CONVERT
+from ..observer import PHASE_DETECT
+from ..observer import PHASE_EXTRACT
+from ..observer import PHASE_FINGERPRINT
+from ..observer import PHASE_TOKENIZE
+from ..record_reader import OffsetRecordReader
+from ..reverse_reader import is_ascii_compatible
+from ..reverse_reader import read_last_record
+from ..row_index import RowIndex
+
+DEFAULT_BATCH_SIZE = 1000
+# the encoding for binary inputs, it decodes UTF-8 and skips the BOM if there's one
+DEFAULT_BINARY_ENCODING = "utf-8-sig"
+BOM = "\ufeff"
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+# fields always extracted regardless of the projection, for telling where a transaction comes from
+IDENTITY_FIELDS = frozenset(["extractor", "file", "lineno", "reversed_lineno"])
+
+InputFile = typing.TextIO | typing.BinaryIO | bytes | bytearray | memoryview | mmap.mmap
+
+
+class BufferIO(io.RawIOBase):
+    """Read-only seekable raw IO over a bytes-like object or mmap without copying the whole of it"""
+
+    def __init__(self, data: bytes | bytearray | memoryview | mmap.mmap):
+        if isinstance(data, memoryview):
+            data = data.cast("B")
+        self._data = data
+        self._size = len(data)
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self._data[self._position : self._position + len(buffer)]
+        size = len(chunk)
+        buffer[:size] = chunk
+        self._position += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence {whence}")
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self):
+        # drop the reference, so that a mmap can be closed by its owner
+        self._data = b""
+        super().close()
+
+
+class DetachOnDelete:
+    """Mixin for wrappers of a file owned by the caller, it leaves the wrapped file open when the wrapper is gone"""
+
+    def __del__(self):
+        try:
+            self.detach()
+        except ValueError:
+            pass
+
+
+class BinaryBufferedReader(DetachOnDelete, io.BufferedReader):
+    pass
+
+
+class BinaryTextWrapper(DetachOnDelete, io.TextIOWrapper):
+    pass
+
+
+class DecompressedTextWrapper(io.TextIOWrapper):
+    """Text wrapper of a decompressing stream, named after the compressed file or the archive member"""
+
+    def __init__(self, buffer: typing.BinaryIO, encoding: str, name: str | None):
+        super().__init__(buffer, encoding)
+        self._name = name
+
+    @property
+    def name(self) -> str | None:
+        return self._name
+
+
+def open_input(
+    input_file: InputFile, encoding: str = DEFAULT_BINARY_ENCODING
+) -> typing.TextIO:
+    """Get a text file for reading the given input. Bytes-like objects and mmaps are read in place, and binary
+    files are decoded lazily as the text is read. Text files are returned as they are. Binary inputs compressed
+    with gzip, bzip2 or xz, or zip archives with a single file, are detected by their magic bytes and decompressed
+    while reading
+
+    """
+    if isinstance(input_file, BUFFER_TYPES):
+        buffer = io.BufferedReader(BufferIO(input_file))
+        wrapper_cls = io.TextIOWrapper
+    elif isinstance(input_file, (io.RawIOBase, io.BufferedIOBase)):
+        buffer = input_file
+        if isinstance(buffer, io.RawIOBase):
+            buffer = BinaryBufferedReader(buffer)
+        wrapper_cls = BinaryTextWrapper
+    else:
+        return input_file
+    compression = detect_compression(buffer)
+    if compression is None:
+        return wrapper_cls(buffer, encoding)
+    name = getattr(buffer, "name", None)
+    if compression == COMPRESSION_ZIP:
+        name, decompressed = open_single_zip_member(buffer, name)
+    else:
+        decompressed = open_decompressed(buffer, compression)
+    return DecompressedTextWrapper(decompressed, encoding, name=name)
+
+
+def skip_bom(input_file: typing.Iterable[str]) -> typing.Iterator[str]:
+    """Iterate the lines of the given text file with the UTF-8 BOM stripped from the first line, for files opened
+    without the utf-8-sig encoding
+
+    """
+    lines = iter(input_file)
+    first_line = next(lines, None)
+    if first_line is None:
+        return lines
+    return itertools.chain((first_line.removeprefix(BOM),), lines)
+
+
+def find_bom_end(input_file: typing.BinaryIO) -> int:
+    """Return the byte offset after the UTF-8 BOM at the beginning of the given binary file, or 0 without it"""
+    input_file.seek(0)
+    if input_file.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+        return len(codecs.BOM_UTF8)
+    return 0
+
+
+def is_seekable(input_file: typing.IO) -> bool:
+    try:
+        return input_file.seekable()
+    except (AttributeError, ValueError):
+        return False
+
+
+def get_binary_buffer(input_file: typing.TextIO) -> tuple[typing.BinaryIO, str] | None:
+    """Get the underlying seekable binary buffer of the given text file with its encoding, if there's one and the
+    encoding is ASCII-compatible, so that we can work on the byte offsets of records. Decompressing streams are
+    excluded, as seeking backward in them decompresses the data from the beginning again
+
+    """
+    buffer = getattr(input_file, "buffer", None)
+    encoding = getattr(input_file, "encoding", None)
+    if (
+        buffer is None
+        or encoding is None
+        or not is_ascii_compatible(encoding)
+        or not is_seekable(input_file)
+        or not is_seekable(buffer)
+        or is_decompressed(buffer)
+    ):
+        return
+    return buffer, encoding
+
+
+def hash_values(values: typing.Iterable[str]) -> str:
+    hash = hashlib.sha256()
+    for value in values:
+        hash.update(value.encode("utf8"))
+    return hash.hexdigest()
+
+
+def make_row(fieldnames: list[str], values: list[str]) -> dict[str, str | None]:
+    """Make a row dict from the given values the same way as `csv.DictReader` does"""
+    row = dict(zip(fieldnames, values))
+    field_count = len(fieldnames)
+    value_count = len(values)
+    if field_count < value_count:
+        row[None] = values[field_count:]
+    elif field_count > value_count:
+        for key in fieldnames[value_count:]:
+            row[key] = None
+    return row
+
+
+def make_dict_reader(input_file: typing.TextIO) -> csv.DictReader:
+    """Make a `csv.DictReader` with the UTF-8 BOM stripped from the header fields"""
+    return csv.DictReader(skip_bom(input_file))
+
+
+def read_header(input_file: typing.TextIO) -> list[str] | None:
+    """Read the header fields of given CSV file, returns None if it's not a valid CSV file"""
+    try:
+        return next(csv.reader(skip_bom(input_file)), None)
+    except Exception:
+        return
+
+
+def keep_raw(value: typing.Any) -> typing.Any:
+    """The converter for keeping the raw value in lazy mode"""
+    return value
+
+
+def skip_value(value: typing.Any) -> None:
+    """The converter for the fields not in the projection"""
+    return None
+
+
+def optional(
+    converter: typing.Callable[[str], typing.Any]
+) -> typing.Callable[[str], typing.Any]:
+    """Make a converter accepting blank values"""
+
+    def convert(value: str) -> typing.Any:
+        if not value.strip():
+            return
+        return converter(value)
+
+    return convert
+
+
+@dataclasses.dataclass(frozen=True)
+class FieldColumn:
+    # the column the value of the transaction field is read from
+    column: str
+    # the converter of the raw value, None for keeping it as it is
+    converter: typing.Callable[[str], typing.Any] | None = None
+
+
+@dataclasses.dataclass(frozen=True)
+class ConversionPlan:
+    # (column index, transaction field name, converter) for columns mapped to transaction fields
+    field_columns: list[tuple[int, str, typing.Callable[[str], typing.Any] | None]]
+    # (column index, name, converter) for the other columns to be put into extra
+    extra_columns: list[tuple[int, str, typing.Callable[[str], typing.Any] | None]]
+    # number of columns in the header
+    column_count: int
+    # whether to put the extra columns into extra
+    extra_requested: bool = True
+
+
+def compile_conversion_plan(
+    fieldnames: list[str],
+    field_columns: dict[str, FieldColumn],
+    projection: frozenset[str] | None = None,
+    extra_converters: dict[str, typing.Callable[[str], typing.Any]] | None = None,
+) -> ConversionPlan:
+    """Compile the plan for converting rows into transaction values based on the header fields and the field
+    columns of an extractor. Only the fields in the projection are converted if it's provided, and the extra columns
+    are skipped unless `extra` is in it
+
+    """
+    # the last one wins for duplicate names, same as csv.DictReader does
+    column_indexes = {name: index for index, name in enumerate(fieldnames)}
+    extra_requested = projection is None or "extra" in projection
+    extra_columns = []
+    if extra_requested:
+        mapped_columns = frozenset(
+            field_column.column for field_column in field_columns.values()
+        )
+        if extra_converters is None:
+            extra_converters = {}
+        extra_columns = [
+            (index, name, extra_converters.get(name))
+            for name, index in column_indexes.items()
+            if name not in mapped_columns
+        ]
+    return ConversionPlan(
+        field_columns=[
+            (column_indexes[field_column.column], name, field_column.converter)
+            for name, field_column in field_columns.items()
+            if field_column.column in column_indexes
+            and (projection is None or name in projection)
+        ],
+        extra_columns=extra_columns,
+        column_count=len(fieldnames),
+        extra_requested=extra_requested,
+    )
+
+
+def iter_records(
+    records: typing.Iterable[list[str]], row_count: int | None = None
+) -> typing.Generator[tuple[int, int, list[str]], None, None]:
+    """Yield (lineno, reversed_lineno, values) for given records. The records need to be a list if the row count
+    is not provided
+
+    """
+    if row_count is None:
+        row_count = len(records)
+    for i, values in enumerate(records):
+        yield i + 1, i - row_count, values
 
 
 class ExtractorBase:
-    def __init__(self, input_file: typing.TextIO):
-        self.input_file = input_file
+    EXTRACTOR_NAME: str
+    # the exact header fields of files in this format, used for detecting the format
+    HEADER_FIELDS: tuple[str, ...] | None = None
+    # the header fields required for files in this format, for formats accepting any other extra fields
+    REQUIRED_HEADER_FIELDS: frozenset[str] | None = None
+    # transaction field name to the column its value is read from and the converter of the raw value. The raw values
+    # of the fields with a converter are kept as they are in lazy mode, and converted only when they are accessed.
+    # The converters are also used for finding out the columns failed to convert when the extraction stopped with an
+    # error, and the one of `date` for filtering rows by a date range
+    FIELD_COLUMNS: dict[str, FieldColumn] = {}
+    # column name to the converter of its values in `extra`, for the columns not in `FIELD_COLUMNS`
+    EXTRA_CONVERTERS: dict[str, typing.Callable[[str], typing.Any]] = {}
+    # whether the rows are sorted by date from the newest to the oldest, so that the rows out of a date range can be
+    # skipped with binary search
+    DESCENDING_DATES: bool = False
+
+    def __init__(
+        self,
+        input_file: InputFile,
+        single_pass: bool = False,
+        cursor: ExtractionCursor | None = None,
+        resumable: bool = False,
+        observer: ExtractorObserver | None = None,
+        lazy: bool = False,
+        date_range: DateRange | None = None,
+        fields: typing.Iterable[str] | None = None,
+        row_index_path: str | pathlib.Path | None = None,
+    ):
+        # binary inputs are decoded as UTF-8 with an optional BOM
+        self.input_file = open_input(input_file)
+        # read and tokenize the file only once by buffering the raw rows instead of counting them in a separated pass
+        # first. it's always the case for non-seekable input files, such as pipes or sockets
+        self.single_pass = single_pass
+        # the cursor returned from a previous extraction, to extract only the rows after it
+        self.start_cursor = cursor
+        # keep track of the byte offsets of rows, so that we can get a cursor for resuming the extraction later.
+        # it's implied when a cursor is provided
+        self.resumable = resumable or cursor is not None
+        # whether the extraction resumed from the cursor, it's False when the anchor row doesn't match
+        self.resumed = False
+        # (offset, lineno, values) of the last extracted row
+        self._anchor: tuple[int, int, list[str]] | None = None
+        # the observer for the timings and counters, nothing is measured without it
+        self.observer = observer
+        # generate `LazyTransaction` objects converting the field values on access
+        self.lazy = lazy
+        # extract only the rows with the transaction date in this range, the other rows are skipped before any
+        # conversion
+        self.date_range = date_range
+        # the transaction fields to extract, the other ones are left None without reading or converting their values.
+        # the identity fields are always extracted
+        self.fields: frozenset[str] | None = None
+        if fields is not None:
+            self.fields = frozenset(fields)
+            unknown_fields = self.fields.difference(TRANSACTION_FIELDS)
+            if unknown_fields:
+                raise ValueError(
+                    f"Unknown transaction fields {', '.join(sorted(unknown_fields))}"
+                )
+        # the row index for `get`, it's built on the first call if it's not provided or doesn't match the file
+        self.row_index: RowIndex | None = None
+        # the sidecar file for keeping the row index, it's loaded from and saved to it if provided
+        self.row_index_path = row_index_path
+        # (fieldnames, reversed_lineno, values) of the single record to extract for `get`
+        self._get_record: tuple[list[str], int, int, list[str]] | None = None
+        # (fieldnames, lineno, values) of the last row read, only kept with an observer
+        self._last_record: tuple[list[str], int, list[str]] | None = None
+        # seconds spent on tokenizing and number of rows read in the current extraction, only measured with an
+        # observer
+        self._tokenize_seconds = 0.0
+        self._rows_parsed = 0
+        # bytes read by the row counting pass before the extraction in the two-pass mode, only reported with an
+        # observer
+        self._prepass_bytes = 0
+
+    @property
+    def cursor(self) -> ExtractionCursor | None:
+        """The cursor pointing to the last extracted row for resuming the extraction later"""
+        if self._anchor is None:
+            return
+        offset, lineno, values = self._anchor
+        return ExtractionCursor(
+            offset=offset, lineno=lineno, row_hash=hash_values(values)
+        )
+
+    @classmethod
+    def match_header(cls, fieldnames: typing.Sequence[str]) -> bool:
+        if cls.HEADER_FIELDS is not None and tuple(fieldnames) == cls.HEADER_FIELDS:
+            return True
+        if cls.REQUIRED_HEADER_FIELDS is not None:
+            return cls.REQUIRED_HEADER_FIELDS.issubset(fieldnames)
+        return False
 
     def detect(self) -> bool:
-        raise NotImplementedError()
+        if self.observer is not None:
+            start = time.perf_counter()
+        fieldnames = read_header(self.input_file)
+        result = fieldnames is not None and self.match_header(fieldnames)
+        if self.observer is not None:
+            self.observer.on_phase(self, PHASE_DETECT, time.perf_counter() - start)
+        return result
 
     def fingerprint(self) -> Fingerprint | None:
-        raise NotImplementedError()
+        if self.observer is None:
+            return self._fingerprint()
+        start = time.perf_counter()
+        try:
+            return self._fingerprint()
+        finally:
+            self.observer.on_phase(self, PHASE_FINGERPRINT, time.perf_counter() - start)
+
+    def get_date_range(self) -> DateRange | None:
+        """Get the range of the transaction dates in the input file, or None if there's no row with a date. With
+        `DESCENDING_DATES`, only the first and the last rows are read, otherwise all the rows are scanned as the rows
+        could be in any order
+
+        """
+        position = self.input_file.tell()
+        reader = csv.reader(skip_bom(self.input_file))
+        fieldnames = next(reader, None)
+        if fieldnames is None:
+            return
+        get_date = self.make_date_getter(fieldnames)
+        if self.DESCENDING_DATES and is_seekable(self.input_file):
+            first_values = next((values for values in reader if values), None)
+            if first_values is None:
+                return
+            self.input_file.seek(position)
+            _, last_row = self.read_last_row()
+            newest_date = get_date(first_values)
+            oldest_date = get_date([last_row[field] or "" for field in fieldnames])
+            if newest_date is not None and oldest_date is not None:
+                return DateRange(
+                    start=min(oldest_date, newest_date),
+                    end=max(oldest_date, newest_date),
+                )
+            # the rows at the ends have no dates, scan all of them instead
+            self.input_file.seek(position)
+            reader = csv.reader(skip_bom(self.input_file))
+            next(reader)
+        start = end = None
+        for values in reader:
+            if not values:
+                continue
+            date = get_date(values)
+            if date is None:
+                continue
+            if start is None or date < start:
+                start = date
+            if end is None or date > end:
+                end = date
+        if start is None:
+            return
+        return DateRange(start=start, end=end)
 
     def __call__(self) -> typing.Generator[Transaction, None, None]:
+        if self.lazy:
+            make_transaction = LazyTransaction.make_factory(self.get_field_converters())
+            for values in self._iter_values():
+                yield make_transaction(**values)
+            return
+        for values in self._iter_values():
+            yield Transaction(**values)
+
+    def build_row_index(self) -> RowIndex:
+        """Build the row index of the input file, and save it to the sidecar file if there's one"""
+        buffer, encoding = self._get_seekable_buffer("Row index")
+        start = find_bom_end(buffer)
+        header = OffsetRecordReader(buffer, encoding, start=start).read_record()
+        if header is not None:
+            start = header[1]
+        self.row_index = RowIndex.build(buffer, start, encoding)
+        if self.row_index_path is not None:
+            self.row_index.save(self.row_index_path)
+        return self.row_index
+
+    def get(
+        self, lineno: int | None = None, reversed_lineno: int | None = None
+    ) -> Transaction | None:
+        """Get the transaction of the row with the given lineno or reversed_lineno, or None if there's no such row.
+        It seeks to the row with the row index, which is loaded from the sidecar file or built on the first call,
+        and built again if the file changed since then
+
+        """
+        if (lineno is None) == (reversed_lineno is None):
+            raise ValueError("Either lineno or reversed_lineno should be provided")
+        buffer, encoding = self._get_seekable_buffer("Getting a row")
+        row_index = self.row_index
+        if row_index is None and self.row_index_path is not None:
+            row_index = RowIndex.load(self.row_index_path)
+        if row_index is None or not row_index.is_valid(buffer):
+            row_index = self.build_row_index()
+        self.row_index = row_index
+        row_count = len(row_index)
+        if lineno is None:
+            lineno = row_count + reversed_lineno + 1
+        if not 1 <= lineno <= row_count:
+            return
+        header = OffsetRecordReader(
+            buffer, encoding, start=find_bom_end(buffer)
+        ).read_record()
+        record = OffsetRecordReader(
+            buffer, encoding, start=row_index.offsets[lineno - 1]
+        ).read_record()
+        # reset the text wrapper state as we moved the underlying buffer
+        self.input_file.seek(0)
+        self._get_record = (header[2], lineno, lineno - row_count - 1, record[2])
+        try:
+            return next(self(), None)
+        finally:
+            self._get_record = None
+
+    def iter_batches(
+        self, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> typing.Generator[TransactionBatch, None, None]:
+        """Generate transactions in columnar batches with at most `batch_size` transactions in each of them.
+        Transactions with a different `extra` schema from the previous ones start a new batch
+
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size should be at least 1")
+        batch = None
+        batch_key = None
+        # columns are always converted
+        lazy_converters = self.get_field_converters().items() if self.lazy else ()
+        for values in self._iter_values():
+            for name, converter in lazy_converters:
+                value = values.get(name)
+                if value is not None:
+                    values[name] = converter(value)
+            extra = values.get("extra")
+            extra_schema = None if extra is None else tuple(extra.keys())
+            key = (values["extractor"], values["file"], extra_schema)
+            if batch is not None and (key != batch_key or len(batch) >= batch_size):
+                yield batch
+                batch = None
+            if batch is None:
+                batch_key = key
+                batch = TransactionBatch(
+                    extractor=values["extractor"],
+                    file=values["file"],
+                    columns={name: [] for name in BATCH_COLUMN_FIELDS},
+                    extra_schema=extra_schema,
+                    extra_columns=(
+                        None
+                        if extra_schema is None
+                        else {extra_key: [] for extra_key in extra_schema}
+                    ),
+                )
+            for name, column in batch.columns.items():
+                column.append(values.get(name))
+            if extra_schema is not None:
+                for extra_key, column in batch.extra_columns.items():
+                    column.append(extra[extra_key])
+        if batch is not None:
+            yield batch
+
+    def _fingerprint(self) -> Fingerprint | None:
+        raise NotImplementedError()
+
+    @classmethod
+    def get_field_converters(cls) -> dict[str, typing.Callable[[str], typing.Any]]:
+        """Get the converters of the fields in `FIELD_COLUMNS` with one, keyed by the transaction field name"""
+        return {
+            name: field_column.converter
+            for name, field_column in cls.FIELD_COLUMNS.items()
+            if field_column.converter is not None
+        }
+
+    def _converter(self, name: str) -> typing.Callable[[str], typing.Any]:
+        """Get the converter for a field in `FIELD_COLUMNS` to use in `_extract_values`, it keeps the raw value in
+        lazy mode, and skips the conversion if the field is not in the projection
+
+        """
+        if not self._is_requested(name):
+            return skip_value
+        if self.lazy:
+            return keep_raw
+        return self.FIELD_COLUMNS[name].converter
+
+    def _compile_conversion_plan(self, fieldnames: list[str]) -> ConversionPlan:
+        """Compile the conversion plan of the given header fields with `FIELD_COLUMNS` and the projection, the raw
+        values are kept in lazy mode
+
+        """
+        plan = compile_conversion_plan(
+            fieldnames, self.FIELD_COLUMNS, self.fields, self.EXTRA_CONVERTERS
+        )
+        if not self.lazy:
+            return plan
+        return dataclasses.replace(
+            plan,
+            field_columns=[
+                (index, name, None) for index, name, _ in plan.field_columns
+            ],
+        )
+
+    def _is_requested(self, name: str) -> bool:
+        """Check if the given transaction field is in the projection"""
+        return self.fields is None or name in self.fields
+
+    def _extract_values(self) -> typing.Generator[dict[str, typing.Any], None, None]:
+        """Generate keyword arguments for creating `Transaction` objects"""
         raise NotImplementedError()
+
+    def _iter_kwargs(
+        self,
+    ) -> typing.Generator[tuple[int, int, dict[str, typing.Any]], None, None]:
+        """Yield (lineno, reversed_lineno, kwargs) for each row of the input CSV file, with the requested fields in
+        `FIELD_COLUMNS` and the other columns in `extra` if there's any. Like `make_row`, values of missing columns
+        are None, and extra values without a column are put into `extra` with None as the key
+
+        """
+        fieldnames, records = self._read_records()
+        if fieldnames is None:
+            return
+        plan = self._compile_conversion_plan(fieldnames)
+        column_count = plan.column_count
+        for lineno, reversed_lineno, values in records:
+            value_count = len(values)
+            if value_count < column_count:
+                values = values + [None] * (column_count - value_count)
+            kwargs = {}
+            for index, name, converter in plan.field_columns:
+                value = values[index]
+                kwargs[name] = value if converter is None else converter(value)
+            if plan.extra_requested:
+                extra = {}
+                for index, name, converter in plan.extra_columns:
+                    value = values[index]
+                    extra[name] = value if converter is None else converter(value)
+                if value_count > column_count:
+                    extra[None] = values[column_count:]
+                if extra:
+                    kwargs["extra"] = extra
+            yield lineno, reversed_lineno, kwargs
+
+    def _iter_values(self) -> typing.Generator[dict[str, typing.Any], None, None]:
+        if self.observer is None:
+            return self._extract_values()
+        return self._observe_values()
+
+    def _observe_values(self) -> typing.Generator[dict[str, typing.Any], None, None]:
+        """Generate the values from `_extract_values` while reporting the timings and counters to the observer"""
+        observer = self.observer
+        perf_counter = time.perf_counter
+        buffer = getattr(self.input_file, "buffer", None)
+        try:
+            start_position = None if buffer is None else buffer.tell()
+        except (OSError, ValueError):
+            start_position = None
+        self._last_record = None
+        self._tokenize_seconds = 0.0
+        self._rows_parsed = 0
+        self._prepass_bytes = 0
+        emitted = 0
+        extract_seconds = 0.0
+        values_iter = self._extract_values()
+        try:
+            while True:
+                start = perf_counter()
+                try:
+                    values = next(values_iter, None)
+                except Exception as exc:
+                    self._report_conversion_errors(exc)
+                    raise
+                finally:
+                    extract_seconds += perf_counter() - start
+                if values is None:
+                    break
+                emitted += 1
+                yield values
+        finally:
+            # make sure the records generator is done and reported its numbers
+            values_iter.close()
+            observer.on_phase(self, PHASE_TOKENIZE, self._tokenize_seconds)
+            observer.on_phase(
+                self, PHASE_CONVERT, max(extract_seconds - self._tokenize_seconds, 0.0)
+            )
+            observer.on_phase(self, PHASE_EXTRACT, extract_seconds)
+            observer.on_rows(self, parsed=self._rows_parsed, emitted=emitted)
+            if start_position is not None:
+                try:
+                    observer.on_bytes_read(
+                        self, buffer.tell() - start_position + self._prepass_bytes
+                    )
+                except (OSError, ValueError):
+                    pass
+
+    def _report_conversion_errors(self, error: Exception):
+        """Find out the fields of the last row failed to convert, and report them to the observer"""
+        if self._last_record is None:
+            return
+        fieldnames, lineno, values = self._last_record
+        row = make_row(fieldnames, values)
+        column_converters = {}
+        for field_column in self.FIELD_COLUMNS.values():
+            if field_column.converter is not None:
+                # the first one wins for columns read into multiple fields
+                column_converters.setdefault(
+                    field_column.column, field_column.converter
+                )
+        column_converters.update(self.EXTRA_CONVERTERS)
+        for column, converter in column_converters.items():
+            value = row.get(column)
+            try:
+                converter(value)
+            except Exception as exc:
+                self.observer.on_conversion_error(
+                    self, field=column, value=value, lineno=lineno, error=exc
+                )
+
+    def _observe_records(
+        self,
+        fieldnames: list[str],
+        records: typing.Iterator[tuple[int, int, list[str]]],
+    ) -> typing.Generator[tuple[int, int, list[str]], None, None]:
+        perf_counter = time.perf_counter
+        while True:
+            start = perf_counter()
+            record = next(records, None)
+            self._tokenize_seconds += perf_counter() - start
+            if record is None:
+                return
+            self._rows_parsed += 1
+            self._last_record = (fieldnames, record[0], record[2])
+            yield record
+
+    def _read_records(
+        self,
+    ) -> tuple[
+        list[str] | None, typing.Generator[tuple[int, int, list[str]], None, None]
+    ]:
+        """Read the header of the input CSV file, and return it with a generator yielding
+        (lineno, reversed_lineno, values) for each row
+
+        """
+        if self.observer is None:
+            fieldnames, records = self._read_csv_records()
+        else:
+            start = time.perf_counter()
+            fieldnames, records = self._read_csv_records()
+            self._tokenize_seconds += time.perf_counter() - start
+            records = self._observe_records(fieldnames, records)
+        if self.date_range is not None and fieldnames is not None:
+            records = self._filter_records(fieldnames, records)
+        return fieldnames, records
+
+    def make_date_getter(
+        self, fieldnames: list[str]
+    ) -> typing.Callable[[list[str]], datetime.date | None]:
+        """Make a function getting the transaction date from the values of a record without converting the other
+        fields, the date is None if it's blank or missing
+
+        """
+        date_column = self.FIELD_COLUMNS.get("date")
+        if date_column is None or date_column.column not in fieldnames:
+            return lambda values: None
+        index = fieldnames.index(date_column.column)
+        parse_date = date_column.converter
+
+        def get_date(values: list[str]) -> datetime.date | None:
+            if index >= len(values) or not values[index].strip():
+                return
+            return parse_date(values[index])
+
+        return get_date
+
+    def _filter_records(
+        self,
+        fieldnames: list[str],
+        records: typing.Iterable[tuple[int, int, list[str]]],
+    ) -> typing.Generator[tuple[int, int, list[str]], None, None]:
+        get_date = self.make_date_getter(fieldnames)
+        date_range = self.date_range
+        for record in records:
+            if get_date(record[2]) in date_range:
+                yield record
+
+    def _read_csv_records(
+        self,
+    ) -> tuple[
+        list[str] | None, typing.Generator[tuple[int, int, list[str]], None, None]
+    ]:
+        if self._get_record is not None:
+            fieldnames, lineno, reversed_lineno, values = self._get_record
+            return fieldnames, iter([(lineno, reversed_lineno, values)])
+        if self.resumable:
+            return self._read_resumable_records()
+        if (
+            self.date_range is not None
+            and self.DESCENDING_DATES
+            and not self.single_pass
+        ):
+            result = self._read_sorted_records()
+            if result is not None:
+                return result
+        if self.single_pass or not is_seekable(self.input_file):
+            reader = csv.reader(skip_bom(self.input_file))
+            fieldnames = next(reader, None)
+            if fieldnames is None:
+                return None, iter_records([])
+            return fieldnames, iter_records([values for values in reader if values])
+
+        start = self.input_file.tell()
+        buffer = getattr(self.input_file, "buffer", None)
+        try:
+            buffer_start = None if buffer is None else buffer.tell()
+        except (OSError, ValueError):
+            buffer_start = None
+        reader = csv.reader(skip_bom(self.input_file))
+        fieldnames = next(reader, None)
+        if fieldnames is None:
+            return None, iter_records([])
+        row_count = sum(1 for values in reader if values)
+        if buffer_start is not None:
+            self._prepass_bytes += buffer.tell() - buffer_start
+        self.input_file.seek(start)
+        reader = csv.reader(skip_bom(self.input_file))
+        next(reader)
+        return fieldnames, iter_records(
+            (values for values in reader if values), row_count
+        )
+
+    def _read_sorted_records(
+        self,
+    ) -> (
+        tuple[
+            list[str] | None,
+            typing.Generator[tuple[int, int, list[str]], None, None],
+        ]
+        | None
+    ):
+        """Read the records in the date range of a file sorted by date in descending order, by finding the byte
+        offsets of the range boundaries with binary search. The records out of the range are only tokenized and counted
+        for the line numbers, without converting them. Returns None if it's not possible, such as the file is not
+        seekable, or the boundaries found are not record boundaries because of quoted newlines
+
+        """
+        binary_buffer = get_binary_buffer(self.input_file)
+        if binary_buffer is None or self.input_file.tell() != 0:
+            return
+        buffer, encoding = binary_buffer
+        header = OffsetRecordReader(
+            buffer, encoding, start=find_bom_end(buffer)
+        ).read_record()
+        if header is None:
+            return None, iter_records([])
+        _, header_end, fieldnames = header
+        get_date = self.make_date_getter(fieldnames)
+        date_range = self.date_range
+        end = buffer.seek(0, os.SEEK_END)
+
+        def is_before_end(values: list[str]) -> bool:
+            date = get_date(values)
+            return date is not None and date <= date_range.end
+
+        def is_before_start(values: list[str]) -> bool:
+            date = get_date(values)
+            return date is not None and date < date_range.start
+
+        # the offset of the first row on or before the end date, and the one of the first row before the start date
+        range_start = header_end
+        if date_range.end is not None:
+            range_start = bisect_records(
+                buffer, is_before_end, header_end, end, encoding=encoding
+            )
+        range_end = end
+        if date_range.start is not None:
+            range_end = bisect_records(
+                buffer, is_before_start, range_start, end, encoding=encoding
+            )
+        before_count = count_records(buffer, header_end, range_start, encoding)
+        range_count = count_records(buffer, range_start, range_end, encoding)
+        after_count = count_records(buffer, range_end, encoding=encoding)
+        if before_count is None or range_count is None or after_count is None:
+            # reset the text wrapper state as we moved the underlying buffer
+            self.input_file.seek(0)
+            return
+        total = before_count + range_count + after_count
+        self._prepass_bytes += end - header_end
+        records = OffsetRecordReader(buffer, encoding, range_start)
+
+        def generate() -> typing.Generator[tuple[int, int, list[str]], None, None]:
+            for i, (offset, _, values) in enumerate(records):
+                if offset >= range_end:
+                    break
+                lineno = before_count + i + 1
+                yield lineno, lineno - total - 1, values
+
+        return fieldnames, generate()
+
+    def _get_seekable_buffer(self, operation: str) -> tuple[typing.BinaryIO, str]:
+        binary_buffer = get_binary_buffer(self.input_file)
+        if binary_buffer is None:
+            raise ValueError(
+                f"{operation} requires a seekable file in ASCII-compatible encoding"
+            )
+        return binary_buffer
+
+    def _read_resumable_records(
+        self,
+    ) -> tuple[
+        list[str] | None, typing.Generator[tuple[int, int, list[str]], None, None]
+    ]:
+        buffer, encoding = self._get_seekable_buffer("Resumable extraction")
+        header = OffsetRecordReader(
+            buffer, encoding, start=find_bom_end(buffer)
+        ).read_record()
+        if header is None:
+            return None, iter_records([])
+        _, start, fieldnames = header
+        lineno_offset = 0
+        self.resumed = False
+        self._anchor = None
+        cursor = self.start_cursor
+        if cursor is not None and cursor.offset >= start:
+            try:
+                anchor = OffsetRecordReader(
+                    buffer, encoding, cursor.offset
+                ).read_record()
+            except (UnicodeDecodeError, csv.Error):
+                anchor = None
+            # fallback to a full parse if the anchor row doesn't match, the file might have changed
+            if anchor is not None and hash_values(anchor[2]) == cursor.row_hash:
+                start = anchor[1]
+                lineno_offset = cursor.lineno
+                self.resumed = True
+                self._anchor = (cursor.offset, cursor.lineno, anchor[2])
+
+        records = OffsetRecordReader(buffer, encoding, start)
+        if self.single_pass:
+            records = list(records)
+            row_count = len(records)
+        else:
+            row_count = sum(1 for _ in records)
+            self._prepass_bytes += records.position - start
+            records = OffsetRecordReader(buffer, encoding, start)
+        total = lineno_offset + row_count
+
+        def generate() -> typing.Generator[tuple[int, int, list[str]], None, None]:
+            for i, (offset, _, values) in enumerate(records):
+                lineno = lineno_offset + i + 1
+                self._anchor = (offset, lineno, values)
+                yield lineno, lineno - total - 1, values
+
+        return fieldnames, generate()
+
+    def _iter_rows(
+        self,
+    ) -> typing.Generator[tuple[int, int, dict[str, str | None]], None, None]:
+        """Yield (lineno, reversed_lineno, row) for each row of the input CSV file"""
+        fieldnames, records = self._read_records()
+        for lineno, reversed_lineno, values in records:
+            yield lineno, reversed_lineno, make_row(fieldnames, values)
+
+    def read_last_row(self) -> tuple[list[str], dict[str, str | None]] | None:
+        """Read the header and the last row of the input CSV file. It seeks from the end of the file when
+        possible, otherwise it falls back to scanning all the rows
+
+        """
+        binary_buffer = get_binary_buffer(self.input_file)
+        if binary_buffer is not None and self.input_file.tell() == 0:
+            try:
+                return self._read_tail_row(*binary_buffer)
+            except (ValueError, csv.Error):
+                # the boundary of the last row cannot be told from the tail, such as there's a quote character in
+                # an unquoted field
+                pass
+            finally:
+                # reset the text wrapper state as we moved the underlying buffer
+                self.input_file.seek(0)
+        reader = make_dict_reader(self.input_file)
+        row = None
+        for row in reader:
+            pass
+        if row is None:
+            return
+        return reader.fieldnames, row
+
+    def _read_tail_row(
+        self, buffer: typing.BinaryIO, encoding: str
+    ) -> tuple[list[str], dict[str, str | None]] | None:
+        """Read the header and the last row by seeking from the end of the binary buffer. Raises ValueError if the
+        last row cannot be read reliably this way
+
+        """
+        header_start = find_bom_end(buffer)
+        last_record = read_last_record(buffer, encoding=encoding, start=header_start)
+        self.input_file.seek(0)
+        fieldnames = next(csv.reader(skip_bom(self.input_file)), None)
+        if fieldnames is None or last_record is None:
+            return
+        offset, values = last_record
+        if offset <= header_start:
+            # the last record is the header, there's no row
+            return
+        if len(values) != len(fieldnames):
+            raise ValueError(
+                "The last row doesn't have the same number of fields as the header"
+            )
+        return fieldnames, make_row(fieldnames, values)
@@ -1,18 +1,13 @@
-import csv
-import datetime
 import decimal
 import hashlib
-import os
 import typing
 
 from ..data_types import Fingerprint
-from ..data_types import Transaction
+from ..parsing import parse_mdy_date
 from .base import ExtractorBase
+from .base import FieldColumn
 
-
-def parse_date(date_str: str) -> datetime.date:
-    parts = date_str.split("/")
-    return datetime.date(int(parts[-1]), *(map(int, parts[:-1])))
+parse_date = parse_mdy_date
 
 
 class ChaseCreditCardExtractor(ExtractorBase):
@@ -27,56 +22,40 @@ class ChaseCreditCardExtractor(ExtractorBase):
         "Amount",
         "Memo",
     ]
-
-    def detect(self) -> bool:
-        reader = csv.DictReader(self.input_file)
-        try:
-            return reader.fieldnames == self.ALL_FIELDS
-        except Exception:
-            return False
-
-    def fingerprint(self) -> Fingerprint | None:
-        reader = csv.DictReader(self.input_file)
-        row = None
-        for row in reader:
-            pass
-        if row is None:
+    HEADER_FIELDS = tuple(ALL_FIELDS)
+    DESCENDING_DATES = True
+    FIELD_COLUMNS = {
+        "date": FieldColumn("Transaction Date", parse_mdy_date),
+        "post_date": FieldColumn("Post Date", parse_mdy_date),
+        "desc": FieldColumn("Description"),
+        "category": FieldColumn("Category"),
+        "type": FieldColumn("Type"),
+        "amount": FieldColumn("Amount", decimal.Decimal),
+        "note": FieldColumn("Memo"),
+    }
+
+    def _fingerprint(self) -> Fingerprint | None:
+        last_row = self.read_last_row()
+        if last_row is None:
             return
+        fieldnames, row = last_row
         hash = hashlib.sha256()
-        for field in reader.fieldnames:
+        for field in fieldnames:
             hash.update(row[field].encode("utf8"))
         return Fingerprint(
-            starting_date=parse_date(row["Transaction Date"]),
+            starting_date=parse_mdy_date(row["Transaction Date"]),
             first_row_hash=hash.hexdigest(),
         )
 
-    def __call__(self) -> typing.Generator[Transaction, None, None]:
+    def _extract_values(self) -> typing.Generator[dict[str, typing.Any], None, None]:
         filename = None
         if hasattr(self.input_file, "name"):
             filename = self.input_file.name
-        row_count_reader = csv.DictReader(self.input_file)
-        row_count = 0
-        for _ in row_count_reader:
-            row_count += 1
-        self.input_file.seek(os.SEEK_SET, 0)
-        reader = csv.DictReader(self.input_file)
-        for i, row in enumerate(reader):
-            kwargs = dict(
-                date=parse_date(row.pop("Transaction Date")),
-                post_date=parse_date(row.pop("Post Date")),
-                desc=row.pop("Description"),
-                category=row.pop("Category"),
-                type=row.pop("Type"),
-                amount=decimal.Decimal(row.pop("Amount")),
-                note=row.pop("Memo"),
-            )
-            if row:
-                kwargs["extra"] = row
-
-            yield Transaction(
+        for lineno, reversed_lineno, kwargs in self._iter_kwargs():
+            yield dict(
                 extractor=self.EXTRACTOR_NAME,
                 file=filename,
-                lineno=i + 1,
-                reversed_lineno=i - row_count,
-                **kwargs
+                lineno=lineno,
+                reversed_lineno=reversed_lineno,
+                **kwargs,
             )
@@ -1,33 +1,49 @@
-import csv
 import datetime
 import decimal
 import hashlib
-import os
 import typing
 from dataclasses import fields
 
 from ..data_types import Fingerprint
 from ..data_types import Transaction
-from ..utils import parse_date
+from ..parsing import parse_ymd_date
 from .base import ExtractorBase
+from .base import FieldColumn
+from .base import make_dict_reader
+from .base import optional
 
 EXCLUDED_FIELDS = frozenset(["extractor", "file", "lineno", "reversed_lineno", "extra"])
 ALL_FIELDS = frozenset(field.name for field in fields(Transaction)) - EXCLUDED_FIELDS
 
 
+def parse_bool(value: str) -> bool:
+    return value.lower() == "true"
+
+
+TYPE_CONVERTERS: dict[type, typing.Callable[[str], typing.Any]] = {
+    datetime.date: parse_ymd_date,
+    datetime.datetime: datetime.datetime.fromisoformat,
+    decimal.Decimal: decimal.Decimal,
+    bool: parse_bool,
+}
+FIELD_CONVERTERS: dict[str, typing.Callable[[str], typing.Any] | None] = {
+    field.name: TYPE_CONVERTERS.get(next(iter(typing.get_args(field.type)), None))
+    for field in fields(Transaction)
+}
+
+
 class CSVExtractor(ExtractorBase):
     EXTRACTOR_NAME = "csv"
     DEFAULT_IMPORT_ID = "{{ file | as_posix_path }}:{{ lineno }}"
+    REQUIRED_HEADER_FIELDS = ALL_FIELDS
+    # blank values are left None instead of converted
+    FIELD_COLUMNS = {
+        name: FieldColumn(name, None if converter is None else optional(converter))
+        for name, converter in FIELD_CONVERTERS.items()
+    }
 
-    def detect(self) -> bool:
-        reader = csv.DictReader(self.input_file)
-        try:
-            return frozenset(reader.fieldnames).issuperset(ALL_FIELDS)
-        except Exception:
-            return False
-
-    def fingerprint(self) -> Fingerprint | None:
-        reader = csv.DictReader(self.input_file)
+    def _fingerprint(self) -> Fingerprint | None:
+        reader = make_dict_reader(self.input_file)
         try:
             row = next(reader)
         except StopIteration:
@@ -45,44 +61,45 @@ class CSVExtractor(ExtractorBase):
         if not date_value:
             date_value = datetime.date(1970, 1, 1)
         return Fingerprint(
-            starting_date=parse_date(date_value),
+            starting_date=parse_ymd_date(date_value),
             first_row_hash=hash.hexdigest(),
         )
 
-    def __call__(self) -> typing.Generator[Transaction, None, None]:
+    def _extract_values(self) -> typing.Generator[dict[str, typing.Any], None, None]:
         filename = None
         if hasattr(self.input_file, "name"):
             filename = self.input_file.name
-        row_count_reader = csv.DictReader(self.input_file)
-        row_count = 0
-        for _ in row_count_reader:
-            row_count += 1
-        self.input_file.seek(os.SEEK_SET, 0)
-        reader = csv.DictReader(self.input_file)
-        for i, row in enumerate(reader):
+        fieldnames, records = self._read_records()
+        if fieldnames is None:
+            return
+        plan = self._compile_conversion_plan(fieldnames)
+        for lineno, reversed_lineno, values in records:
+            value_count = len(values)
             kwargs = {}
-            for field in fields(Transaction):
-                if field.name not in row:
+            for index, name, converter in plan.field_columns:
+                if index >= value_count:
                     continue
-                value = row.pop(field.name)
-                field_type, _ = typing.get_args(field.type)
-                if value is not None and value.strip():
-                    if field_type is datetime.date:
-                        value = parse_date(value)
-                    elif field_type is datetime.datetime:
-                        value = datetime.datetime.fromisoformat(value)
-                    elif field_type is decimal.Decimal:
-                        value = decimal.Decimal(value)
-                    elif field_type is bool:
-                        value = value.lower() == "true"
-                    kwargs[field.name] = value
-            if row:
-                kwargs["extra"] = row
+                value = values[index]
+                if value.strip():
+                    kwargs[name] = value if converter is None else converter(value)
+            if not plan.extra_requested:
+                extra = None
+            elif value_count >= plan.column_count:
+                extra = {name: values[index] for index, name, _ in plan.extra_columns}
+                if value_count > plan.column_count:
+                    extra[None] = values[plan.column_count :]
+            else:
+                extra = {
+                    name: values[index] if index < value_count else None
+                    for index, name, _ in plan.extra_columns
+                }
+            if extra:
+                kwargs["extra"] = extra
 
-            yield Transaction(
+            yield dict(
                 extractor=self.EXTRACTOR_NAME,
                 file=filename,
-                lineno=i + 1,
-                reversed_lineno=i - row_count,
+                lineno=lineno,
+                reversed_lineno=reversed_lineno,
                 **kwargs,
             )
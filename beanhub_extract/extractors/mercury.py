@@ -1,32 +1,26 @@
-import csv
 import datetime
 import decimal
+import functools
 import hashlib
-import os
 import typing
 
 import pytz
 
 from ..data_types import Fingerprint
-from ..data_types import Transaction
+from ..parsing import parse_localized_mdy_datetime
+from ..parsing import parse_mdy_date
+from ..parsing import parse_mdy_datetime
+from ..parsing import parse_time
 from .base import ExtractorBase
+from .base import FieldColumn
 
+DATE_SEPARATOR = "-"
+parse_date = functools.partial(parse_mdy_date, separator=DATE_SEPARATOR)
+parse_datetime = functools.partial(parse_mdy_datetime, separator=DATE_SEPARATOR)
 
-def parse_date(date_str: str) -> datetime.date:
-    parts = date_str.split("-")
-    return datetime.date(int(parts[-1]), *(map(int, parts[:-1])))
 
-
-def parse_time(time_str: str) -> datetime.time:
-    parts = time_str.split(":")
-    return datetime.time(*(map(int, parts)))
-
-
-def parse_datetime(timestamp_str: str) -> datetime.datetime:
-    parts = timestamp_str.split(" ")
-    date = parse_date(parts[0])
-    time = parse_time(parts[1])
-    return datetime.datetime.combine(date, time)
+def parse_timestamp(timestamp_str: str) -> datetime.datetime:
+    return parse_localized_mdy_datetime(timestamp_str, pytz.UTC, DATE_SEPARATOR)
 
 
 class MercuryExtractor(ExtractorBase):
@@ -48,65 +42,49 @@ class MercuryExtractor(ExtractorBase):
         "Timestamp",
         "Original Currency",
     ]
+    HEADER_FIELDS = tuple(ALL_FIELDS)
+    DESCENDING_DATES = True
+    FIELD_COLUMNS = {
+        "date": FieldColumn("Date (UTC)", parse_date),
+        "desc": FieldColumn("Description"),
+        "amount": FieldColumn("Amount", decimal.Decimal),
+        "status": FieldColumn("Status"),
+        "source_account": FieldColumn("Source Account"),
+        "bank_desc": FieldColumn("Bank Description"),
+        "reference": FieldColumn("Reference"),
+        "note": FieldColumn("Note"),
+        "category": FieldColumn("Category"),
+        "currency": FieldColumn("Original Currency"),
+        "name_on_card": FieldColumn("Name On Card"),
+        "last_four_digits": FieldColumn("Last Four Digits"),
+        "gl_code": FieldColumn("GL Code"),
+        "timestamp": FieldColumn("Timestamp", parse_timestamp),
+    }
 
-    def detect(self) -> bool:
-        reader = csv.DictReader(self.input_file)
-        try:
-            return reader.fieldnames == self.ALL_FIELDS
-        except Exception:
-            return False
-
-    def fingerprint(self) -> Fingerprint | None:
-        reader = csv.DictReader(self.input_file)
-        row = None
-        for row in reader:
-            pass
-        if row is None:
+    def _fingerprint(self) -> Fingerprint | None:
+        last_row = self.read_last_row()
+        if last_row is None:
             return
+        fieldnames, row = last_row
         hash = hashlib.sha256()
-        for field in reader.fieldnames:
+        for field in fieldnames:
             hash.update(row[field].encode("utf8"))
         return Fingerprint(
-            starting_date=parse_date(row["Date (UTC)"]),
+            starting_date=parse_mdy_date(row["Date (UTC)"], DATE_SEPARATOR),
             first_row_hash=hash.hexdigest(),
         )
 
-    def __call__(self) -> typing.Generator[Transaction, None, None]:
+    def _extract_values(self) -> typing.Generator[dict[str, typing.Any], None, None]:
         filename = None
         if hasattr(self.input_file, "name"):
             filename = self.input_file.name
-        row_count_reader = csv.DictReader(self.input_file)
-        row_count = 0
-        for _ in row_count_reader:
-            row_count += 1
-        self.input_file.seek(os.SEEK_SET, 0)
-        reader = csv.DictReader(self.input_file)
-        timezone = pytz.UTC
-        for i, row in enumerate(reader):
-            kwargs = dict(
-                date=parse_date(row.pop("Date (UTC)")),
-                desc=row.pop("Description"),
-                amount=decimal.Decimal(row.pop("Amount")),
-                status=row.pop("Status"),
-                source_account=row.pop("Source Account"),
-                bank_desc=row.pop("Bank Description"),
-                reference=row.pop("Reference"),
-                note=row.pop("Note"),
-                category=row.pop("Category"),
-                currency=row.pop("Original Currency"),
-                name_on_card=row.pop("Name On Card"),
-                last_four_digits=row.pop("Last Four Digits"),
-                gl_code=row.pop("GL Code"),
-                timestamp=timezone.localize(parse_datetime(row.pop("Timestamp"))),
-            )
-            if row:
-                kwargs["extra"] = row
-
-            yield Transaction(
+        timezone = "UTC" if self._is_requested("timezone") else None
+        for lineno, reversed_lineno, kwargs in self._iter_kwargs():
+            yield dict(
                 extractor=self.EXTRACTOR_NAME,
                 file=filename,
-                lineno=i + 1,
-                reversed_lineno=i - row_count,
-                timezone="UTC",
-                **kwargs
+                lineno=lineno,
+                reversed_lineno=reversed_lineno,
+                timezone=timezone,
+                **kwargs,
             )
@@ -1,15 +1,16 @@
-import csv
+import datetime
 import decimal
 import hashlib
-import os
 import typing
 
 import iso8601
 
 from ..data_types import Fingerprint
-from ..data_types import Transaction
-from ..utils import parse_date
+from ..parsing import parse_ymd_date
 from .base import ExtractorBase
+from .base import FieldColumn
+from .base import make_dict_reader
+from .base import optional
 
 SIMPLE_VALUE_FIELDS = [
     "date",
@@ -63,16 +64,17 @@ ALL_FIELDS = (
 class PlaidExtractor(ExtractorBase):
     EXTRACTOR_NAME = "plaid"
     DEFAULT_IMPORT_ID = "{{ transaction_id }}"
+    HEADER_FIELDS = tuple(ALL_FIELDS)
+    # the date is read from the authorized date instead for posted transactions if there's one
+    FIELD_COLUMNS = {
+        "date": FieldColumn("date", parse_ymd_date),
+        "post_date": FieldColumn("date", parse_ymd_date),
+        "amount": FieldColumn("amount", decimal.Decimal),
+        "timestamp": FieldColumn("datetime", optional(iso8601.parse_date)),
+    }
 
-    def detect(self) -> bool:
-        reader = csv.DictReader(self.input_file)
-        try:
-            return reader.fieldnames == ALL_FIELDS
-        except Exception:
-            return False
-
-    def fingerprint(self) -> Fingerprint | None:
-        reader = csv.DictReader(self.input_file)
+    def _fingerprint(self) -> Fingerprint | None:
+        reader = make_dict_reader(self.input_file)
         try:
             row = next(reader)
         except StopIteration:
@@ -88,48 +90,70 @@ class PlaidExtractor(ExtractorBase):
         else:
             date_value = raw_date_value
         return Fingerprint(
-            starting_date=parse_date(date_value),
+            starting_date=parse_ymd_date(date_value),
             first_row_hash=hash.hexdigest(),
         )
 
-    def __call__(self) -> typing.Generator[Transaction, None, None]:
+    def make_date_getter(
+        self, fieldnames: list[str]
+    ) -> typing.Callable[[list[str]], datetime.date | None]:
+        # the same as `_extract_values`, posted transactions are dated by the authorized date if there's one
+        pending_index = fieldnames.index("pending")
+        date_index = fieldnames.index("date")
+        authorized_date_index = fieldnames.index("authorized_date")
+
+        def get_date(values: list[str]) -> datetime.date | None:
+            value = values[date_index]
+            if values[pending_index].lower() != "true":
+                authorized_date = values[authorized_date_index]
+                if authorized_date.strip():
+                    value = authorized_date
+            if not value.strip():
+                return
+            return parse_ymd_date(value)
+
+        return get_date
+
+    def _extract_values(self) -> typing.Generator[dict[str, typing.Any], None, None]:
         filename = None
         if hasattr(self.input_file, "name"):
             filename = self.input_file.name
-        row_count_reader = csv.DictReader(self.input_file)
-        row_count = 0
-        for _ in row_count_reader:
-            row_count += 1
-        self.input_file.seek(os.SEEK_SET, 0)
-        reader = csv.DictReader(self.input_file)
-        for i, row in enumerate(reader):
-            pending = row.pop("pending").lower() == "true"
+        to_date = self._converter("date")
+        to_post_date = self._converter("post_date")
+        to_decimal = self._converter("amount")
+        to_timestamp = self._converter("timestamp")
+        fields = self.fields
+        extra_requested = self._is_requested("extra")
+        for lineno, reversed_lineno, row in self._iter_rows():
+            # the columns are popped for putting the rest into extra, no need to do that if extra is not requested
+            take = row.pop if extra_requested else row.get
+            pending = take("pending").lower() == "true"
             if pending:
-                date = parse_date(row.pop("date"))
+                date = to_date(take("date"))
                 post_date = None
             else:
-                raw_authorized_date = row.pop("authorized_date")
-                date_value = parse_date(row.pop("date"))
-                post_date = date_value
+                raw_authorized_date = take("authorized_date")
+                raw_date = take("date")
+                post_date = to_post_date(raw_date)
                 if not raw_authorized_date.strip():
                     # in some strange situation, authorized_date could be empty, such as sandbox mode plaid credit card,
                     # not sure if this could also happen in production. but regardless, if it's the case, let's just
                     # use the date value as date and post date in the same time
-                    date = date_value
+                    date = to_date(raw_date)
                 else:
-                    date = parse_date(raw_authorized_date)
+                    date = to_date(raw_authorized_date)
 
-            dt = row.pop("datetime")
+            dt = take("datetime")
             if not dt:
                 timestamp = None
             else:
-                timestamp = iso8601.parse_date(dt)
+                timestamp = to_timestamp(dt)
 
-            txn_id = row.pop("transaction_id")
+            txn_id = take("transaction_id")
             # For some banks, such as AMEX credit cards, when a pending transaction posted, the old one will
             # be deleted and a new one with the pending transaction id for the old one will be added.
             # To avoid txn id change after it gets posted, we should always use pending txn id first if available
-            pending_transaction_id = row.pop("pending_transaction_id")
+            pending_transaction_id = take("pending_transaction_id")
             if pending_transaction_id.strip():
                 txn_id = pending_transaction_id
             kwargs = dict(
@@ -138,23 +162,27 @@ class PlaidExtractor(ExtractorBase):
                 post_date=post_date,
                 status="pending" if pending else "posted",
                 pending=pending,
-                desc=row.pop("name"),
-                payee=row.pop("merchant_name"),
-                source_account=row.pop("account_id"),
-                amount=decimal.Decimal(row.pop("amount")),
-                type=row.pop("payment_channel"),
-                currency=row.pop("iso_currency_code"),
-                category=row.pop("personal_finance_category__primary"),
-                subcategory=row.pop("personal_finance_category__detailed"),
+                desc=take("name"),
+                payee=take("merchant_name"),
+                source_account=take("account_id"),
+                amount=to_decimal(take("amount")),
+                type=take("payment_channel"),
+                currency=take("iso_currency_code"),
+                category=take("personal_finance_category__primary"),
+                subcategory=take("personal_finance_category__detailed"),
                 timestamp=timestamp,
             )
-            if row:
+            if fields is not None:
+                kwargs = {
+                    name: value for name, value in kwargs.items() if name in fields
+                }
+            if extra_requested and row:
                 kwargs["extra"] = row
 
-            yield Transaction(
+            yield dict(
                 extractor=self.EXTRACTOR_NAME,
                 file=filename,
-                lineno=i + 1,
-                reversed_lineno=i - row_count,
+                lineno=lineno,
+                reversed_lineno=reversed_lineno,
                 **kwargs,
             )
@@ -1,17 +1,15 @@
-import csv
-import datetime
 import decimal
 import hashlib
 import typing
 
 from ..data_types import Fingerprint
-from ..data_types import Transaction
+from ..parsing import parse_ymd_date
 from .base import ExtractorBase
+from .base import FieldColumn
+from .base import is_seekable
+from .base import make_dict_reader
 
-
-def parse_date(date_str: str) -> datetime.date:
-    parts = date_str.split("-")
-    return datetime.date(int(parts[0]), int(parts[1]), int(parts[2]))
+parse_date = parse_ymd_date
 
 
 class WealthsimpleExtractor(ExtractorBase):
@@ -24,59 +22,44 @@ class WealthsimpleExtractor(ExtractorBase):
         "amount",
         "balance",
     ]
+    HEADER_FIELDS = tuple(ALL_FIELDS)
+    FIELD_COLUMNS = {
+        "date": FieldColumn("date", parse_ymd_date),
+        "desc": FieldColumn("description"),
+        "amount": FieldColumn("amount", decimal.Decimal),
+        "type": FieldColumn("transaction"),
+    }
+    EXTRA_CONVERTERS = {"balance": decimal.Decimal}
 
-    def detect(self) -> bool:
-        reader = csv.DictReader(self.input_file)
-        try:
-            return reader.fieldnames == self.ALL_FIELDS
-        except Exception:
-            return False
-
-    def fingerprint(self) -> Fingerprint | None:
+    def _fingerprint(self) -> Fingerprint | None:
         self.input_file.seek(0)
-        reader = csv.DictReader(self.input_file)
+        reader = make_dict_reader(self.input_file)
         try:
             row = next(reader)
         except StopIteration:
             return None
-        
+
         hash = hashlib.sha256()
         for field in reader.fieldnames:
             hash.update(row[field].encode("utf8"))
-        
+
         return Fingerprint(
-            starting_date=parse_date(row["date"]),
+            starting_date=parse_ymd_date(row["date"]),
             first_row_hash=hash.hexdigest(),
         )
 
-    def __call__(self) -> typing.Generator[Transaction, None, None]:
-        self.input_file.seek(0)
-        reader = csv.DictReader(self.input_file)
-        rows = list(reader)
-        row_count = len(rows)
-        
-        filename = getattr(self.input_file, "name", None)
-        
-        for i, row in enumerate(rows):
-            date_str = row["date"]
-            date = parse_date(date_str)
-            transaction_type = row["transaction"]
-            amount = decimal.Decimal(row["amount"])
-            
-            kwargs = dict(
-                date=date,
-                desc=row["description"],
-                amount=amount,
-                type=transaction_type,
-                extra={
-                    "balance": decimal.Decimal(row["balance"])
-                }
-            )
-            
-            yield Transaction(
+    def _extract_values(self) -> typing.Generator[dict[str, typing.Any], None, None]:
+        filename = None
+        if hasattr(self.input_file, "name"):
+            filename = self.input_file.name
+        if is_seekable(self.input_file):
+            # the file is read from the beginning every time, such as after the fingerprint
+            self.input_file.seek(0)
+        for lineno, reversed_lineno, kwargs in self._iter_kwargs():
+            yield dict(
                 extractor=self.EXTRACTOR_NAME,
                 file=filename,
-                lineno=i + 1,
-                reversed_lineno=i - row_count,
-                **kwargs
+                lineno=lineno,
+                reversed_lineno=reversed_lineno,
+                **kwargs,
             )
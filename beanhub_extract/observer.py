@@ -0,0 +1,114 @@
+import collections
+import dataclasses
+import threading
+import typing
+
+if typing.TYPE_CHECKING:
+    from .extractors.base import ExtractorBase
+
+# time spent on detecting the format of a file
+PHASE_DETECT = "detect"
+# time spent on computing the fingerprint of a file
+PHASE_FINGERPRINT = "fingerprint"
+# time spent on reading and tokenizing CSV records, including the row counting pass
+PHASE_TOKENIZE = "tokenize"
+# time spent on converting tokenized rows into transactions
+PHASE_CONVERT = "convert"
+# total time spent on extracting transactions, excluding the time the consumer took
+PHASE_EXTRACT = "extract"
+
+
+class ExtractorObserver:
+    """Base class of extractor observers. Subclass it and override the hooks you are interested in, then pass it to
+    the extractor. Extractors without an observer don't measure anything, so there's no overhead
+
+    """
+
+    def on_phase(self, extractor: "ExtractorBase | None", phase: str, seconds: float):
+        """Called when a phase is done with the time spent on it. The extractor is None for `detect_extractor`"""
+
+    def on_rows(self, extractor: "ExtractorBase", parsed: int, emitted: int):
+        """Called when an extraction is done with the number of rows parsed and transactions emitted"""
+
+    def on_bytes_read(self, extractor: "ExtractorBase", size: int):
+        """Called when an extraction is done with the number of bytes read, only for files with a binary buffer.
+        It includes the bytes read by the row counting pass before the extraction in the two-pass mode
+
+        """
+
+    def on_conversion_error(
+        self,
+        extractor: "ExtractorBase",
+        field: str,
+        value: str | None,
+        lineno: int,
+        error: Exception,
+    ):
+        """Called for each field failed to convert in the row which stopped the extraction"""
+
+
+@dataclasses.dataclass
+class ExtractionStats:
+    # number of extractions done
+    extractions: int = 0
+    # phase name to the total seconds spent on it
+    phase_seconds: collections.Counter[str] = dataclasses.field(
+        default_factory=collections.Counter
+    )
+    rows_parsed: int = 0
+    rows_emitted: int = 0
+    bytes_read: int = 0
+    # field name to the number of conversion errors
+    conversion_errors: collections.Counter[str] = dataclasses.field(
+        default_factory=collections.Counter
+    )
+
+
+class StatsCollector(ExtractorObserver):
+    """Observer aggregating the numbers across files, in total and for each extractor. It's thread-safe, so that the
+    same collector can be shared by extractors running in multiple threads
+
+    """
+
+    def __init__(self):
+        self.total = ExtractionStats()
+        self.by_extractor: dict[str, ExtractionStats] = collections.defaultdict(
+            ExtractionStats
+        )
+        self._lock = threading.Lock()
+
+    def _get_stats(
+        self, extractor: "ExtractorBase | None"
+    ) -> tuple[ExtractionStats, ...]:
+        if extractor is None:
+            return (self.total,)
+        return self.total, self.by_extractor[extractor.EXTRACTOR_NAME]
+
+    def on_phase(self, extractor: "ExtractorBase | None", phase: str, seconds: float):
+        with self._lock:
+            for stats in self._get_stats(extractor):
+                stats.phase_seconds[phase] += seconds
+
+    def on_rows(self, extractor: "ExtractorBase", parsed: int, emitted: int):
+        with self._lock:
+            for stats in self._get_stats(extractor):
+                stats.extractions += 1
+                stats.rows_parsed += parsed
+                stats.rows_emitted += emitted
+
+    def on_bytes_read(self, extractor: "ExtractorBase", size: int):
+        with self._lock:
+            for stats in self._get_stats(extractor):
+                stats.bytes_read += size
+
+    def on_conversion_error(
+        self,
+        extractor: "ExtractorBase",
+        field: str,
+        value: str | None,
+        lineno: int,
+        error: Exception,
+    ):
+        with self._lock:
+            for stats in self._get_stats(extractor):
+                stats.conversion_errors[field] += 1
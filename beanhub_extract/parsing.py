@@ -0,0 +1,55 @@
+import datetime
+import functools
+
+# Dates in exports repeat a lot (many rows per day), so we memoize the parsed values. The cache size is bounded to
+# keep the memory usage flat for files spanning many years
+CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def parse_ymd_date(date_str: str, separator: str = "-") -> datetime.date:
+    """Parse date in YYYY-MM-DD format, or with other separator"""
+    year, month, day = date_str.split(separator)
+    return datetime.date(int(year), int(month), int(day))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def parse_mdy_date(date_str: str, separator: str = "/") -> datetime.date:
+    """Parse date in MM/DD/YYYY format, or with other separator"""
+    month, day, year = date_str.split(separator)
+    return datetime.date(int(year), int(month), int(day))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def parse_time(time_str: str) -> datetime.time:
+    """Parse time in HH:MM:SS format"""
+    parts = time_str.split(":")
+    return datetime.time(*(map(int, parts)))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def parse_mdy_datetime(timestamp_str: str, separator: str = "/") -> datetime.datetime:
+    """Parse datetime in MM/DD/YYYY HH:MM:SS format, or with other date separator"""
+    date_str, time_str = timestamp_str.split(" ")
+    return datetime.datetime.combine(
+        parse_mdy_date(date_str, separator), parse_time(time_str)
+    )
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def parse_localized_mdy_datetime(
+    timestamp_str: str, timezone: datetime.tzinfo, separator: str = "/"
+) -> datetime.datetime:
+    """Parse datetime in MM/DD/YYYY HH:MM:SS format and localize it with the given pytz timezone"""
+    return timezone.localize(parse_mdy_datetime(timestamp_str, separator))
+
+
+def clear_caches():
+    for func in (
+        parse_ymd_date,
+        parse_mdy_date,
+        parse_time,
+        parse_mdy_datetime,
+        parse_localized_mdy_datetime,
+    ):
+        func.cache_clear()
@@ -0,0 +1,55 @@
+import csv
+import typing
+
+
+class OffsetRecordReader:
+    """Read CSV records from a binary file while keeping track of the byte offsets of each record.
+
+    The csv reader pulls lines from the source iterator only as many as it needs for the next record, so counting
+    the bytes of the lines pulled tells us exactly where a record starts and ends. Lines are decoded one by one, and
+    the trailing CRLF is translated into LF, the same as a text file opened with universal newlines mode.
+
+    """
+
+    def __init__(
+        self,
+        input_file: typing.BinaryIO,
+        encoding: str = "utf-8",
+        start: int = 0,
+        strict: bool = False,
+    ):
+        self.input_file = input_file
+        self.encoding = encoding
+        # the byte offset of the next line to read
+        self.position = start
+        input_file.seek(start)
+        # with strict, csv.Error is raised for bad records such as the ones ending inside a quoted field
+        self._reader = csv.reader(self._iter_lines(), strict=strict)
+
+    def _iter_lines(self) -> typing.Generator[str, None, None]:
+        for line in self.input_file:
+            self.position += len(line)
+            text = line.decode(self.encoding)
+            if text.endswith("\r\n"):
+                text = text[:-2] + "\n"
+            yield text
+
+    def read_record(self) -> tuple[int, int, list[str]] | None:
+        """Read the next record including a blank one, returns (start offset, end offset, values) or None at the
+        end of file
+
+        """
+        start = self.position
+        values = next(self._reader, None)
+        if values is None:
+            return
+        return start, self.position, values
+
+    def __iter__(self) -> typing.Generator[tuple[int, int, list[str]], None, None]:
+        """Yield (start offset, end offset, values) for each non-blank record"""
+        while True:
+            record = self.read_record()
+            if record is None:
+                return
+            if record[2]:
+                yield record
@@ -0,0 +1,421 @@
+import csv
+import dataclasses
+import datetime
+import os
+import pathlib
+import sqlite3
+import typing
+
+from .data_types import DateRange
+from .data_types import Fingerprint
+from .extractors import detect_extractor
+from .extractors.base import ExtractorBase
+from .extractors.base import hash_values
+from .extractors.base import make_row
+from .extractors.base import open_input
+from .extractors.base import skip_bom
+
+FILE_COLUMNS = (
+    "files.id",
+    "files.path",
+    "files.extractor",
+    "files.size",
+    "files.mtime_ns",
+    "files.starting_date",
+    "files.first_row_hash",
+    "files.ending_date",
+    "files.last_row_hash",
+    "files.rows_indexed",
+    "file_ranges.starting_date",
+    "file_ranges.ending_date",
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class FileRecord:
+    # the path of the file
+    path: str
+    # name of the extractor of the file
+    extractor: str
+    # size and mtime of the file in nanoseconds when it was registered, for telling if it changed since then
+    size: int
+    mtime_ns: int
+    # the fingerprint of the file, with the date and hash of the row at one end of the file
+    fingerprint: Fingerprint
+    # the date and hash of the row at the other end of the file
+    ending_date: datetime.date
+    last_row_hash: str
+    # the range of the transaction dates in the file
+    date_range: DateRange
+    # whether the hashes of all the rows are indexed, for telling exactly if the file contains a row
+    rows_indexed: bool = False
+
+
+def get_row_values(fieldnames: list[str], row: dict[str, str | None]) -> list[str]:
+    return [row[field] or "" for field in fieldnames]
+
+
+def iter_row_hashes(input_file: typing.TextIO) -> typing.Generator[str, None, None]:
+    """Yield the hash of each row of the given CSV file, the same as the one in its fingerprint"""
+    reader = csv.reader(skip_bom(input_file))
+    fieldnames = next(reader, None)
+    if fieldnames is None:
+        return
+    field_count = len(fieldnames)
+    for values in reader:
+        if not values:
+            continue
+        # pad the short rows and drop the extra values, as the row dicts used for the fingerprints
+        values = (values + [""] * field_count)[:field_count]
+        yield hash_values(values)
+
+
+class FingerprintRegistry:
+    """Persistent index of the fingerprints of files, for finding the files seen before, the files overlapping a date
+    range, and the files containing another one without comparing them one pair at a time. It's a SQLite database,
+    with the files indexed by the hashes of their oldest rows, and by their date ranges in an R*Tree if SQLite comes
+    with it, otherwise in a B-tree index of the dates.
+
+    Files are registered one by one with their fingerprint, the date and hash of the row at the other end and their
+    date ranges. The date ranges are read from the two ends of the files sorted by date, otherwise all the rows are
+    scanned. A file is read again only if its size or mtime changed. Optionally, the hashes of all the rows are
+    indexed too, so that telling if a file contains the rows of another one doesn't read the file again
+
+    """
+
+    def __init__(self, path: str | pathlib.Path):
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "id INTEGER PRIMARY KEY, "
+                "path TEXT NOT NULL UNIQUE, "
+                "extractor TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "mtime_ns INTEGER NOT NULL, "
+                # dates are stored as their ordinals
+                "starting_date INTEGER NOT NULL, "
+                "first_row_hash TEXT NOT NULL, "
+                "ending_date INTEGER NOT NULL, "
+                "last_row_hash TEXT NOT NULL, "
+                "rows_indexed INTEGER NOT NULL"
+                ")"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS files_first_row_hash ON files (first_row_hash)"
+            )
+            try:
+                self.connection.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS file_ranges "
+                    "USING rtree_i32(id, starting_date, ending_date)"
+                )
+            except sqlite3.OperationalError:
+                # SQLite is built without the R*Tree module
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS file_ranges ("
+                    "id INTEGER PRIMARY KEY, "
+                    "starting_date INTEGER NOT NULL, "
+                    "ending_date INTEGER NOT NULL"
+                    ")"
+                )
+                self.connection.execute(
+                    "CREATE INDEX IF NOT EXISTS file_ranges_dates "
+                    "ON file_ranges (starting_date, ending_date)"
+                )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS row_hashes ("
+                "row_hash TEXT NOT NULL, "
+                "file_id INTEGER NOT NULL, "
+                "PRIMARY KEY (row_hash, file_id)"
+                ") WITHOUT ROWID"
+            )
+
+    def __enter__(self) -> "FingerprintRegistry":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def _query_files(self, where: str, params: typing.Sequence) -> list[FileRecord]:
+        columns = ", ".join(FILE_COLUMNS)
+        rows = self.connection.execute(
+            f"SELECT {columns} FROM files JOIN file_ranges ON file_ranges.id = files.id {where} "
+            "ORDER BY files.path",
+            params,
+        )
+        return [self._make_record(row) for row in rows]
+
+    @staticmethod
+    def _make_record(row: tuple) -> FileRecord:
+        (
+            _,
+            path,
+            extractor,
+            size,
+            mtime_ns,
+            starting_date,
+            first_row_hash,
+            ending_date,
+            last_row_hash,
+            rows_indexed,
+            range_start,
+            range_end,
+        ) = row
+        return FileRecord(
+            path=path,
+            extractor=extractor,
+            size=size,
+            mtime_ns=mtime_ns,
+            fingerprint=Fingerprint(
+                starting_date=datetime.date.fromordinal(starting_date),
+                first_row_hash=first_row_hash,
+            ),
+            ending_date=datetime.date.fromordinal(ending_date),
+            last_row_hash=last_row_hash,
+            date_range=DateRange(
+                start=datetime.date.fromordinal(range_start),
+                end=datetime.date.fromordinal(range_end),
+            ),
+            rows_indexed=bool(rows_indexed),
+        )
+
+    def _get_file_id(self, path: str | pathlib.Path) -> int | None:
+        row = self.connection.execute(
+            "SELECT id FROM files WHERE path = ?", (os.fspath(path),)
+        ).fetchone()
+        if row is None:
+            return
+        return row[0]
+
+    def get(self, path: str | pathlib.Path) -> FileRecord | None:
+        """Get the record of the given file, or None if it's not registered"""
+        records = self._query_files("WHERE files.path = ?", (os.fspath(path),))
+        if not records:
+            return
+        return records[0]
+
+    def register(
+        self,
+        path: str | pathlib.Path,
+        extractor_cls: typing.Type[ExtractorBase] | None = None,
+        index_rows: bool = False,
+    ) -> FileRecord | None:
+        """Register the given file, or update its record if it changed since the last time. Returns None if the
+        extractor cannot be detected or the file has no rows, and the old record of it is removed if there's one.
+        With `index_rows`, the hashes of all the rows are indexed too, which reads the whole file
+
+        """
+        path = os.fspath(path)
+        stat = os.stat(path)
+        record = self.get(path)
+        if (
+            record is not None
+            and record.size == stat.st_size
+            and record.mtime_ns == stat.st_mtime_ns
+            and (record.rows_indexed or not index_rows)
+        ):
+            return record
+        with open(path, "rb") as binary_fo:
+            input_file = open_input(binary_fo)
+            if extractor_cls is None:
+                extractor_cls = detect_extractor(input_file)
+            record = None
+            row_hashes = None
+            if extractor_cls is not None:
+                input_file.seek(0)
+                extractor = extractor_cls(input_file)
+                record = self._read_record(path, stat, extractor)
+                if record is not None and index_rows:
+                    input_file.seek(0)
+                    row_hashes = iter_row_hashes(input_file)
+                    record = dataclasses.replace(record, rows_indexed=True)
+            with self.connection:
+                self._remove(path)
+                if record is not None:
+                    self._insert(record, row_hashes)
+        return record
+
+    def _read_record(
+        self, path: str, stat: os.stat_result, extractor: ExtractorBase
+    ) -> FileRecord | None:
+        input_file = extractor.input_file
+        fingerprint = extractor.fingerprint()
+        if fingerprint is None:
+            return
+        input_file.seek(0)
+        date_range = extractor.get_date_range()
+        # the fingerprint is made of either the first or the last row, depending on the order of the file, the other
+        # one is kept for comparing the files sharing the date of it
+        input_file.seek(0)
+        reader = csv.reader(skip_bom(input_file))
+        fieldnames = next(reader)
+        first_values = next(values for values in reader if values)
+        input_file.seek(0)
+        _, last_row = extractor.read_last_row()
+        last_values = get_row_values(fieldnames, last_row)
+        first_values = get_row_values(fieldnames, make_row(fieldnames, first_values))
+        ending_values = last_values
+        if hash_values(first_values) != fingerprint.first_row_hash:
+            ending_values = first_values
+        ending_date = extractor.make_date_getter(fieldnames)(ending_values)
+        if ending_date is None:
+            ending_date = fingerprint.starting_date
+        if date_range is None:
+            # no row has a date, the fingerprint comes with a default one
+            date_range = DateRange(
+                start=fingerprint.starting_date, end=fingerprint.starting_date
+            )
+        return FileRecord(
+            path=path,
+            extractor=extractor.EXTRACTOR_NAME,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            fingerprint=fingerprint,
+            ending_date=ending_date,
+            last_row_hash=hash_values(ending_values),
+            date_range=date_range,
+        )
+
+    def _insert(self, record: FileRecord, row_hashes: typing.Iterable[str] | None):
+        cursor = self.connection.execute(
+            "INSERT INTO files (path, extractor, size, mtime_ns, starting_date, first_row_hash, ending_date, "
+            "last_row_hash, rows_indexed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                record.path,
+                record.extractor,
+                record.size,
+                record.mtime_ns,
+                record.fingerprint.starting_date.toordinal(),
+                record.fingerprint.first_row_hash,
+                record.ending_date.toordinal(),
+                record.last_row_hash,
+                record.rows_indexed,
+            ),
+        )
+        file_id = cursor.lastrowid
+        self.connection.execute(
+            "INSERT INTO file_ranges (id, starting_date, ending_date) VALUES (?, ?, ?)",
+            (
+                file_id,
+                record.date_range.start.toordinal(),
+                record.date_range.end.toordinal(),
+            ),
+        )
+        if row_hashes is not None:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO row_hashes (row_hash, file_id) VALUES (?, ?)",
+                ((row_hash, file_id) for row_hash in row_hashes),
+            )
+
+    def _remove(self, path: str):
+        file_id = self._get_file_id(path)
+        if file_id is None:
+            return
+        self.connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        self.connection.execute("DELETE FROM file_ranges WHERE id = ?", (file_id,))
+        self.connection.execute("DELETE FROM row_hashes WHERE file_id = ?", (file_id,))
+
+    def unregister(self, path: str | pathlib.Path):
+        """Remove the record of the given file if there's one"""
+        with self.connection:
+            self._remove(os.fspath(path))
+
+    def find(self, fingerprint: Fingerprint) -> list[FileRecord]:
+        """Find the files with the given fingerprint, i.e. the files seen before with the same oldest row"""
+        return self._query_files(
+            "WHERE files.first_row_hash = ? AND files.starting_date = ?",
+            (fingerprint.first_row_hash, fingerprint.starting_date.toordinal()),
+        )
+
+    def find_overlapping(self, date_range: DateRange) -> list[FileRecord]:
+        """Find the files with rows possibly in the given date range, i.e. their date ranges overlap with it"""
+        conditions = []
+        params = []
+        if date_range.end is not None:
+            conditions.append("file_ranges.starting_date <= ?")
+            params.append(date_range.end.toordinal())
+        if date_range.start is not None:
+            conditions.append("file_ranges.ending_date >= ?")
+            params.append(date_range.start.toordinal())
+        where = ""
+        if conditions:
+            where = "WHERE " + " AND ".join(conditions)
+        return self._query_files(where, params)
+
+    def find_supersets(self, path: str | pathlib.Path) -> list[FileRecord]:
+        """Find the other files containing all the rows of the given registered file. See `is_superset` for how
+        it's determined
+
+        """
+        record = self.get(path)
+        if record is None:
+            raise ValueError(f"File {path} is not registered")
+        candidates = self._query_files(
+            "WHERE file_ranges.starting_date <= ? AND file_ranges.ending_date >= ? "
+            "AND files.extractor = ? AND files.path != ?",
+            (
+                record.date_range.start.toordinal(),
+                record.date_range.end.toordinal(),
+                record.extractor,
+                record.path,
+            ),
+        )
+        return [
+            candidate
+            for candidate in candidates
+            if self._contains_boundaries(candidate, record)
+        ]
+
+    def is_superset(
+        self, path: str | pathlib.Path, other_path: str | pathlib.Path
+    ) -> bool:
+        """Check if the given registered file contains all the rows of the other one. Files of the same extractor
+        with a date range covering the other one's are supersets, if the rows at the two ends of the other file are
+        in the file. That's checked with the row hashes if the file has them indexed, otherwise the file is read to
+        find them, and it's not a superset if the file changed since it was registered. Rows in the middle are not
+        compared, as the exports are expected to have all the transactions in their date ranges
+
+        """
+        record = self.get(path)
+        other = self.get(other_path)
+        if record is None or other is None:
+            raise ValueError("Both files need to be registered")
+        if (
+            record.extractor != other.extractor
+            or other.date_range.start < record.date_range.start
+            or other.date_range.end > record.date_range.end
+        ):
+            return False
+        return self._contains_boundaries(record, other)
+
+    def _contains_boundaries(self, record: FileRecord, other: FileRecord) -> bool:
+        row_hashes = {other.fingerprint.first_row_hash, other.last_row_hash}
+        if record.rows_indexed:
+            file_id = self._get_file_id(record.path)
+            for row_hash in row_hashes:
+                row = self.connection.execute(
+                    "SELECT 1 FROM row_hashes WHERE row_hash = ? AND file_id = ?",
+                    (row_hash, file_id),
+                ).fetchone()
+                if row is None:
+                    return False
+            return True
+        try:
+            stat = os.stat(record.path)
+        except OSError:
+            return False
+        if stat.st_size != record.size or stat.st_mtime_ns != record.mtime_ns:
+            # the file changed since it was registered, the record doesn't tell what's in it anymore
+            return False
+        with open(record.path, "rb") as binary_fo:
+            for row_hash in iter_row_hashes(open_input(binary_fo)):
+                row_hashes.discard(row_hash)
+                if not row_hashes:
+                    return True
+        return False
@@ -0,0 +1,98 @@
+import codecs
+import csv
+import io
+import os
+import typing
+
+DEFAULT_BLOCK_SIZE = 8192
+# encodings that never use the bytes of quote or newline characters as part of other characters, so that we can
+# look for record boundaries in raw bytes
+ASCII_COMPATIBLE_ENCODINGS = frozenset(
+    ["utf-8", "utf-8-sig", "ascii", "iso8859-1", "cp1252"]
+)
+NEWLINE_BYTES = frozenset(b"\r\n")
+QUOTE_BYTE = ord('"')
+
+
+def is_ascii_compatible(encoding: str) -> bool:
+    try:
+        return codecs.lookup(encoding).name in ASCII_COMPATIBLE_ENCODINGS
+    except LookupError:
+        return False
+
+
+def has_stray_quote(text: str) -> bool:
+    """Check if there's a quote character in an unquoted field of the given CSV text starting at a record boundary.
+    A quote is part of the quoting only at the beginning of a field, or right after the closing quote of the field
+    as an escaped quote
+
+    """
+    in_quotes = False
+    field_start = True
+    previous = None
+    for char in text:
+        if in_quotes:
+            if char == '"':
+                in_quotes = False
+        elif char == '"':
+            if not field_start and previous != '"':
+                return True
+            in_quotes = True
+        field_start = not in_quotes and char in ",\r\n"
+        previous = char
+    return False
+
+
+def read_last_record(
+    input_file: typing.BinaryIO,
+    encoding: str = "utf-8",
+    start: int = 0,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> tuple[int, list[str]] | None:
+    """Read the last CSV record of given seekable binary file by seeking from the end of it, returns the
+    byte offset of the record and its values, or None if there's no record after `start`.
+
+    For a well-formed CSV file, the end of file is always outside quotes, so a newline is a real record boundary
+    only when the number of quote characters after it is even. With that, we only need to read back the bytes of
+    the last record instead of the whole file. The csv module also accepts quote characters in unquoted fields,
+    such as `12" PIZZA`, which break the counting. Raises ValueError if the record found has one of them, or it
+    doesn't end at the end of file, then the file needs to be read forward instead.
+
+    """
+    end = input_file.seek(0, os.SEEK_END)
+    tail = b""
+    pos = end
+    while True:
+        read_size = min(block_size, pos - start)
+        if read_size > 0:
+            pos -= read_size
+            input_file.seek(pos)
+            tail = input_file.read(read_size) + tail
+            # read more each time, so that the total cost stays linear in the size of the last record
+            block_size *= 2
+        record_end = len(tail.rstrip(b"\r\n"))
+        if record_end == 0:
+            if pos <= start:
+                return
+            continue
+        quote_count = 0
+        record_start = None
+        for index in range(record_end - 1, -1, -1):
+            char = tail[index]
+            if char == QUOTE_BYTE:
+                quote_count += 1
+            elif char in NEWLINE_BYTES and quote_count % 2 == 0:
+                record_start = index + 1
+                break
+        if record_start is None:
+            if pos > start:
+                continue
+            record_start = 0
+        text = tail[record_start:record_end].decode(encoding)
+        if '"' in text and has_stray_quote(text):
+            raise ValueError("Quote character in an unquoted field of the last record")
+        reader = csv.reader(io.StringIO(text, newline=""))
+        values = next(reader)
+        if next(reader, None) is not None:
+            raise ValueError("The last record doesn't end at the end of file")
+        return pos + record_start, values
@@ -0,0 +1,137 @@
+import array
+import dataclasses
+import os
+import pathlib
+import struct
+import sys
+import tempfile
+import typing
+
+from .record_reader import OffsetRecordReader
+
+SIDECAR_SUFFIX = ".rowindex"
+MAGIC = b"BHRI"
+# the offsets of version 1 were found with quote parity, which is wrong with quotes in unquoted fields
+VERSION = 2
+# offsets are stored in little-endian byte order
+BYTE_ORDER = "little"
+# magic, version, typecode of offsets, file size, file mtime in ns (-1 for unknown) and number of offsets
+HEADER_FORMAT = struct.Struct("<4sBcQqQ")
+
+
+def get_file_stat(input_file: typing.BinaryIO) -> tuple[int, int | None]:
+    """Get the size and mtime in nanoseconds of the given binary file. The mtime is None if it's not a real file"""
+    try:
+        stat = os.fstat(input_file.fileno())
+    except (AttributeError, OSError, ValueError):
+        position = input_file.tell()
+        size = input_file.seek(0, os.SEEK_END)
+        input_file.seek(position)
+        return size, None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def make_sidecar_path(path: str | pathlib.Path) -> pathlib.Path:
+    """Get the path of the sidecar row index file next to the given file"""
+    path = pathlib.Path(path)
+    return path.with_name(path.name + SIDECAR_SUFFIX)
+
+
+@dataclasses.dataclass
+class RowIndex:
+    """Byte offsets of the rows of a CSV file, for reading a row by its line number with a single seek. The size
+    and mtime of the file are kept for telling if the file changed since the index was built
+
+    """
+
+    # size of the file in bytes
+    size: int
+    # mtime of the file in nanoseconds, None for in-memory files
+    mtime_ns: int | None
+    # the byte offsets of the rows, the one of lineno N is at N - 1
+    offsets: array.array
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @classmethod
+    def build(
+        cls, input_file: typing.BinaryIO, start: int, encoding: str = "utf-8"
+    ) -> "RowIndex":
+        """Build the row index of the given binary CSV file with the first row starting at `start`. The rows are
+        read with the csv tokenizer, so that the offsets are the same as the ones of the rows extracted
+
+        """
+        size, mtime_ns = get_file_stat(input_file)
+        offsets = array.array(
+            "Q",
+            (
+                offset
+                for offset, _, _ in OffsetRecordReader(input_file, encoding, start)
+            ),
+        )
+        # 4 bytes for each offset are enough for most of the files
+        if size < 2**32:
+            offsets = array.array("I", offsets)
+        return cls(size=size, mtime_ns=mtime_ns, offsets=offsets)
+
+    def is_valid(self, input_file: typing.BinaryIO) -> bool:
+        """Check if the index still matches the given file, i.e. the file hasn't changed since it was built"""
+        return get_file_stat(input_file) == (self.size, self.mtime_ns)
+
+    def save(self, path: str | pathlib.Path):
+        """Save the index to the given path. It's written into a temporary file and renamed into place atomically,
+        so that readers never see a partial index
+
+        """
+        path = pathlib.Path(path)
+        fd, temp_path = tempfile.mkstemp(
+            dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as fo:
+                fo.write(
+                    HEADER_FORMAT.pack(
+                        MAGIC,
+                        VERSION,
+                        self.offsets.typecode.encode("ascii"),
+                        self.size,
+                        -1 if self.mtime_ns is None else self.mtime_ns,
+                        len(self.offsets),
+                    )
+                )
+                offsets = self.offsets
+                if sys.byteorder != BYTE_ORDER:
+                    offsets = array.array(offsets.typecode, offsets)
+                    offsets.byteswap()
+                offsets.tofile(fo)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path) -> typing.Optional["RowIndex"]:
+        """Load the index from the given path, returns None if it doesn't exist or it's not a valid index file"""
+        try:
+            with open(path, "rb") as fo:
+                header = fo.read(HEADER_FORMAT.size)
+                if len(header) != HEADER_FORMAT.size:
+                    return
+                magic, version, typecode, size, mtime_ns, count = HEADER_FORMAT.unpack(
+                    header
+                )
+                if magic != MAGIC or version != VERSION or typecode not in (b"I", b"Q"):
+                    return
+                offsets = array.array(typecode.decode("ascii"))
+                offsets.fromfile(fo, count)
+                if fo.read(1):
+                    # trailing garbage, it's not written by us
+                    return
+                if sys.byteorder != BYTE_ORDER:
+                    offsets.byteswap()
+        except (FileNotFoundError, EOFError):
+            return
+        return cls(
+            size=size, mtime_ns=None if mtime_ns == -1 else mtime_ns, offsets=offsets
+        )
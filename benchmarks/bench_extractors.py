@@ -0,0 +1,339 @@
+"""Benchmark detect_extractor, fingerprint and extraction of every extractor with synthetic large exports
+
+Run it with `python -m benchmarks.bench_extractors --output results.json`, and check for regressions against a
+previous result with `python -m benchmarks.bench_extractors --compare results.json`. The compare mode exits with
+status 1 if any metric regressed more than the threshold.
+"""
+import argparse
+import concurrent.futures
+import csv
+import dataclasses
+import datetime
+import json
+import multiprocessing
+import pathlib
+import platform
+import resource
+import sys
+import tempfile
+import time
+import typing
+
+from beanhub_extract.extractors import ALL_EXTRACTORS
+from beanhub_extract.extractors import detect_extractor
+
+DEFAULT_ROW_COUNTS = [10_000, 100_000, 1_000_000]
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_REPEAT = 3
+# regressions of time and memory below these are ignored, they are mostly noise
+MIN_SECONDS = 0.001
+MIN_MEMORY = 1024 * 1024
+FIXTURE_FOLDER = (
+    pathlib.Path(__file__).parent.parent / "tests" / "extractors" / "fixtures"
+)
+START_DATE = datetime.datetime(2000, 1, 1)
+ROWS_PER_DAY = 50
+
+
+@dataclasses.dataclass(frozen=True)
+class ExportFormat:
+    # the fixture file with the header and template rows
+    fixture: str
+    # column name to strftime format of the date and timestamp columns
+    date_columns: dict[str, str]
+    # whether the rows are sorted from the newest to the oldest like the real exports
+    descending: bool = False
+    # whether all the values are quoted
+    quote_all: bool = False
+
+
+EXPORT_FORMATS: dict[str, ExportFormat] = {
+    "mercury": ExportFormat(
+        fixture="mercury.csv",
+        date_columns={"Date (UTC)": "%m-%d-%Y", "Timestamp": "%m-%d-%Y %H:%M:%S"},
+        descending=True,
+    ),
+    "chase_credit_card": ExportFormat(
+        fixture="chase_credit_card.csv",
+        date_columns={"Transaction Date": "%m/%d/%Y", "Post Date": "%m/%d/%Y"},
+        descending=True,
+    ),
+    "plaid": ExportFormat(
+        fixture="plaid.csv",
+        date_columns={"date": "%Y-%m-%d", "authorized_date": "%Y-%m-%d"},
+    ),
+    "wealthsimple": ExportFormat(
+        fixture="wealthsimple.csv",
+        date_columns={"date": "%Y-%m-%d"},
+        quote_all=True,
+    ),
+    "csv": ExportFormat(
+        fixture="csv.csv",
+        date_columns={
+            "date": "%Y-%m-%d",
+            "post_date": "%Y-%m-%d",
+            "timestamp": "%Y-%m-%dT%H:%M:%S+00:00",
+        },
+    ),
+}
+
+
+def generate_export(
+    export_format: ExportFormat, row_count: int, output_file: typing.TextIO
+):
+    """Generate a synthetic export by cycling through the template rows of the fixture with a date for every
+    `ROWS_PER_DAY` rows
+
+    """
+    with open(FIXTURE_FOLDER / export_format.fixture, "rt") as fo:
+        reader = csv.reader(fo)
+        fieldnames = next(reader)
+        templates = [values for values in reader if values]
+    date_columns = [
+        (fieldnames.index(name), date_format)
+        for name, date_format in export_format.date_columns.items()
+    ]
+    writer = csv.writer(
+        output_file,
+        lineterminator="\n",
+        quoting=csv.QUOTE_ALL if export_format.quote_all else csv.QUOTE_MINIMAL,
+    )
+    writer.writerow(fieldnames)
+    for i in range(row_count):
+        index = row_count - i - 1 if export_format.descending else i
+        timestamp = START_DATE + datetime.timedelta(
+            days=index // ROWS_PER_DAY, seconds=index % ROWS_PER_DAY * 60
+        )
+        values = list(templates[i % len(templates)])
+        for column, date_format in date_columns:
+            if values[column]:
+                values[column] = timestamp.strftime(date_format)
+        writer.writerow(values)
+
+
+def get_export(data_folder: pathlib.Path, extractor_name: str, row_count: int):
+    path = data_folder / f"{extractor_name}-{row_count}.csv"
+    if not path.exists():
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "wt") as fo:
+            generate_export(EXPORT_FORMATS[extractor_name], row_count, fo)
+        temp_path.rename(path)
+    return path
+
+
+def get_max_rss() -> int:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # it's in bytes on macOS but in kilobytes on Linux
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def measure(func: typing.Callable[[], typing.Any]) -> dict[str, float]:
+    max_rss = get_max_rss()
+    start = time.perf_counter()
+    func()
+    return dict(
+        seconds=time.perf_counter() - start,
+        peak_memory=get_max_rss() - max_rss,
+    )
+
+
+def run_case(path: pathlib.Path, extractor_name: str, row_count: int) -> list[dict]:
+    """Run the benchmarks of an extractor with a file, it's supposed to be run in a fresh process, so that the peak
+    memory is not affected by the other cases
+
+    """
+    extractor_cls = ALL_EXTRACTORS[extractor_name]
+    results = []
+
+    def add_result(operation: str, metrics: dict[str, float]):
+        results.append(
+            dict(
+                extractor=extractor_name,
+                rows=row_count,
+                operation=operation,
+                **metrics,
+            )
+        )
+
+    with open(path, "rt") as fo:
+
+        def detect():
+            assert detect_extractor(fo) is extractor_cls
+
+        add_result("detect_extractor", measure(detect))
+
+        def fingerprint():
+            fo.seek(0)
+            assert extractor_cls(fo).fingerprint() is not None
+
+        add_result("fingerprint", measure(fingerprint))
+
+        first_seconds = None
+        count = 0
+
+        def extract():
+            nonlocal first_seconds, count
+            fo.seek(0)
+            start = time.perf_counter()
+            for _ in extractor_cls(fo)():
+                if first_seconds is None:
+                    first_seconds = time.perf_counter() - start
+                count += 1
+            assert count == row_count
+
+        metrics = measure(extract)
+        add_result(
+            "__call__",
+            dict(
+                **metrics,
+                rows_per_second=row_count / metrics["seconds"],
+                time_to_first=first_seconds,
+            ),
+        )
+    return results
+
+
+def merge_results(runs: list[list[dict]]) -> list[dict]:
+    """Merge the results of repeated runs by taking the best value of each metric, as noises only make it worse"""
+    merged = []
+    for results in zip(*runs):
+        result = dict(results[0])
+        for metric in ("seconds", "peak_memory", "time_to_first"):
+            if metric in result:
+                result[metric] = min(item[metric] for item in results)
+        if "rows_per_second" in result:
+            result["rows_per_second"] = max(item["rows_per_second"] for item in results)
+        merged.append(result)
+    return merged
+
+
+def run(
+    row_counts: list[int],
+    extractor_names: list[str],
+    data_folder: pathlib.Path,
+    repeat: int = DEFAULT_REPEAT,
+) -> dict:
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for row_count in row_counts:
+        for extractor_name in extractor_names:
+            path = get_export(data_folder, extractor_name, row_count)
+            runs = []
+            for _ in range(repeat):
+                with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=1, mp_context=context
+                ) as executor:
+                    runs.append(
+                        executor.submit(
+                            run_case, path, extractor_name, row_count
+                        ).result()
+                    )
+            case_results = merge_results(runs)
+            for result in case_results:
+                print(format_result(result))
+            results.extend(case_results)
+    return dict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        results=results,
+    )
+
+
+def format_result(result: dict) -> str:
+    line = (
+        f"{result['extractor']:<20} {result['rows']:>9} {result['operation']:<18}"
+        f" {result['seconds']:10.4f} s {result['peak_memory'] / 1024 / 1024:8.1f} MB"
+    )
+    if "rows_per_second" in result:
+        line += f" {result['rows_per_second']:12.0f} rows/s {result['time_to_first'] * 1000:8.2f} ms to first"
+    return line
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Compare the current results with the baseline ones, and return the regressions above the threshold"""
+    baseline_results = {
+        (result["extractor"], result["rows"], result["operation"]): result
+        for result in baseline["results"]
+    }
+    regressions = []
+    for result in current["results"]:
+        key = (result["extractor"], result["rows"], result["operation"])
+        baseline_result = baseline_results.get(key)
+        if baseline_result is None:
+            continue
+        name = " ".join(map(str, key))
+        for metric, min_value in (
+            ("seconds", MIN_SECONDS),
+            ("time_to_first", MIN_SECONDS),
+            ("peak_memory", MIN_MEMORY),
+        ):
+            if metric not in result:
+                continue
+            before = baseline_result[metric]
+            after = result[metric]
+            if after - before > max(before * threshold, min_value):
+                regressions.append(f"{name} {metric}: {before:.4g} -> {after:.4g}")
+        if "rows_per_second" in result:
+            before = baseline_result["rows_per_second"]
+            after = result["rows_per_second"]
+            if after < before * (1 - threshold):
+                regressions.append(
+                    f"{name} rows_per_second: {before:.4g} -> {after:.4g}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=DEFAULT_ROW_COUNTS, help="row counts"
+    )
+    parser.add_argument(
+        "--extractors",
+        nargs="+",
+        choices=list(EXPORT_FORMATS),
+        default=list(EXPORT_FORMATS),
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=pathlib.Path,
+        help="folder for the generated exports, they are reused if they exist already",
+    )
+    parser.add_argument(
+        "--output", type=pathlib.Path, help="write results to this JSON file"
+    )
+    parser.add_argument(
+        "--compare", type=pathlib.Path, help="baseline JSON file to compare with"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="run each case this many times and keep the best values",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="fraction of regression to fail on",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_folder = args.data_dir or pathlib.Path(temp_dir)
+        data_folder.mkdir(parents=True, exist_ok=True)
+        current = run(args.rows, args.extractors, data_folder, repeat=args.repeat)
+    if args.output is not None:
+        args.output.write_text(json.dumps(current, indent=2))
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare(baseline, current, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regression found")
+
+
+if __name__ == "__main__":
+    main()
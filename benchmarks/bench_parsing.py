@@ -0,0 +1,83 @@
+"""Compare the per-row cost of parsing dates and timestamps without and with the memo cache
+
+Run it with `python -m benchmarks.bench_parsing`
+"""
+import datetime
+import random
+import timeit
+
+import pytz
+
+from beanhub_extract.parsing import clear_caches
+from beanhub_extract.parsing import parse_localized_mdy_datetime
+from beanhub_extract.parsing import parse_mdy_date
+
+ROW_COUNT = 100_000
+# a few hundred rows per day, like what we see in large business account exports
+DAY_COUNT = 365
+
+
+def parse_mdy_date_uncached(date_str: str) -> datetime.date:
+    parts = date_str.split("-")
+    return datetime.date(int(parts[-1]), *(map(int, parts[:-1])))
+
+
+def parse_localized_datetime_uncached(
+    timestamp_str: str, timezone: datetime.tzinfo
+) -> datetime.datetime:
+    date_str, time_str = timestamp_str.split(" ")
+    time = datetime.time(*(map(int, time_str.split(":"))))
+    return timezone.localize(
+        datetime.datetime.combine(parse_mdy_date_uncached(date_str), time)
+    )
+
+
+def make_dates(row_count: int) -> list[str]:
+    start = datetime.date(2024, 1, 1)
+    dates = [
+        start + datetime.timedelta(days=random.randrange(DAY_COUNT))
+        for _ in range(row_count)
+    ]
+    return [date.strftime("%m-%d-%Y") for date in dates]
+
+
+def make_timestamps(row_count: int) -> list[str]:
+    # timestamps in exports are usually rounded to minutes or repeated for batch posted transactions
+    return [
+        f"{date} {random.randrange(24):02}:{random.randrange(0, 60, 15):02}:00"
+        for date in make_dates(row_count)
+    ]
+
+
+def bench(name: str, func, values: list) -> float:
+    elapsed = min(
+        timeit.repeat(lambda: [func(value) for value in values], number=1, repeat=5)
+    )
+    per_row = elapsed / len(values) * 1e9
+    print(f"{name:<40} {per_row:8.1f} ns/row")
+    return per_row
+
+
+def main():
+    random.seed(0)
+    dates = make_dates(ROW_COUNT)
+    timestamps = make_timestamps(ROW_COUNT)
+    clear_caches()
+    uncached = bench("date (uncached)", parse_mdy_date_uncached, dates)
+    cached = bench("date (cached)", lambda value: parse_mdy_date(value, "-"), dates)
+    print(f"{'date speedup':<40} {uncached / cached:8.2f}x")
+    uncached = bench(
+        "localized datetime (uncached)",
+        lambda value: parse_localized_datetime_uncached(value, pytz.UTC),
+        timestamps,
+    )
+    cached = bench(
+        "localized datetime (cached)",
+        lambda value: parse_localized_mdy_datetime(value, pytz.UTC, "-"),
+        timestamps,
+    )
+    print(f"{'localized datetime speedup':<40} {uncached / cached:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
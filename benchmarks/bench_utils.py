@@ -0,0 +1,83 @@
+"""Compare the per-row cost of stripping the base path from transactions with the cost of parsing them
+
+Run it with `python -m benchmarks.bench_utils`
+"""
+import dataclasses
+import io
+import pathlib
+import timeit
+
+from beanhub_extract.data_types import Transaction
+from beanhub_extract.extractors.mercury import MercuryExtractor
+from beanhub_extract.utils import strip_base_path
+from beanhub_extract.utils import strip_txn_base_path
+from beanhub_extract.utils import strip_txns_base_path
+
+ROW_COUNT = 100_000
+FILE_COUNT = 10
+BASE_PATH = pathlib.Path("/data/imports")
+MERCURY_HEADER = "Date (UTC),Description,Amount,Status,Source Account,Bank Description,Reference,Note,Last Four Digits,Name On Card,Category,GL Code,Timestamp,Original Currency\n"
+MERCURY_ROW = "04-17-2024,GUSTO,-46.00,Sent,Mercury Checking xx12,GUSTO; FEE 111111; Launch Platform LLC,,,,,,,04-17-2024 21:30:40,\n"
+
+
+def strip_txn_base_path_asdict(
+    base: pathlib.Path, transaction: Transaction
+) -> Transaction:
+    # the implementation before, kept here for comparison
+    if transaction.file is None:
+        return transaction
+    return Transaction(
+        **(
+            dataclasses.asdict(transaction)
+            | dict(file=strip_base_path(base, transaction.file))
+        )
+    )
+
+
+def make_transactions(row_count: int) -> list[Transaction]:
+    transactions = []
+    content = MERCURY_HEADER + MERCURY_ROW * (row_count // FILE_COUNT)
+    for i in range(FILE_COUNT):
+        input_file = io.StringIO(content)
+        input_file.name = str(BASE_PATH / f"bank-{i}" / "mercury.csv")
+        transactions.extend(MercuryExtractor(input_file)())
+    return transactions
+
+
+def bench(name: str, func, row_count: int) -> float:
+    elapsed = min(timeit.repeat(func, number=1, repeat=5))
+    per_row = elapsed / row_count * 1e9
+    print(f"{name:<40} {per_row:8.1f} ns/row")
+    return per_row
+
+
+def main():
+    transactions = make_transactions(ROW_COUNT)
+    content = MERCURY_HEADER + MERCURY_ROW * ROW_COUNT
+    parsing = bench(
+        "parsing",
+        lambda: list(MercuryExtractor(io.StringIO(content))()),
+        ROW_COUNT,
+    )
+    asdict = bench(
+        "strip_txn_base_path (asdict)",
+        lambda: [strip_txn_base_path_asdict(BASE_PATH, txn) for txn in transactions],
+        ROW_COUNT,
+    )
+    single = bench(
+        "strip_txn_base_path",
+        lambda: [strip_txn_base_path(BASE_PATH, txn) for txn in transactions],
+        ROW_COUNT,
+    )
+    streaming = bench(
+        "strip_txns_base_path",
+        lambda: list(strip_txns_base_path(BASE_PATH, transactions)),
+        ROW_COUNT,
+    )
+    print(f"{'strip_txn_base_path speedup':<40} {asdict / single:8.2f}x")
+    print(f"{'strip_txns_base_path speedup':<40} {asdict / streaming:8.2f}x")
+    print(f"{'strip_txns_base_path / parsing':<40} {streaming / parsing:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
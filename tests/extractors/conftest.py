@@ -3,14 +3,6 @@ import zipfile
 
 import pytest
 
-TEST_PACKAGE_FOLDER = pathlib.Path(__file__).parent
-FIXTURE_FOLDER = TEST_PACKAGE_FOLDER / "fixtures"
-
-
-@pytest.fixture
-def fixtures_folder() -> pathlib.Path:
-    return FIXTURE_FOLDER
-
 
 @pytest.fixture
 def zip_file(tmp_path: pathlib.Path) -> pathlib.Path:
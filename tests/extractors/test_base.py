@@ -0,0 +1,931 @@
+import bz2
+import codecs
+import csv
+import dataclasses
+import datetime
+import decimal
+import gzip
+import io
+import lzma
+import mmap
+import pathlib
+import pickle
+import typing
+import zipfile
+
+import pytest
+from pytest_mock import MockerFixture
+
+from beanhub_extract.data_types import DateRange
+from beanhub_extract.data_types import ExtractionCursor
+from beanhub_extract.data_types import LazyTransaction
+from beanhub_extract.data_types import Transaction
+from beanhub_extract.extractors import detect_extractor
+from beanhub_extract.extractors.base import BufferIO
+from beanhub_extract.extractors.base import compile_conversion_plan
+from beanhub_extract.extractors.base import ConversionPlan
+from beanhub_extract.extractors.base import ExtractorBase
+from beanhub_extract.extractors.base import FieldColumn
+from beanhub_extract.extractors.base import hash_values
+from beanhub_extract.extractors.base import IDENTITY_FIELDS
+from beanhub_extract.extractors.base import make_row
+from beanhub_extract.extractors.base import open_input
+from beanhub_extract.extractors.chase import ChaseCreditCardExtractor
+from beanhub_extract.extractors.csv import CSVExtractor
+from beanhub_extract.extractors.mercury import MercuryExtractor
+from beanhub_extract.extractors.plaid import PlaidExtractor
+from beanhub_extract.extractors.wealthsimple import WealthsimpleExtractor
+from beanhub_extract.observer import ExtractorObserver
+from beanhub_extract.row_index import make_sidecar_path
+from beanhub_extract.row_index import RowIndex
+
+
+class NonSeekableFile(io.StringIO):
+    def seekable(self) -> bool:
+        return False
+
+    def seek(self, *args, **kwargs):
+        raise io.UnsupportedOperation("not seekable")
+
+    def tell(self):
+        raise io.UnsupportedOperation("not seekable")
+
+
+@pytest.mark.parametrize(
+    "fieldnames, values, expected",
+    [
+        (["a", "b"], ["1", "2"], {"a": "1", "b": "2"}),
+        (["a", "b"], ["1"], {"a": "1", "b": None}),
+        (["a"], ["1", "2", "3"], {"a": "1", None: ["2", "3"]}),
+    ],
+)
+def test_make_row(fieldnames: list[str], values: list[str], expected: dict):
+    assert make_row(fieldnames, values) == expected
+
+
+def test_compile_conversion_plan():
+    field_columns = ChaseCreditCardExtractor.FIELD_COLUMNS
+    parse_date = field_columns["date"].converter
+    fieldnames = ["Amount", "Transaction Date", "Description", "Balance"]
+    assert compile_conversion_plan(
+        fieldnames, field_columns, extra_converters=dict(Balance=decimal.Decimal)
+    ) == ConversionPlan(
+        field_columns=[
+            (1, "date", parse_date),
+            (2, "desc", None),
+            (0, "amount", decimal.Decimal),
+        ],
+        extra_columns=[(3, "Balance", decimal.Decimal)],
+        column_count=4,
+    )
+    assert compile_conversion_plan(
+        fieldnames, field_columns, frozenset(["date"])
+    ) == ConversionPlan(
+        field_columns=[(1, "date", parse_date)],
+        extra_columns=[],
+        column_count=4,
+        extra_requested=False,
+    )
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, input_file",
+    [
+        (ChaseCreditCardExtractor, "chase_credit_card.csv"),
+        (MercuryExtractor, "mercury.csv"),
+        (PlaidExtractor, "plaid.csv"),
+        (CSVExtractor, "csv.csv"),
+    ],
+)
+def test_single_pass(
+    fixtures_folder: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    input_file: str,
+):
+    with open(fixtures_folder / input_file, "rt") as fo:
+        expected = list(extractor_cls(fo)())
+    with open(fixtures_folder / input_file, "rt") as fo:
+        assert list(extractor_cls(fo, single_pass=True)()) == expected
+    content = (fixtures_folder / input_file).read_text()
+    non_seekable_file = NonSeekableFile(content)
+    non_seekable_file.name = str(fixtures_folder / input_file)
+    assert list(extractor_cls(non_seekable_file)()) == expected
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ("", []),
+        ("a,b\n", []),
+        (
+            "a,b\n1,2\n\n3,4\n",
+            [(1, -2, {"a": "1", "b": "2"}), (2, -1, {"a": "3", "b": "4"})],
+        ),
+    ],
+)
+@pytest.mark.parametrize("single_pass", [False, True])
+def test_iter_rows(content: str, expected: list, single_pass: bool):
+    extractor = ExtractorBase(io.StringIO(content), single_pass=single_pass)
+    assert list(extractor._iter_rows()) == expected
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, input_file",
+    [
+        (ChaseCreditCardExtractor, "chase_credit_card.csv"),
+        (MercuryExtractor, "mercury.csv"),
+    ],
+)
+def test_tail_fingerprint(
+    fixtures_folder: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    input_file: str,
+):
+    content = (fixtures_folder / input_file).read_text()
+    expected = extractor_cls(NonSeekableFile(content)).fingerprint()
+    assert expected is not None
+    with open(fixtures_folder / input_file, "rt") as fo:
+        assert extractor_cls(fo).fingerprint() == expected
+
+
+def test_tail_fingerprint_stray_quote():
+    content = (
+        "Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n"
+        '04/09/2024,04/09/2024,PAYMENT,,Payment,123.45,"line1\nline2"\n'
+        '04/01/2024,04/02/2024,14" SUB,Food & Drink,Sale,-12.00,\n'
+    )
+    expected = ChaseCreditCardExtractor(NonSeekableFile(content)).fingerprint()
+    assert expected.starting_date == datetime.date(2024, 4, 1)
+    assert (
+        ChaseCreditCardExtractor(io.BytesIO(content.encode("utf8"))).fingerprint()
+        == expected
+    )
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ("", None),
+        ("a,b\n", None),
+        ("a,b\n1,2\n", (["a", "b"], {"a": "1", "b": "2"})),
+        ('a,b\n1,2\n"3\n4",5\n\n', (["a", "b"], {"a": "3\n4", "b": "5"})),
+        ('\ufeffa,b\n"1\n2",3\n', (["a", "b"], {"a": "1\n2", "b": "3"})),
+        (
+            'a,b\n"line1\nline2",1\n14" SUB,2\n',
+            (["a", "b"], {"a": '14" SUB', "b": "2"}),
+        ),
+        ("a,b\n1,2\n3\n", (["a", "b"], {"a": "3", "b": None})),
+    ],
+)
+def test_read_last_row(tmp_path: pathlib.Path, content: str, expected: tuple | None):
+    csv_file = tmp_path / "input.csv"
+    csv_file.write_text(content, encoding="utf8")
+    with open(csv_file, "rt", encoding="utf-8-sig") as fo:
+        assert ExtractorBase(fo).read_last_row() == expected
+    assert (
+        ExtractorBase(NonSeekableFile(content.lstrip("\ufeff"))).read_last_row()
+        == expected
+    )
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, content, expected",
+    [
+        (
+            ChaseCreditCardExtractor,
+            "Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n"
+            "04/09/2024,04/09/2024,PAYMENT,,Payment,123.45,\n"
+            "04/05/2024,04/05/2024,APPLE.COM/BILL,Shopping,Sale,-1.00,\n"
+            '04/01/2024,04/01/2024,12" PIZZA,Food,Sale,-1.00,\n',
+            DateRange(start=datetime.date(2024, 4, 1), end=datetime.date(2024, 4, 9)),
+        ),
+        (
+            ChaseCreditCardExtractor,
+            "Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n"
+            "04/09/2024,04/09/2024,PAYMENT,,Payment,123.45,\n"
+            "04/05/2024,04/05/2024,APPLE.COM/BILL,Shopping,Sale,-1.00,\n"
+            ",04/01/2024,PENDING,Food,Sale,-1.00,\n",
+            DateRange(start=datetime.date(2024, 4, 5), end=datetime.date(2024, 4, 9)),
+        ),
+        (
+            ChaseCreditCardExtractor,
+            "Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n",
+            None,
+        ),
+        (
+            CSVExtractor,
+            "date,desc\n2024-04-05,A\n2024-04-09,B\n,C\n2024-04-01,D\n2024-04-07,E\n",
+            DateRange(start=datetime.date(2024, 4, 1), end=datetime.date(2024, 4, 9)),
+        ),
+    ],
+)
+def test_get_date_range(
+    tmp_path: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    content: str,
+    expected: DateRange | None,
+):
+    path = tmp_path / "input.csv"
+    path.write_text(content)
+    with open(path, "rt") as fo:
+        assert extractor_cls(fo).get_date_range() == expected
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, input_file",
+    [
+        (ChaseCreditCardExtractor, "chase_credit_card.csv"),
+        (MercuryExtractor, "mercury.csv"),
+        (PlaidExtractor, "plaid.csv"),
+        (CSVExtractor, "csv.csv"),
+        (WealthsimpleExtractor, "wealthsimple.csv"),
+    ],
+)
+@pytest.mark.parametrize("batch_size", [1, 2, 1000])
+def test_iter_batches(
+    fixtures_folder: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    input_file: str,
+    batch_size: int,
+):
+    with open(fixtures_folder / input_file, "rt") as fo:
+        expected = list(extractor_cls(fo)())
+    with open(fixtures_folder / input_file, "rt") as fo:
+        batches = list(extractor_cls(fo).iter_batches(batch_size=batch_size))
+    assert all(len(batch) <= batch_size for batch in batches)
+    assert [txn for batch in batches for txn in batch] == expected
+    assert [amount for batch in batches for amount in batch.columns["amount"]] == [
+        txn.amount for txn in expected
+    ]
+
+
+def test_iter_batches_invalid_size():
+    extractor = ExtractorBase(io.StringIO(""))
+    with pytest.raises(ValueError):
+        next(extractor.iter_batches(batch_size=0))
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, input_file",
+    [
+        (ChaseCreditCardExtractor, "chase_credit_card.csv"),
+        (MercuryExtractor, "mercury.csv"),
+        (PlaidExtractor, "plaid.csv"),
+        (CSVExtractor, "csv.csv"),
+        (WealthsimpleExtractor, "wealthsimple.csv"),
+    ],
+)
+@pytest.mark.parametrize("single_pass", [False, True])
+def test_resumable(
+    fixtures_folder: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    input_file: str,
+    single_pass: bool,
+):
+    with open(fixtures_folder / input_file, "rt") as fo:
+        expected = list(extractor_cls(fo)())
+    with open(fixtures_folder / input_file, "rt") as fo:
+        extractor = extractor_cls(fo, single_pass=single_pass, resumable=True)
+        assert list(extractor()) == expected
+        cursor = extractor.cursor
+    lines = (fixtures_folder / input_file).read_bytes().splitlines(keepends=True)
+    assert cursor == ExtractionCursor(
+        offset=sum(map(len, lines[:-1])),
+        lineno=len(expected),
+        row_hash=cursor.row_hash,
+    )
+
+
+@pytest.mark.parametrize("split", [1, 2, 3])
+@pytest.mark.parametrize("single_pass", [False, True])
+def test_resume(
+    tmp_path: pathlib.Path, fixtures_folder: pathlib.Path, split: int, single_pass: bool
+):
+    header, *lines = (fixtures_folder / "csv.csv").read_text().splitlines()
+    # make some multi-line rows with CRLF to ensure offsets are tracked correctly
+    lines = [line.replace("BeanHub sub", '"BeanHub\r\nsub"') for line in lines] * 2
+    csv_file = tmp_path / "csv.csv"
+    csv_file.write_bytes("\r\n".join([header, *lines[:split]]).encode() + b"\r\n")
+    with open(csv_file, "rt") as fo:
+        extractor = CSVExtractor(fo, resumable=True)
+        list(extractor())
+        cursor = extractor.cursor
+    assert cursor.lineno == split
+
+    with open(csv_file, "ab") as fo:
+        fo.write("\r\n".join(lines[split:]).encode() + b"\r\n")
+    with open(csv_file, "rt") as fo:
+        expected = list(CSVExtractor(fo)())
+    with open(csv_file, "rt") as fo:
+        extractor = CSVExtractor(fo, single_pass=single_pass, cursor=cursor)
+        assert list(extractor()) == expected[split:]
+        assert extractor.resumed
+        assert extractor.cursor.lineno == len(lines)
+        assert extractor.cursor.row_hash == hash_values(next(csv.reader([lines[-1]])))
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        ExtractionCursor(offset=0, lineno=1, row_hash="invalid"),
+        ExtractionCursor(offset=8, lineno=1, row_hash=hash_values(["1", "2"])),
+        ExtractionCursor(offset=4, lineno=1, row_hash=hash_values(["1", "3"])),
+        ExtractionCursor(offset=1000, lineno=1, row_hash=hash_values(["1", "2"])),
+    ],
+)
+def test_resume_fallback(tmp_path: pathlib.Path, cursor: ExtractionCursor):
+    csv_file = tmp_path / "input.csv"
+    csv_file.write_text("a,b\n1,2\n3,4\n")
+    with open(csv_file, "rt") as fo:
+        extractor = ExtractorBase(fo, cursor=cursor)
+        assert list(extractor._iter_rows()) == [
+            (1, -2, {"a": "1", "b": "2"}),
+            (2, -1, {"a": "3", "b": "4"}),
+        ]
+        assert not extractor.resumed
+        assert extractor.cursor == ExtractionCursor(
+            offset=8, lineno=2, row_hash=hash_values(["3", "4"])
+        )
+
+
+def test_resume_without_new_rows(tmp_path: pathlib.Path):
+    csv_file = tmp_path / "input.csv"
+    csv_file.write_text("a,b\n1,2\n")
+    cursor = ExtractionCursor(offset=4, lineno=1, row_hash=hash_values(["1", "2"]))
+    with open(csv_file, "rt") as fo:
+        extractor = ExtractorBase(fo, cursor=cursor)
+        assert list(extractor._iter_rows()) == []
+        assert extractor.resumed
+        assert extractor.cursor == cursor
+
+
+def test_resumable_unsupported_input():
+    extractor = ExtractorBase(io.StringIO("a,b\n1,2\n"), resumable=True)
+    with pytest.raises(ValueError):
+        list(extractor._iter_rows())
+
+
+def make_binary_input(kind: str, data: bytes, path: pathlib.Path) -> typing.Any:
+    if kind == "bytes":
+        return data
+    elif kind == "bytearray":
+        return bytearray(data)
+    elif kind == "memoryview":
+        return memoryview(data)
+    elif kind == "mmap":
+        path.write_bytes(data)
+        with open(path, "rb") as fo:
+            return mmap.mmap(fo.fileno(), 0, access=mmap.ACCESS_READ)
+    elif kind == "bytes_io":
+        return io.BytesIO(data)
+    elif kind == "raw_file":
+        path.write_bytes(data)
+        return open(path, "rb", buffering=0)
+    raise ValueError(kind)
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, input_file",
+    [
+        (ChaseCreditCardExtractor, "chase_credit_card.csv"),
+        (MercuryExtractor, "mercury.csv"),
+        (PlaidExtractor, "plaid.csv"),
+        (CSVExtractor, "csv.csv"),
+        (WealthsimpleExtractor, "wealthsimple.csv"),
+    ],
+)
+@pytest.mark.parametrize(
+    "kind", ["bytes", "bytearray", "memoryview", "mmap", "bytes_io", "raw_file"]
+)
+@pytest.mark.parametrize("bom", [False, True])
+def test_binary_input(
+    tmp_path: pathlib.Path,
+    fixtures_folder: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    input_file: str,
+    kind: str,
+    bom: bool,
+):
+    with open(fixtures_folder / input_file, "rt") as fo:
+        expected = [dataclasses.replace(txn, file=None) for txn in extractor_cls(fo)()]
+        fo.seek(0)
+        expected_fingerprint = extractor_cls(fo).fingerprint()
+    data = (fixtures_folder / input_file).read_bytes()
+    if bom:
+        data = codecs.BOM_UTF8 + data
+    binary_input = make_binary_input(kind, data, tmp_path / input_file)
+    assert detect_extractor(binary_input) is extractor_cls
+    if kind in ("bytes_io", "raw_file"):
+        binary_input.seek(0)
+    assert extractor_cls(binary_input).fingerprint() == expected_fingerprint
+    if kind in ("bytes_io", "raw_file"):
+        binary_input.seek(0)
+    transactions = [
+        dataclasses.replace(txn, file=None) for txn in extractor_cls(binary_input)()
+    ]
+    assert transactions == expected
+    if kind in ("bytes_io", "raw_file", "mmap"):
+        # the binary input is left open for the caller
+        assert not binary_input.closed
+        binary_input.close()
+
+
+def test_binary_file_name(fixtures_folder: pathlib.Path):
+    path = fixtures_folder / "mercury.csv"
+    with open(path, "rb") as fo:
+        assert {txn.file for txn in MercuryExtractor(fo)()} == {str(path)}
+    assert {txn.file for txn in MercuryExtractor(path.read_bytes())()} == {None}
+
+
+def test_buffer_io():
+    data = b"0123456789"
+    buffer_io = BufferIO(memoryview(data))
+    assert buffer_io.read(3) == b"012"
+    assert buffer_io.tell() == 3
+    assert buffer_io.seek(-2, io.SEEK_END) == 8
+    assert buffer_io.read() == b"89"
+    assert buffer_io.read() == b""
+    assert buffer_io.seek(2, io.SEEK_SET) == 2
+    assert buffer_io.seek(1, io.SEEK_CUR) == 3
+    assert buffer_io.read(100) == b"3456789"
+    with pytest.raises(ValueError):
+        buffer_io.seek(-1)
+
+
+def test_open_input():
+    text_file = io.StringIO("a,b")
+    assert open_input(text_file) is text_file
+    assert open_input(b"\xef\xbb\xbfa,b").read() == "a,b"
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, input_file",
+    [
+        (MercuryExtractor, "mercury.csv"),
+        (PlaidExtractor, "plaid.csv"),
+        (CSVExtractor, "csv.csv"),
+        (WealthsimpleExtractor, "wealthsimple.csv"),
+    ],
+)
+def test_text_input_with_bom(
+    tmp_path: pathlib.Path,
+    fixtures_folder: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    input_file: str,
+):
+    path = tmp_path / input_file
+    path.write_bytes(codecs.BOM_UTF8 + (fixtures_folder / input_file).read_bytes())
+    with open(fixtures_folder / input_file, "rt") as fo:
+        expected = [dataclasses.replace(txn, file=None) for txn in extractor_cls(fo)()]
+        fo.seek(0)
+        expected_fingerprint = extractor_cls(fo).fingerprint()
+    with open(path, "rt", encoding="utf-8") as fo:
+        assert detect_extractor(fo) is extractor_cls
+        fo.seek(0)
+        assert extractor_cls(fo).fingerprint() == expected_fingerprint
+        fo.seek(0)
+        assert [
+            dataclasses.replace(txn, file=None) for txn in extractor_cls(fo)()
+        ] == expected
+
+
+def compress_input(compression: str, data: bytes, name: str) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data)
+    elif compression == "bzip2":
+        return bz2.compress(data)
+    elif compression == "xz":
+        return lzma.compress(data)
+    elif compression == "zip":
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(name, data)
+        return output.getvalue()
+    raise ValueError(compression)
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, input_file",
+    [
+        (ChaseCreditCardExtractor, "chase_credit_card.csv"),
+        (MercuryExtractor, "mercury.csv"),
+        (PlaidExtractor, "plaid.csv"),
+        (CSVExtractor, "csv.csv"),
+        (WealthsimpleExtractor, "wealthsimple.csv"),
+    ],
+)
+@pytest.mark.parametrize("compression", ["gzip", "bzip2", "xz", "zip"])
+def test_compressed_input(
+    tmp_path: pathlib.Path,
+    fixtures_folder: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    input_file: str,
+    compression: str,
+):
+    with open(fixtures_folder / input_file, "rt") as fo:
+        expected = list(extractor_cls(fo)())
+        fo.seek(0)
+        expected_fingerprint = extractor_cls(fo).fingerprint()
+    path = tmp_path / f"{input_file}.{compression}"
+    path.write_bytes(
+        compress_input(
+            compression, (fixtures_folder / input_file).read_bytes(), input_file
+        )
+    )
+    expected_file = str(path)
+    if compression == "zip":
+        expected_file = f"{path}/{input_file}"
+    with open(path, "rb") as fo:
+        assert detect_extractor(fo) is extractor_cls
+        fo.seek(0)
+        assert extractor_cls(fo).fingerprint() == expected_fingerprint
+        fo.seek(0)
+        expected = [dataclasses.replace(txn, file=expected_file) for txn in expected]
+        assert list(extractor_cls(fo)()) == expected
+        fo.seek(0)
+        assert list(extractor_cls(fo, single_pass=True)()) == expected
+        fo.seek(0)
+        with pytest.raises(ValueError, match="seekable"):
+            extractor_cls(fo).get(lineno=1)
+
+
+def test_compressed_input_date_range(fixtures_folder: pathlib.Path):
+    data = (fixtures_folder / "mercury.csv").read_bytes()
+    date_range = DateRange(
+        start=datetime.date(2024, 4, 10), end=datetime.date(2024, 4, 20)
+    )
+    # the binary search is not possible for compressed files, the rows are filtered instead
+    assert list(MercuryExtractor(gzip.compress(data), date_range=date_range)()) == list(
+        MercuryExtractor(data, date_range=date_range)()
+    )
+
+
+def test_zip_input_with_multiple_files():
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w") as archive:
+        archive.writestr("a.csv", "Date (UTC)\n")
+        archive.writestr("b.csv", "Date (UTC)\n")
+    data = output.getvalue()
+    assert detect_extractor(data) is None
+    with pytest.raises(ValueError, match="single file"):
+        MercuryExtractor(data)
+
+
+def test_resume_binary_input(fixtures_folder: pathlib.Path):
+    data = codecs.BOM_UTF8 + (fixtures_folder / "plaid.csv").read_bytes()
+    extractor = PlaidExtractor(data, resumable=True)
+    expected = list(extractor())
+    cursor = extractor.cursor
+    header, *lines = data.splitlines(keepends=True)
+    new_data = data + b"\n" + lines[-1]
+    extractor = PlaidExtractor(new_data, cursor=cursor)
+    transactions = list(extractor())
+    assert extractor.resumed
+    assert [txn.lineno for txn in transactions] == [len(expected) + 1]
+    assert transactions[0].transaction_id == expected[-1].transaction_id
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, input_file",
+    [
+        (ChaseCreditCardExtractor, "chase_credit_card.csv"),
+        (MercuryExtractor, "mercury.csv"),
+        (PlaidExtractor, "plaid.csv"),
+        (CSVExtractor, "csv.csv"),
+        (WealthsimpleExtractor, "wealthsimple.csv"),
+    ],
+)
+def test_lazy(
+    fixtures_folder: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    input_file: str,
+):
+    with open(fixtures_folder / input_file, "rt") as fo:
+        expected = list(extractor_cls(fo)())
+        fo.seek(0)
+        transactions = list(extractor_cls(fo, lazy=True)())
+    assert transactions
+    for txn in transactions:
+        assert isinstance(txn, LazyTransaction)
+        # nothing is converted before it's accessed
+        raw_values = txn.get_raw_values()
+        assert "amount" in raw_values
+        for name, value in raw_values.items():
+            assert extractor_cls.FIELD_COLUMNS[name].converter is not None
+            assert isinstance(value, str)
+    assert transactions == expected
+    assert [txn.to_transaction() for txn in transactions] == expected
+    assert pickle.loads(pickle.dumps(transactions)) == expected
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, input_file",
+    [
+        (MercuryExtractor, "mercury.csv"),
+        (PlaidExtractor, "plaid.csv"),
+        (CSVExtractor, "csv.csv"),
+    ],
+)
+def test_lazy_iter_batches(
+    fixtures_folder: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    input_file: str,
+):
+    with open(fixtures_folder / input_file, "rt") as fo:
+        expected = list(extractor_cls(fo).iter_batches(batch_size=2))
+        fo.seek(0)
+        assert list(extractor_cls(fo, lazy=True).iter_batches(batch_size=2)) == expected
+
+
+def test_lazy_conversion_on_access(
+    fixtures_folder: pathlib.Path, mocker: MockerFixture
+):
+    converter = mocker.Mock(return_value=decimal.Decimal("1.23"))
+    mocker.patch.dict(
+        MercuryExtractor.FIELD_COLUMNS, amount=FieldColumn("Amount", converter)
+    )
+    with open(fixtures_folder / "mercury.csv", "rt") as fo:
+        transactions = list(MercuryExtractor(fo, lazy=True)())
+    assert [txn.desc for txn in transactions]
+    converter.assert_not_called()
+    txn = transactions[0]
+    raw_amount = txn.get_raw_values()["amount"]
+    assert txn.amount == decimal.Decimal("1.23")
+    assert txn.amount == decimal.Decimal("1.23")
+    converter.assert_called_once_with(raw_amount)
+    assert "amount" not in txn.get_raw_values()
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, input_file",
+    [
+        (ChaseCreditCardExtractor, "chase_credit_card.csv"),
+        (MercuryExtractor, "mercury.csv"),
+        (PlaidExtractor, "plaid.csv"),
+        (CSVExtractor, "csv.csv"),
+        (WealthsimpleExtractor, "wealthsimple.csv"),
+    ],
+)
+@pytest.mark.parametrize("as_bytes", [False, True])
+def test_date_range(
+    fixtures_folder: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    input_file: str,
+    as_bytes: bool,
+):
+    path = fixtures_folder / input_file
+    with open(path, "rt") as fo:
+        transactions = [
+            dataclasses.replace(txn, file=None) for txn in extractor_cls(fo)()
+        ]
+    dates = sorted(set(txn.date for txn in transactions if txn.date is not None))
+    for date_range in [
+        DateRange(),
+        DateRange(start=dates[0]),
+        DateRange(end=dates[0]),
+        DateRange(start=dates[1], end=dates[-2]),
+        DateRange(start=dates[-1] + datetime.timedelta(days=1)),
+        DateRange(end=dates[0] - datetime.timedelta(days=1)),
+    ]:
+        input_file = path.read_bytes() if as_bytes else io.StringIO(path.read_text())
+        extractor = extractor_cls(input_file, date_range=date_range)
+        assert [dataclasses.replace(txn, file=None) for txn in extractor()] == [
+            txn for txn in transactions if txn.date in date_range
+        ]
+
+
+def make_sorted_export(
+    row_count: int, quoted_newline: bool = False, bom: bool = False
+) -> bytes:
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(MercuryExtractor.ALL_FIELDS)
+    start_date = datetime.date(2024, 1, 1)
+    for index in range(row_count, 0, -1):
+        date = start_date + datetime.timedelta(days=index // 5)
+        desc = f"Row {index}"
+        if quoted_newline and index % 7 == 0:
+            desc += "\n04-01-2024,GUSTO"
+        writer.writerow(
+            [
+                date.strftime("%m-%d-%Y"),
+                desc,
+                f"-{index}.00",
+                "Sent",
+                "Mercury Checking",
+                desc,
+                "",
+                "",
+                "",
+                "",
+                "",
+                "",
+                date.strftime("%m-%d-%Y 12:00:00"),
+                "",
+            ]
+        )
+        if index % 100 == 0:
+            # blank lines are not counted as rows
+            output.write("\n")
+    data = output.getvalue().encode()
+    if bom:
+        data = codecs.BOM_UTF8 + data
+    return data
+
+
+@pytest.mark.parametrize("quoted_newline", [False, True])
+@pytest.mark.parametrize("bom", [False, True])
+@pytest.mark.parametrize(
+    "date_range",
+    [
+        DateRange(start=datetime.date(2024, 12, 1)),
+        DateRange(end=datetime.date(2024, 1, 10)),
+        DateRange(start=datetime.date(2024, 6, 1), end=datetime.date(2024, 6, 30)),
+        DateRange(start=datetime.date(2030, 1, 1)),
+        DateRange(end=datetime.date(2023, 1, 1)),
+    ],
+)
+def test_date_range_sorted(
+    tmp_path: pathlib.Path, quoted_newline: bool, bom: bool, date_range: DateRange
+):
+    path = tmp_path / "mercury.csv"
+    path.write_bytes(make_sorted_export(5000, quoted_newline=quoted_newline, bom=bom))
+    with open(path, "rt", encoding="utf-8-sig") as fo:
+        transactions = list(MercuryExtractor(fo, single_pass=True)())
+    expected = [txn for txn in transactions if txn.date in date_range]
+    observer = ExtractorObserver()
+    observer.on_rows = lambda extractor, parsed, emitted: rows.append(parsed)
+    rows = []
+    with open(path, "rt", encoding="utf-8-sig") as fo:
+        extractor = MercuryExtractor(fo, date_range=date_range, observer=observer)
+        assert list(extractor()) == expected
+    if not quoted_newline:
+        # only the rows in the range are parsed
+        assert rows == [len(expected)]
+
+
+def test_date_range_sorted_stray_quotes(tmp_path: pathlib.Path):
+    lines = ["Transaction Date,Post Date,Description,Category,Type,Amount,Memo"]
+    for index in range(1, 401):
+        date = datetime.date(2024, 1, 1) + datetime.timedelta(days=(400 - index) // 2)
+        # an even number of quotes in unquoted fields before the range
+        desc = '12" PIZZA' if index in (10, 20) else f"Row {index}"
+        lines.append(f"{date:%m/%d/%Y},{date:%m/%d/%Y},{desc},Food,Sale,-{index}.00,")
+    path = tmp_path / "chase.csv"
+    path.write_text("\n".join(lines) + "\n")
+    date_range = DateRange(
+        start=datetime.date(2024, 3, 1), end=datetime.date(2024, 3, 5)
+    )
+    with open(path, "rt") as fo:
+        expected = [
+            txn for txn in ChaseCreditCardExtractor(fo)() if txn.date in date_range
+        ]
+    with open(path, "rt") as fo:
+        transactions = list(ChaseCreditCardExtractor(fo, date_range=date_range)())
+    assert transactions == expected
+    assert transactions[0].lineno == 271
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, input_file",
+    [
+        (ChaseCreditCardExtractor, "chase_credit_card.csv"),
+        (MercuryExtractor, "mercury.csv"),
+        (PlaidExtractor, "plaid.csv"),
+        (CSVExtractor, "csv.csv"),
+        (WealthsimpleExtractor, "wealthsimple.csv"),
+    ],
+)
+@pytest.mark.parametrize(
+    "fields",
+    [
+        frozenset(),
+        frozenset(["date", "amount", "desc", "transaction_id"]),
+        frozenset(["post_date", "timestamp", "timezone", "pending", "status"]),
+        frozenset(["desc", "extra"]),
+    ],
+)
+@pytest.mark.parametrize("lazy", [False, True])
+def test_fields(
+    fixtures_folder: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    input_file: str,
+    fields: frozenset[str],
+    lazy: bool,
+):
+    with open(fixtures_folder / input_file, "rt") as fo:
+        expected = list(extractor_cls(fo)())
+        fo.seek(0)
+        transactions = list(extractor_cls(fo, fields=fields, lazy=lazy)())
+    assert transactions == [
+        Transaction(
+            **{
+                field.name: getattr(txn, field.name)
+                for field in dataclasses.fields(Transaction)
+                if field.name in fields or field.name in IDENTITY_FIELDS
+            }
+        )
+        for txn in expected
+    ]
+
+
+def test_fields_unknown():
+    with pytest.raises(ValueError, match="Unknown transaction fields bar, foo"):
+        MercuryExtractor(io.StringIO(""), fields=["date", "foo", "bar"])
+
+
+@pytest.mark.parametrize(
+    "extractor_cls, input_file",
+    [
+        (ChaseCreditCardExtractor, "chase_credit_card.csv"),
+        (MercuryExtractor, "mercury.csv"),
+        (PlaidExtractor, "plaid.csv"),
+        (CSVExtractor, "csv.csv"),
+        (WealthsimpleExtractor, "wealthsimple.csv"),
+    ],
+)
+def test_get(
+    fixtures_folder: pathlib.Path,
+    extractor_cls: typing.Type[ExtractorBase],
+    input_file: str,
+):
+    with open(fixtures_folder / input_file, "rt") as fo:
+        transactions = list(extractor_cls(fo)())
+        fo.seek(0)
+        extractor = extractor_cls(fo)
+        for txn in reversed(transactions):
+            assert extractor.get(lineno=txn.lineno) == txn
+            assert extractor.get(reversed_lineno=txn.reversed_lineno) == txn
+        assert extractor.get(lineno=0) is None
+        assert extractor.get(lineno=len(transactions) + 1) is None
+        assert extractor.get(reversed_lineno=-len(transactions) - 1) is None
+        with pytest.raises(ValueError):
+            extractor.get()
+        with pytest.raises(ValueError):
+            extractor.get(lineno=1, reversed_lineno=-1)
+        # the extractor still works after getting rows
+        fo.seek(0)
+        assert list(extractor()) == transactions
+
+
+def test_get_stray_quote(tmp_path: pathlib.Path):
+    path = tmp_path / "chase.csv"
+    rows = [
+        "04/09/2024,04/09/2024,{},Food,Sale,-1.00,{}".format(
+            '12" PIZZA' if i % 97 == 0 else f"item {i}",
+            '"multi\nline"' if i % 2 else "",
+        )
+        for i in range(200)
+    ]
+    path.write_text(
+        "\n".join(
+            ["Transaction Date,Post Date,Description,Category,Type,Amount,Memo", *rows]
+        )
+        + "\n"
+    )
+    with open(path, "rt") as fo:
+        transactions = list(ChaseCreditCardExtractor(fo)())
+        extractor = ChaseCreditCardExtractor(fo)
+        assert extractor.get(lineno=5).desc == "item 4"
+        for txn in transactions:
+            assert extractor.get(lineno=txn.lineno) == txn
+
+
+def test_get_with_sidecar(
+    tmp_path: pathlib.Path, fixtures_folder: pathlib.Path, mocker: MockerFixture
+):
+    path = tmp_path / "mercury.csv"
+    path.write_bytes((fixtures_folder / "mercury.csv").read_bytes())
+    sidecar_path = make_sidecar_path(path)
+    with open(path, "rt") as fo:
+        transactions = list(MercuryExtractor(fo)())
+        extractor = MercuryExtractor(fo, row_index_path=sidecar_path)
+        assert extractor.get(lineno=2) == transactions[1]
+    assert sidecar_path.exists()
+
+    build = mocker.spy(RowIndex, "build")
+    with open(path, "rt") as fo:
+        extractor = MercuryExtractor(fo, row_index_path=sidecar_path)
+        assert extractor.get(reversed_lineno=-1) == transactions[-1]
+        build.assert_not_called()
+
+    with open(path, "at") as fo:
+        fo.write(
+            "\n04-01-2024,New Row,-1.00,Sent,Mercury Checking,New Row,,,,,,,04-01-2024 00:00:00,"
+        )
+    with open(path, "rt") as fo:
+        extractor = MercuryExtractor(fo, row_index_path=sidecar_path)
+        assert extractor.get(lineno=len(transactions)) == dataclasses.replace(
+            transactions[-1], reversed_lineno=-2
+        )
+        new_txn = extractor.get(reversed_lineno=-1)
+        build.assert_called_once()
+    assert new_txn.desc == "New Row"
+    assert new_txn.lineno == len(transactions) + 1
+    assert len(RowIndex.load(sidecar_path)) == len(transactions) + 1
+
+
+def test_get_unsupported_input():
+    extractor = MercuryExtractor(io.StringIO("Date (UTC)\n"))
+    with pytest.raises(ValueError, match="seekable"):
+        extractor.get(lineno=1)
@@ -1,12 +1,15 @@
 import datetime
 import decimal
 import functools
+import io
 import pathlib
 
 import pytest
 
 from beanhub_extract.data_types import Fingerprint
 from beanhub_extract.data_types import Transaction
+from beanhub_extract.extractors.base import compile_conversion_plan
+from beanhub_extract.extractors.base import ConversionPlan
 from beanhub_extract.extractors.csv import CSVExtractor
 from beanhub_extract.utils import strip_txn_base_path
 
@@ -99,3 +102,88 @@ def test_fingerprint(fixtures_folder: pathlib.Path):
             starting_date=datetime.date(2025, 6, 28),
             first_row_hash="3128963b757e527f3d192edbecf4ee55f22abbaa3736b402bec93b25a5aae458",
         )
+
+
+def test_compile_conversion_plan():
+    field_columns = CSVExtractor.FIELD_COLUMNS
+    assert compile_conversion_plan(
+        ["desc", "_custom", "date", "amount", "pending", "_other", "_custom"],
+        field_columns,
+        extra_converters=dict(_other=decimal.Decimal),
+    ) == ConversionPlan(
+        field_columns=[
+            (2, "date", field_columns["date"].converter),
+            (0, "desc", None),
+            (3, "amount", field_columns["amount"].converter),
+            (4, "pending", field_columns["pending"].converter),
+        ],
+        extra_columns=[(6, "_custom", None), (5, "_other", decimal.Decimal)],
+        column_count=7,
+    )
+
+
+def test_compile_conversion_plan_projection():
+    field_columns = CSVExtractor.FIELD_COLUMNS
+    assert compile_conversion_plan(
+        ["desc", "_custom", "date", "amount", "pending", "_other", "_custom"],
+        field_columns,
+        frozenset(["date", "pending"]),
+    ) == ConversionPlan(
+        field_columns=[
+            (2, "date", field_columns["date"].converter),
+            (4, "pending", field_columns["pending"].converter),
+        ],
+        extra_columns=[],
+        column_count=7,
+        extra_requested=False,
+    )
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        (
+            "desc,amount,_custom\nfoo, ,bar\n",
+            [dict(desc="foo", extra=dict(_custom="bar"))],
+        ),
+        (
+            "desc,amount,_custom\nfoo,1.23\n",
+            [
+                dict(
+                    desc="foo", amount=decimal.Decimal("1.23"), extra=dict(_custom=None)
+                )
+            ],
+        ),
+        (
+            "desc,amount\nfoo,1.23,x,y\n",
+            [
+                dict(
+                    desc="foo", amount=decimal.Decimal("1.23"), extra={None: ["x", "y"]}
+                )
+            ],
+        ),
+        (
+            "desc,pending,timestamp\nfoo,TRUE,2025-06-29T00:32:53+00:00\n",
+            [
+                dict(
+                    desc="foo",
+                    pending=True,
+                    timestamp=datetime.datetime.fromisoformat(
+                        "2025-06-29T00:32:53+00:00"
+                    ),
+                )
+            ],
+        ),
+    ],
+)
+def test_extractor_conversion(content: str, expected: list[dict]):
+    extractor = CSVExtractor(io.StringIO(content))
+    assert list(extractor()) == [
+        Transaction(
+            extractor="csv",
+            lineno=i + 1,
+            reversed_lineno=i - len(expected),
+            **kwargs,
+        )
+        for i, kwargs in enumerate(expected)
+    ]
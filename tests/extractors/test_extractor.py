@@ -2,7 +2,11 @@ import pathlib
 
 import pytest
 
+from beanhub_extract.extractors import ALL_EXTRACTORS
+from beanhub_extract.extractors import build_header_index
 from beanhub_extract.extractors import detect_extractor
+from beanhub_extract.extractors.csv import CSVExtractor
+from beanhub_extract.extractors.mercury import MercuryExtractor
 
 
 @pytest.mark.parametrize(
@@ -10,9 +14,11 @@ from beanhub_extract.extractors import detect_extractor
     [
         ("mercury.csv", "mercury"),
         ("chase_credit_card.csv", "chase_credit_card"),
+        ("plaid.csv", "plaid"),
         ("csv.csv", "csv"),
         ("wealthsimple.csv", "wealthsimple"),
         ("other.csv", None),
+        ("empty.csv", None),
         (pytest.lazy_fixture("zip_file"), None),
     ],
 )
@@ -25,3 +31,15 @@ def test_detect_extractor(
             assert extractor_cls is None
         else:
             assert extractor_cls.EXTRACTOR_NAME == extractor_name
+
+
+def test_build_header_index():
+    header_index, required_header_extractors = build_header_index(
+        ALL_EXTRACTORS.values()
+    )
+    assert header_index[MercuryExtractor.HEADER_FIELDS] is MercuryExtractor
+    assert CSVExtractor not in header_index.values()
+    assert required_header_extractors == [CSVExtractor]
+    for extractor_cls in ALL_EXTRACTORS.values():
+        if extractor_cls.HEADER_FIELDS is not None:
+            assert extractor_cls.match_header(list(extractor_cls.HEADER_FIELDS))
@@ -2,6 +2,9 @@ import datetime
 import decimal
 import functools
 import pathlib
+import subprocess
+import sys
+import textwrap
 
 import pytest
 
@@ -87,7 +90,6 @@ def test_parse_date(date_str: str, expected: datetime.date):
         ),
     ],
 )
-
 def test_wealthsimple_extractor(
     fixtures_folder: pathlib.Path, input_file: str, expected: list[Transaction]
 ):
@@ -128,3 +130,58 @@ def test_wealthsimple_fingerprint(fixtures_folder: pathlib.Path):
             starting_date=datetime.date(2024, 4, 1),
             first_row_hash="f9d844138962e483beecd7f44ada98f0995810e4b1e3fc6d3b27d1b6189318b6",
         )
+
+
+def test_wealthsimple_fingerprint_then_extract(fixtures_folder: pathlib.Path):
+    with open(fixtures_folder / "wealthsimple.csv", "rt", encoding="utf-8") as fo:
+        expected = list(WealthsimpleExtractor(fo)())
+    assert len(expected) == 5
+    with open(fixtures_folder / "wealthsimple.csv", "rt", encoding="utf-8") as fo:
+        extractor = WealthsimpleExtractor(fo)
+        extractor.fingerprint()
+        assert list(extractor()) == expected
+        # extracting again reads the file from the beginning
+        assert list(extractor()) == expected
+
+
+def measure_peak_memory_growth(csv_file: pathlib.Path) -> tuple[int, int]:
+    """Extract the given file in a fresh interpreter and return the row count with the growth of its peak RSS"""
+    script = textwrap.dedent(
+        """
+        import resource
+        import sys
+
+        from beanhub_extract.extractors.wealthsimple import WealthsimpleExtractor
+
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with open(sys.argv[1], "rt", encoding="utf-8") as fo:
+            count = sum(1 for _ in WealthsimpleExtractor(fo)())
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(count, peak - baseline)
+        """
+    )
+    output = subprocess.check_output(
+        [sys.executable, "-c", script, str(csv_file)], text=True
+    )
+    count, growth = map(int, output.split())
+    return count, growth
+
+
+def test_wealthsimple_extractor_memory(
+    tmp_path: pathlib.Path, fixtures_folder: pathlib.Path
+):
+    pytest.importorskip("resource")
+    header, *lines = (fixtures_folder / "wealthsimple.csv").read_text().splitlines()
+    growths = []
+    for row_count in [10_000, 1_000_000]:
+        csv_file = tmp_path / f"wealthsimple-{row_count}.csv"
+        with open(csv_file, "wt", encoding="utf-8") as fo:
+            fo.write(header + "\n")
+            for i in range(row_count):
+                fo.write(lines[i % len(lines)] + "\n")
+        count, growth = measure_peak_memory_growth(csv_file)
+        assert count == row_count
+        growths.append(growth)
+    # the peak memory should stay flat instead of growing with the input. buffering 1M rows would take hundreds
+    # of MB, while we allow 16MB (ru_maxrss is in KB on Linux) for noise
+    assert growths[1] - growths[0] < 16 * 1024
@@ -0,0 +1,112 @@
+import asyncio
+import pathlib
+import threading
+import typing
+
+import pytest
+
+from beanhub_extract.aio import AsyncExtractor
+from beanhub_extract.aio import detect_extractor
+from beanhub_extract.aio import ThreadedIterator
+from beanhub_extract.extractors import ALL_EXTRACTORS
+
+
+async def collect(iterator: typing.AsyncIterable) -> list:
+    return [item async for item in iterator]
+
+
+@pytest.mark.parametrize("extractor_name", list(ALL_EXTRACTORS))
+@pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+def test_async_extractor(
+    fixtures_folder: pathlib.Path, extractor_name: str, chunk_size: int
+):
+    path = fixtures_folder / f"{extractor_name}.csv"
+    extractor_cls = ALL_EXTRACTORS[extractor_name]
+    with open(path, "rt") as fo:
+        expected = list(extractor_cls(fo)())
+        fo.seek(0)
+        expected_fingerprint = extractor_cls(fo).fingerprint()
+
+    async def run():
+        with open(path, "rt") as fo:
+            assert await detect_extractor(fo) is extractor_cls
+            fo.seek(0)
+            extractor = AsyncExtractor(extractor_cls(fo), chunk_size=chunk_size)
+            assert await extractor.detect()
+            fo.seek(0)
+            assert await extractor.fingerprint() == expected_fingerprint
+            fo.seek(0)
+            assert await collect(extractor) == expected
+            fo.seek(0)
+            batches = await collect(extractor.iter_batches(batch_size=2))
+            assert [txn for batch in batches for txn in batch] == expected
+
+    asyncio.run(run())
+
+
+def test_threaded_iterator_backpressure():
+    pulled = []
+    threads = set()
+
+    def generate():
+        for i in range(10):
+            threads.add(threading.get_ident())
+            pulled.append(i)
+            yield i
+
+    async def run():
+        iterator = ThreadedIterator(generate(), chunk_size=3)
+        chunks = iterator.iter_chunks()
+        assert await chunks.__anext__() == [0, 1, 2]
+        # nothing is read ahead until the consumer asks for more
+        await asyncio.sleep(0.01)
+        assert pulled == [0, 1, 2]
+        assert await chunks.__anext__() == [3, 4, 5]
+        await chunks.aclose()
+        assert await collect(
+            ThreadedIterator(generate(), chunk_size=4).iter_chunks()
+        ) == [
+            [0, 1, 2, 3],
+            [4, 5, 6, 7],
+            [8, 9],
+        ]
+
+    asyncio.run(run())
+    assert threading.get_ident() not in threads
+
+
+def test_threaded_iterator_close_on_cancel():
+    started = threading.Event()
+    release = threading.Event()
+    finalized = []
+
+    def generate():
+        try:
+            yield 0
+            started.set()
+            release.wait(5)
+            yield 1
+        finally:
+            finalized.append(True)
+
+    async def consume():
+        async for _ in ThreadedIterator(generate(), chunk_size=1).iter_chunks():
+            pass
+
+    async def run():
+        task = asyncio.create_task(consume())
+        while not started.is_set():
+            await asyncio.sleep(0.001)
+        task.cancel()
+        # the generator is still running in the thread, it should be closed after it yields
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert finalized == [True]
+
+    asyncio.run(run())
+
+
+def test_invalid_chunk_size():
+    with pytest.raises(ValueError):
+        AsyncExtractor(None, chunk_size=0)
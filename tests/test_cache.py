@@ -0,0 +1,107 @@
+import concurrent.futures
+import os
+import pathlib
+import shutil
+
+import pytest
+from pytest_mock import MockerFixture
+
+from beanhub_extract.cache import ENTRY_SUFFIX
+from beanhub_extract.cache import ExtractionCache
+from beanhub_extract.extractors.base import ExtractorBase
+from beanhub_extract.extractors.mercury import MercuryExtractor
+
+
+@pytest.fixture
+def mercury_file(tmp_path: pathlib.Path, fixtures_folder: pathlib.Path) -> pathlib.Path:
+    path = tmp_path / "mercury.csv"
+    shutil.copy(fixtures_folder / "mercury.csv", path)
+    return path
+
+
+def extract_directly(path: pathlib.Path) -> list:
+    with open(path, "rt") as fo:
+        return list(MercuryExtractor(fo)())
+
+
+def test_cache_hit(
+    tmp_path: pathlib.Path, mercury_file: pathlib.Path, mocker: MockerFixture
+):
+    expected = extract_directly(mercury_file)
+    cache = ExtractionCache(tmp_path / "cache")
+    spy = mocker.spy(ExtractorBase, "__call__")
+    assert cache.extract(mercury_file) == expected
+    assert spy.call_count == 1
+    assert cache.extract(mercury_file) == expected
+    assert cache.extract(mercury_file, MercuryExtractor) == expected
+    assert spy.call_count == 1
+    # a new cache object on the same directory, like another process
+    assert ExtractionCache(tmp_path / "cache").extract(mercury_file) == expected
+    assert spy.call_count == 1
+
+
+def test_cache_invalidation(
+    tmp_path: pathlib.Path, mercury_file: pathlib.Path, mocker: MockerFixture
+):
+    cache = ExtractionCache(tmp_path / "cache")
+    cache.extract(mercury_file)
+    lines = mercury_file.read_text().splitlines(keepends=True)
+    mercury_file.write_text("".join(lines[:-1]))
+    expected = extract_directly(mercury_file)
+    spy = mocker.spy(ExtractorBase, "__call__")
+    assert cache.extract(mercury_file) == expected
+    assert spy.call_count == 1
+
+    cache.version = "999.0.0"
+    cache.extract(mercury_file)
+    assert spy.call_count == 2
+
+
+def test_cache_unknown_format(tmp_path: pathlib.Path, fixtures_folder: pathlib.Path):
+    cache = ExtractionCache(tmp_path / "cache")
+    with pytest.raises(ValueError):
+        cache.extract(fixtures_folder / "other.csv")
+
+
+def test_cache_eviction(tmp_path: pathlib.Path, fixtures_folder: pathlib.Path):
+    cache_dir = tmp_path / "cache"
+    cache = ExtractionCache(cache_dir)
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"mercury-{i}.csv"
+        shutil.copy(fixtures_folder / "mercury.csv", path)
+        paths.append(path)
+        cache.extract(path)
+    entries = sorted(cache_dir.glob("*" + ENTRY_SUFFIX), key=os.path.getmtime)
+    assert len(entries) == 3
+    entry_size = max(entry.stat().st_size for entry in entries)
+    # make the first one the most recently used
+    first_entry = cache_dir / (
+        cache.make_key(paths[0], MercuryExtractor) + ENTRY_SUFFIX
+    )
+    os.utime(first_entry, ns=(0, 0))
+    assert cache.get(first_entry.name.removesuffix(ENTRY_SUFFIX)) is not None
+
+    cache.max_size = entry_size * 2
+    cache.evict()
+    remaining = set(cache_dir.glob("*" + ENTRY_SUFFIX))
+    assert len(remaining) == 2
+    assert first_entry in remaining
+
+
+def extract_with_cache(cache_dir: pathlib.Path, path: pathlib.Path) -> list:
+    return ExtractionCache(cache_dir).extract(path)
+
+
+def test_cache_concurrent_access(tmp_path: pathlib.Path, mercury_file: pathlib.Path):
+    expected = extract_directly(mercury_file)
+    cache_dir = tmp_path / "cache"
+    with concurrent.futures.ProcessPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(extract_with_cache, cache_dir, mercury_file)
+            for _ in range(16)
+        ]
+        for future in futures:
+            assert future.result() == expected
+    assert len(list(cache_dir.glob("*" + ENTRY_SUFFIX))) == 1
+    assert not list(cache_dir.glob(".*.tmp"))
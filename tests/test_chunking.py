@@ -0,0 +1,124 @@
+import io
+
+import pytest
+
+from beanhub_extract.chunking import bisect_records
+from beanhub_extract.chunking import count_records
+from beanhub_extract.chunking import find_header_end
+from beanhub_extract.chunking import find_record_boundaries
+from beanhub_extract.chunking import read_bounded_header
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        (b"", 0),
+        (b"a,b", 3),
+        (b"a,b\n1,2\n", 4),
+        (b'"a\nx",b\r\n1,2\n', 9),
+    ],
+)
+def test_find_header_end(content: bytes, expected: int):
+    assert find_header_end(io.BytesIO(content)) == expected
+
+
+@pytest.mark.parametrize(
+    "content, chunk_size, start, expected",
+    [
+        (b"", 10, 0, [0]),
+        (b"a,b\n", 10, 4, [4]),
+        (b"a,b\n1,2\n3,4\n5,6\n", 1, 4, [4, 8, 12, 16]),
+        (b"a,b\n1,2\n3,4\n5,6\n", 5, 4, [4, 12, 16]),
+        (b"a,b\n1,2\n3,4\n5,6", 100, 4, [4, 15]),
+        (b'a,b\n"1\n2\n3",4\n5,6\n', 1, 4, [4, 14, 18]),
+        (b'a,b\n"1\n""2\n""",4\n5,6\n', 1, 4, [4, 17, 21]),
+    ],
+)
+@pytest.mark.parametrize("block_size", [1, 3, 1024])
+def test_find_record_boundaries(
+    content: bytes, chunk_size: int, start: int, expected: list[int], block_size: int
+):
+    assert (
+        find_record_boundaries(
+            io.BytesIO(content),
+            chunk_size=chunk_size,
+            start=start,
+            block_size=block_size,
+        )
+        == expected
+    )
+
+
+@pytest.mark.parametrize(
+    "content, size, expected",
+    [
+        (b"", 10, None),
+        (b"a,b", 10, ["a", "b"]),
+        (b"a,b\n1,2\n", 10, ["a", "b"]),
+        (b'"a\nx",b\r\n1,2\n', 100, ["a\nx", "b"]),
+        (b'"a\nx",b\r\n1,2\n', 5, None),
+        (b"a" * 20, 10, None),
+        (b"a,b\n", 4, ["a", "b"]),
+        (b"\xff\xfe,b\n", 10, None),
+    ],
+)
+def test_read_bounded_header(content: bytes, size: int, expected: list[str] | None):
+    assert read_bounded_header(io.BytesIO(content), size=size) == expected
+
+
+@pytest.mark.parametrize(
+    "content, start, end, expected",
+    [
+        (b"", 0, None, 0),
+        (b"a,b\n", 4, None, 0),
+        (b"a,b\n1,2\n3,4\n5,6\n", 4, None, 3),
+        (b"a,b\n1,2\n3,4\n5,6", 4, None, 3),
+        (b"a,b\n1,2\n3,4\n5,6\n", 4, 12, 2),
+        (b"a,b\n1,2\n3,4\n5,6\n", 0, 4, 1),
+        (b"a,b\n1,2\n3,4\n5,6\n", 4, 10, None),
+        (b"a,b\r\n\r\n1,2\r\n\n\n3,4\r\n", 5, None, 2),
+        (b'a,b\n"1\n\n2\n3",4\n5,6\n', 4, None, 2),
+        (b'a,b\n"1\n""2\n""",4\n5,6\n', 4, None, 2),
+        (b'a,b\n"1\n2\n3",4\n5,6\n', 4, 7, None),
+        (b'a,b\n"1\n2\n3",4\n5,6\n', 4, 14, 1),
+        (b'a,b\n"1\n2', 4, None, None),
+        # quotes in unquoted fields are literal ones
+        (b'a,b\n12" PIZZA,1\n3,4\n5,6\n', 4, None, 3),
+        (b'a,b\n12" PIZZA,1\n3,4\n5,6\n', 4, 20, 2),
+        (b'a,b\n12" PIZZA,1\n3,4\n14" PIZZA,2\n5,6\n', 4, 20, 2),
+        (b'a,b\n12" PIZZA,1\n3,4\n14" PIZZA,2\n5,6\n', 4, None, 4),
+    ],
+)
+def test_count_records(
+    content: bytes, start: int, end: int | None, expected: int | None
+):
+    assert count_records(io.BytesIO(content), start, end) == expected
+
+
+@pytest.mark.parametrize("scan_size", [0, 10, 1024])
+@pytest.mark.parametrize("quoted", [False, True])
+def test_bisect_records(scan_size: int, quoted: bool):
+    header = b"value,desc\n"
+    rows = [
+        f'{value},"line\n{value}"\n' if quoted else f"{value},row {value}\n"
+        for value in range(100, 0, -2)
+    ]
+    content = header + "".join(rows).encode()
+    offsets = [len(header)]
+    for row in rows:
+        offsets.append(offsets[-1] + len(row))
+    file = io.BytesIO(content)
+    for threshold in range(0, 103):
+        expected = offsets[sum(1 for value in range(100, 0, -2) if value > threshold)]
+        offset = bisect_records(
+            file,
+            lambda values: int(values[0]) <= threshold,
+            len(header),
+            len(content),
+            scan_size=scan_size,
+        )
+        if quoted and offset != expected:
+            # the probes could land in the quoted newlines, but it's always detected
+            assert count_records(file, len(header), offset) is None
+        else:
+            assert offset == expected
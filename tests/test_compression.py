@@ -0,0 +1,128 @@
+import bz2
+import gzip
+import io
+import lzma
+import typing
+import zipfile
+
+import pytest
+
+from beanhub_extract.compression import detect_compression
+from beanhub_extract.compression import is_decompressed
+from beanhub_extract.compression import iter_archive_members
+from beanhub_extract.compression import iter_zip_members
+from beanhub_extract.compression import open_decompressed
+from beanhub_extract.compression import open_single_zip_member
+from beanhub_extract.compression import peek_magic
+
+
+def make_zip(members: dict[str, bytes]) -> bytes:
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return output.getvalue()
+
+
+class NonSeekableBytesIO(io.BytesIO):
+    def seekable(self) -> bool:
+        return False
+
+    def seek(self, *args, **kwargs):
+        raise io.UnsupportedOperation("not seekable")
+
+    def tell(self):
+        raise io.UnsupportedOperation("not seekable")
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (gzip.compress(b"a,b\n"), "gzip"),
+        (bz2.compress(b"a,b\n"), "bzip2"),
+        (lzma.compress(b"a,b\n"), "xz"),
+        (make_zip({"a.csv": b"a,b\n"}), "zip"),
+        (b"a,b\n", None),
+        (b"\x1f", None),
+        (b"", None),
+    ],
+)
+def test_detect_compression(data: bytes, expected: str | None):
+    input_file = io.BytesIO(data)
+    assert detect_compression(input_file) == expected
+    # nothing is consumed
+    assert input_file.read() == data
+    buffered_file = io.BufferedReader(NonSeekableBytesIO(data))
+    assert detect_compression(buffered_file) == expected
+    assert buffered_file.read() == data
+
+
+def test_peek_magic_non_seekable():
+    assert peek_magic(NonSeekableBytesIO(b"\x1f\x8b")) == b""
+
+
+@pytest.mark.parametrize(
+    "compression, compress",
+    [("gzip", gzip.compress), ("bzip2", bz2.compress), ("xz", lzma.compress)],
+)
+def test_open_decompressed(compression: str, compress: typing.Callable):
+    data = b"a,b\n" * 1000
+    input_file = io.BytesIO(compress(data))
+    with open_decompressed(input_file, compression) as decompressed:
+        assert is_decompressed(decompressed)
+        assert decompressed.read(4) == b"a,b\n"
+        decompressed.seek(0)
+        assert decompressed.read() == data
+    # the given file is left open
+    assert not input_file.closed
+
+
+def test_open_decompressed_unsupported():
+    with pytest.raises(ValueError, match="Unsupported compression"):
+        open_decompressed(io.BytesIO(), "zip")
+
+
+def test_iter_zip_members():
+    data = make_zip({"a.csv": b"a\n", "folder/": b"", "folder/b.csv": b"b\n"})
+    assert [
+        (name, member_file.read())
+        for name, member_file in iter_zip_members(io.BytesIO(data), "archive.zip")
+    ] == [("archive.zip/a.csv", b"a\n"), ("archive.zip/folder/b.csv", b"b\n")]
+    assert [name for name, _ in iter_zip_members(io.BytesIO(data))] == [
+        "a.csv",
+        "folder/b.csv",
+    ]
+    with pytest.raises(ValueError, match="Invalid zip archive"):
+        list(iter_zip_members(io.BytesIO(b"PK\x03\x04")))
+
+
+def test_open_single_zip_member():
+    name, member_file = open_single_zip_member(
+        io.BytesIO(make_zip({"a.csv": b"a\n"})), "archive.zip"
+    )
+    assert name == "archive.zip/a.csv"
+    assert member_file.read() == b"a\n"
+    with pytest.raises(ValueError, match="got 2 files"):
+        open_single_zip_member(io.BytesIO(make_zip({"a.csv": b"", "b.csv": b""})))
+    with pytest.raises(ValueError, match="got 0 files"):
+        open_single_zip_member(io.BytesIO(make_zip({})))
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (b"a\n", [("input", b"a\n")]),
+        (gzip.compress(b"a\n"), [("input", b"a\n")]),
+        (bz2.compress(b"a\n"), [("input", b"a\n")]),
+        (lzma.compress(b"a\n"), [("input", b"a\n")]),
+        (
+            make_zip({"a.csv": b"a\n", "b.csv": b"b\n"}),
+            [("input/a.csv", b"a\n"), ("input/b.csv", b"b\n")],
+        ),
+    ],
+)
+def test_iter_archive_members(data: bytes, expected: list[tuple[str, bytes]]):
+    assert [
+        (name, member_file.read())
+        for name, member_file in iter_archive_members(io.BytesIO(data), "input")
+    ] == expected
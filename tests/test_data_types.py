@@ -0,0 +1,138 @@
+import dataclasses
+import datetime
+import decimal
+import pickle
+import timeit
+import tracemalloc
+import typing
+
+import pytest
+
+from beanhub_extract.data_types import BATCH_COLUMN_FIELDS
+from beanhub_extract.data_types import LazyTransaction
+from beanhub_extract.data_types import Transaction
+from beanhub_extract.data_types import TransactionBatch
+
+# the same transaction type without slots as a reference for comparing the memory usage and construction rate
+LegacyTransaction = dataclasses.make_dataclass(
+    "LegacyTransaction",
+    [
+        (field.name, field.type, dataclasses.field(default=field.default))
+        if field.default is not dataclasses.MISSING
+        else (field.name, field.type)
+        for field in dataclasses.fields(Transaction)
+    ],
+    frozen=True,
+)
+TRANSACTION_KWARGS = dict(
+    extractor="mercury",
+    file="mercury.csv",
+    lineno=1,
+    reversed_lineno=-1,
+    date=datetime.date(2024, 4, 17),
+    desc="GUSTO",
+    amount=decimal.Decimal("-46.00"),
+    status="Sent",
+)
+
+
+def measure_bytes_per_txn(txn_cls: typing.Type, count: int = 10_000) -> float:
+    tracemalloc.start()
+    try:
+        txns = [txn_cls(**TRANSACTION_KWARGS) for _ in range(count)]
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(txns) == count
+    return current / count
+
+
+def measure_construction_rate(txn_cls: typing.Type, count: int = 50_000) -> float:
+    elapsed = min(
+        timeit.repeat(lambda: txn_cls(**TRANSACTION_KWARGS), number=count, repeat=3)
+    )
+    return count / elapsed
+
+
+def test_transaction_slots():
+    txn = Transaction(**TRANSACTION_KWARGS)
+    assert not hasattr(txn, "__dict__")
+    assert txn == Transaction(**TRANSACTION_KWARGS)
+    assert txn != Transaction(**(TRANSACTION_KWARGS | dict(lineno=2)))
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        txn.lineno = 2
+    assert pickle.loads(pickle.dumps(txn)) == txn
+    assert dataclasses.replace(txn, lineno=2).lineno == 2
+    assert dataclasses.asdict(txn)["desc"] == "GUSTO"
+
+
+def test_transaction_memory_and_construction_rate():
+    legacy_bytes = measure_bytes_per_txn(LegacyTransaction)
+    slotted_bytes = measure_bytes_per_txn(Transaction)
+    legacy_rate = measure_construction_rate(LegacyTransaction)
+    slotted_rate = measure_construction_rate(Transaction)
+    assert slotted_bytes < legacy_bytes
+    assert slotted_rate > legacy_rate
+
+
+def test_transaction_init_without_setattr():
+    # the generated __init__ of a frozen dataclass sets every field with object.__setattr__
+    assert "__setattr__" in LegacyTransaction.__init__.__code__.co_names
+    assert "__setattr__" not in Transaction.__init__.__code__.co_names
+    assert Transaction.__init__.__qualname__ == "Transaction.__init__"
+    txn = Transaction(extractor="mercury")
+    assert txn.lineno is None
+    assert txn.extra is None
+
+
+def test_transaction_batch():
+    columns = {name: [None, None] for name in BATCH_COLUMN_FIELDS}
+    columns["lineno"] = [1, 2]
+    columns["desc"] = ["GUSTO", "AWS"]
+    batch = TransactionBatch(
+        extractor="mercury",
+        file="mercury.csv",
+        columns=columns,
+        extra_schema=("balance",),
+        extra_columns=dict(balance=["1", "2"]),
+    )
+    assert len(batch) == 2
+    assert list(batch) == [
+        Transaction(
+            extractor="mercury",
+            file="mercury.csv",
+            lineno=1,
+            desc="GUSTO",
+            extra=dict(balance="1"),
+        ),
+        Transaction(
+            extractor="mercury",
+            file="mercury.csv",
+            lineno=2,
+            desc="AWS",
+            extra=dict(balance="2"),
+        ),
+    ]
+
+
+def test_lazy_transaction():
+    raw_kwargs = dict(TRANSACTION_KWARGS, date="04-17-2024", amount="-46.00")
+    converters = dict(
+        date=lambda value: datetime.datetime.strptime(value, "%m-%d-%Y").date(),
+        amount=decimal.Decimal,
+    )
+    txn = LazyTransaction.from_values(raw_kwargs, converters)
+    expected = Transaction(**TRANSACTION_KWARGS)
+    assert txn.get_raw_values() == dict(date="04-17-2024", amount="-46.00")
+    assert txn == expected
+    assert expected == txn
+    assert hash(txn) == hash(expected)
+    assert repr(txn) == f"Lazy{expected!r}"
+    assert dataclasses.asdict(txn) == dataclasses.asdict(expected)
+    assert dataclasses.replace(txn, desc="AWS") == dataclasses.replace(
+        expected, desc="AWS"
+    )
+    assert type(txn.to_transaction()) is Transaction
+    assert txn.to_transaction() == expected
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        txn.amount = decimal.Decimal("1")
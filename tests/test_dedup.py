@@ -0,0 +1,176 @@
+import dataclasses
+import datetime
+import decimal
+import pathlib
+
+import pytest
+
+from beanhub_extract.data_types import Transaction
+from beanhub_extract.dedup import BloomFilter
+from beanhub_extract.dedup import dedup_transactions
+from beanhub_extract.dedup import Deduplicator
+from beanhub_extract.dedup import make_dedup_key
+from beanhub_extract.extractors.mercury import MercuryExtractor
+from beanhub_extract.extractors.plaid import PlaidExtractor
+
+
+def make_txn(file: str, desc: str, amount: str = "1.50", **kwargs) -> Transaction:
+    return Transaction(
+        extractor="mercury",
+        file=file,
+        date=datetime.date(2024, 4, 1),
+        desc=desc,
+        amount=decimal.Decimal(amount),
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize(
+    "txn, other, expected",
+    [
+        (make_txn("a.csv", "Coffee"), make_txn("b.csv", "Coffee"), True),
+        (make_txn("a.csv", "Coffee"), make_txn("b.csv", "  COFFEE "), True),
+        (make_txn("a.csv", "Coffee"), make_txn("b.csv", "Coffee", "1.5"), True),
+        (
+            make_txn("a.csv", "Coffee", status="pending", lineno=1),
+            make_txn("b.csv", "Coffee", status="sent", lineno=5),
+            True,
+        ),
+        (make_txn("a.csv", "Coffee"), make_txn("b.csv", "Coffee", "1.51"), False),
+        (make_txn("a.csv", "Coffee"), make_txn("b.csv", "Tea"), False),
+        (
+            make_txn("a.csv", "Coffee"),
+            dataclasses.replace(make_txn("b.csv", "Coffee"), extractor="csv"),
+            False,
+        ),
+        (
+            make_txn("a.csv", "Coffee", transaction_id="txn-1"),
+            make_txn("b.csv", "Tea", "2.00", transaction_id="txn-1"),
+            True,
+        ),
+        (
+            make_txn("a.csv", "Coffee", transaction_id="txn-1"),
+            make_txn("b.csv", "Coffee", transaction_id="txn-2"),
+            False,
+        ),
+    ],
+)
+def test_make_dedup_key(txn: Transaction, other: Transaction, expected: bool):
+    assert (make_dedup_key(txn) == make_dedup_key(other)) == expected
+
+
+def test_bloom_filter():
+    bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [make_dedup_key(make_txn("a.csv", f"Coffee {i}")) for i in range(2000)]
+    # the new keys may be false positives
+    assert sum(1 for key in keys[:1000] if bloom_filter.add(key)) < 50
+    assert all(key in bloom_filter for key in keys[:1000])
+    assert all(bloom_filter.add(key) for key in keys[:1000])
+    false_positive_count = sum(1 for key in keys[1000:] if key in bloom_filter)
+    assert false_positive_count < 50
+
+
+@pytest.mark.parametrize(
+    "capacity, error_rate",
+    [(0, 0.01), (100, 0), (100, 1)],
+)
+def test_bloom_filter_invalid_arguments(capacity: int, error_rate: float):
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=capacity, error_rate=error_rate)
+
+
+@pytest.mark.parametrize("capacity", [1, 10_000])
+@pytest.mark.parametrize("flush_size", [1, 3, 10_000])
+def test_deduplicator(capacity: int, flush_size: int):
+    transactions = [
+        make_txn("a.csv", "Coffee"),
+        # the same transaction twice in a file is not a duplicate
+        make_txn("a.csv", "Coffee"),
+        make_txn("a.csv", "Tea"),
+        make_txn("b.csv", "Coffee"),
+        make_txn("b.csv", "Coffee"),
+        make_txn("b.csv", "Coffee"),
+        make_txn("b.csv", "Tea"),
+        make_txn("b.csv", "Lunch"),
+        make_txn("c.csv", "Coffee"),
+        make_txn("c.csv", "Lunch"),
+        make_txn("c.csv", "Lunch"),
+    ]
+    with Deduplicator(capacity=capacity, flush_size=flush_size) as deduplicator:
+        assert list(deduplicator(transactions)) == [
+            transactions[0],
+            transactions[1],
+            transactions[2],
+            transactions[5],
+            transactions[7],
+            transactions[10],
+        ]
+
+
+def test_deduplicator_lookups():
+    transactions = [make_txn("a.csv", f"Coffee {i}") for i in range(1000)]
+    with Deduplicator(capacity=10_000, flush_size=100) as deduplicator:
+        assert list(deduplicator(transactions)) == transactions
+        # new keys are not checked against the exact store, except the false positives
+        assert deduplicator.lookup_count < 10
+        assert (
+            list(
+                deduplicator(
+                    dataclasses.replace(txn, file="b.csv") for txn in transactions
+                )
+            )
+            == []
+        )
+        assert deduplicator.lookup_count >= 1000
+
+
+def test_deduplicator_persistent(tmp_path: pathlib.Path):
+    path = tmp_path / "dedup.sqlite"
+    with Deduplicator(path) as deduplicator:
+        assert list(
+            deduplicator([make_txn("a.csv", "Coffee"), make_txn("a.csv", "Coffee")])
+        ) == [make_txn("a.csv", "Coffee"), make_txn("a.csv", "Coffee")]
+    with Deduplicator(path) as deduplicator:
+        assert list(
+            deduplicator(
+                [
+                    make_txn("b.csv", "Coffee"),
+                    make_txn("b.csv", "Coffee"),
+                    make_txn("b.csv", "Coffee"),
+                    make_txn("b.csv", "Tea"),
+                ]
+            )
+        ) == [make_txn("b.csv", "Coffee"), make_txn("b.csv", "Tea")]
+
+
+def test_dedup_overlapping_exports(
+    tmp_path: pathlib.Path, fixtures_folder: pathlib.Path
+):
+    header, *lines = (fixtures_folder / "mercury.csv").read_text().splitlines()
+    first_path = tmp_path / "first.csv"
+    first_path.write_text("\n".join([header, *lines[1:]]) + "\n")
+    second_path = tmp_path / "second.csv"
+    second_path.write_text("\n".join([header, *lines[:2]]) + "\n")
+    with open(first_path, "rt") as fo:
+        first_transactions = list(MercuryExtractor(fo)())
+    with open(second_path, "rt") as fo:
+        second_transactions = list(MercuryExtractor(fo)())
+    assert (
+        list(dedup_transactions(first_transactions + second_transactions))
+        == first_transactions + second_transactions[:1]
+    )
+
+    with open(fixtures_folder / "plaid.csv", "rt") as fo:
+        plaid_transactions = list(PlaidExtractor(fo)())
+    assert (
+        list(
+            dedup_transactions(
+                plaid_transactions
+                + [
+                    dataclasses.replace(txn, file="other.csv")
+                    for txn in plaid_transactions
+                ]
+            )
+        )
+        == plaid_transactions
+    )
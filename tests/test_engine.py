@@ -0,0 +1,328 @@
+import dataclasses
+import gzip
+import io
+import lzma
+import os
+import pathlib
+import shutil
+import typing
+import zipfile
+
+import pytest
+
+from beanhub_extract.engine import extract_file
+from beanhub_extract.engine import extract_file_in_chunks
+from beanhub_extract.engine import extract_files
+from beanhub_extract.engine import extract_tree
+from beanhub_extract.engine import FileResult
+from beanhub_extract.engine import FileStats
+from beanhub_extract.engine import iter_tree_files
+from beanhub_extract.extractors import detect_extractor
+from beanhub_extract.utils import strip_txn_base_path
+
+
+def extract_sequentially(path: pathlib.Path) -> FileResult:
+    with open(path, "rt") as fo:
+        extractor_cls = detect_extractor(fo)
+        fo.seek(0)
+        extractor = extractor_cls(fo)
+        fingerprint = extractor.fingerprint()
+        fo.seek(0)
+        return FileResult(
+            path=path,
+            extractor=extractor_cls.EXTRACTOR_NAME,
+            fingerprint=fingerprint,
+            transactions=list(extractor()),
+        )
+
+
+def test_extract_file(fixtures_folder: pathlib.Path):
+    path = fixtures_folder / "mercury.csv"
+    assert extract_file(path) == extract_sequentially(path)
+    assert extract_file(fixtures_folder / "other.csv") == FileResult(
+        path=fixtures_folder / "other.csv"
+    )
+    result = extract_file(fixtures_folder / "missing.csv")
+    assert result.extractor is None
+    assert "FileNotFoundError" in result.error
+
+
+def test_extract_compressed_file(tmp_path: pathlib.Path, fixtures_folder: pathlib.Path):
+    path = tmp_path / "mercury.csv.gz"
+    path.write_bytes(gzip.compress((fixtures_folder / "mercury.csv").read_bytes()))
+    expected = extract_sequentially(fixtures_folder / "mercury.csv")
+    result = extract_file(path)
+    assert result.extractor == "mercury"
+    assert result.fingerprint == expected.fingerprint
+    assert result.transactions == [
+        dataclasses.replace(txn, file=str(path)) for txn in expected.transactions
+    ]
+
+
+@pytest.mark.parametrize(
+    "workers, max_in_flight",
+    [
+        (1, 1),
+        (2, 3),
+        (4, None),
+    ],
+)
+def test_extract_files(
+    fixtures_folder: pathlib.Path, workers: int, max_in_flight: int | None
+):
+    filenames = [
+        "mercury.csv",
+        "missing.csv",
+        "chase_credit_card.csv",
+        "other.csv",
+        "plaid.csv",
+        "csv.csv",
+        "wealthsimple.csv",
+    ]
+    paths = [fixtures_folder / filename for filename in filenames]
+    results = list(extract_files(paths, workers=workers, max_in_flight=max_in_flight))
+    assert [result.path for result in results] == paths
+    for path, result in zip(paths, results):
+        if path.name == "missing.csv":
+            assert "FileNotFoundError" in result.error
+        elif path.name == "other.csv":
+            assert result == FileResult(path=path)
+        else:
+            assert result == extract_sequentially(path)
+
+
+def test_extract_files_invalid_workers():
+    with pytest.raises(ValueError):
+        list(extract_files([], workers=0))
+
+
+@pytest.mark.parametrize(
+    "input_file, chunk_size",
+    [
+        ("plaid.csv", 1),
+        ("plaid.csv", 1000),
+        ("csv.csv", 1),
+        ("csv.csv", 300),
+        ("csv.csv", 1024 * 1024),
+        ("mercury.csv", 200),
+    ],
+)
+def test_extract_file_in_chunks(
+    tmp_path: pathlib.Path,
+    fixtures_folder: pathlib.Path,
+    input_file: str,
+    chunk_size: int,
+):
+    header, *lines = (fixtures_folder / input_file).read_text().splitlines()
+    if input_file == "csv.csv":
+        # make a few quoted values with newlines to ensure chunks are aligned with records
+        lines = [
+            line.replace("BeanHub subscription", '"BeanHub\nsub, ""yearly""\n"')
+            for line in lines
+        ]
+    large_file = tmp_path / input_file
+    large_file.write_text("\n".join([header, *(lines * 20)]) + "\n")
+    expected = extract_sequentially(large_file).transactions
+    assert len(expected) == len(lines) * 20
+    assert (
+        list(extract_file_in_chunks(large_file, workers=2, chunk_size=chunk_size))
+        == expected
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 100, 1024 * 1024])
+def test_extract_file_in_chunks_stray_quote(tmp_path: pathlib.Path, chunk_size: int):
+    lines = ["Transaction Date,Post Date,Description,Category,Type,Amount,Memo"]
+    for i in range(60):
+        description = f'12" PIZZA {i}' if i % 7 == 3 else f"item {i}"
+        memo = f'"memo {i}\nline, 2"' if i % 5 == 0 else ""
+        lines.append(f"04/09/2024,04/09/2024,{description},Food,Sale,-1.00,{memo}")
+    path = tmp_path / "chase.csv"
+    path.write_text("\n".join(lines) + "\n")
+    expected = extract_sequentially(path).transactions
+    assert len(expected) == 60
+    assert (
+        list(extract_file_in_chunks(path, workers=2, chunk_size=chunk_size)) == expected
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 100, 1024 * 1024])
+def test_extract_file_in_chunks_crlf(tmp_path: pathlib.Path, chunk_size: int):
+    lines = ["Transaction Date,Post Date,Description,Category,Type,Amount,Memo"]
+    for i in range(30):
+        lines.append(f'04/09/2024,04/09/2024,item {i},Food,Sale,-1.00,"a\r\nb {i}"')
+    path = tmp_path / "chase.csv"
+    path.write_bytes(("\r\n".join(lines) + "\r\n").encode("utf8"))
+    expected = extract_sequentially(path).transactions
+    assert expected[0].note == "a\nb 0"
+    assert (
+        list(extract_file_in_chunks(path, workers=2, chunk_size=chunk_size)) == expected
+    )
+
+
+def test_extract_file_in_chunks_unknown_format(fixtures_folder: pathlib.Path):
+    with pytest.raises(ValueError):
+        list(extract_file_in_chunks(fixtures_folder / "other.csv"))
+
+
+@pytest.fixture
+def tree_folder(tmp_path: pathlib.Path, fixtures_folder: pathlib.Path) -> pathlib.Path:
+    root = tmp_path / "root"
+    for filename, target in [
+        ("mercury.csv", "mercury.csv"),
+        ("other.csv", "other.csv"),
+        ("plaid.csv", "b/plaid.csv"),
+        ("chase_credit_card.csv", "a/chase.csv"),
+        ("csv.csv", "a/nested/csv.csv"),
+        ("empty.csv", "a/empty.csv"),
+    ]:
+        target_path = root / target
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(fixtures_folder / filename, target_path)
+    (root / "a" / "image.png").write_bytes(b"\x89PNG\r\n\x1a\n\x00\x00")
+    (root / "a" / "huge.txt").write_text("x" * (1024 * 1024))
+    return root
+
+
+def test_iter_tree_files(tree_folder: pathlib.Path):
+    (tree_folder / "b" / "loop").symlink_to(tree_folder, target_is_directory=True)
+    assert [path for path, _ in iter_tree_files(tree_folder)] == [
+        "mercury.csv",
+        "other.csv",
+        os.path.join("a", "chase.csv"),
+        os.path.join("a", "empty.csv"),
+        os.path.join("a", "huge.txt"),
+        os.path.join("a", "image.png"),
+        os.path.join("a", "nested", "csv.csv"),
+        os.path.join("b", "plaid.csv"),
+    ]
+
+
+def test_extract_tree(tree_folder: pathlib.Path):
+    expected = []
+    for path in [
+        tree_folder / "mercury.csv",
+        tree_folder / "a" / "chase.csv",
+        tree_folder / "a" / "nested" / "csv.csv",
+        tree_folder / "b" / "plaid.csv",
+    ]:
+        expected.extend(
+            strip_txn_base_path(tree_folder, txn)
+            for txn in extract_sequentially(path).transactions
+        )
+    stats: list[FileStats] = []
+    assert list(extract_tree(tree_folder, on_file=stats.append)) == expected
+    assert [(item.path, item.extractor, item.error) for item in stats] == [
+        ("mercury.csv", "mercury", None),
+        (os.path.join("a", "chase.csv"), "chase_credit_card", None),
+        (os.path.join("a", "nested", "csv.csv"), "csv", None),
+        (os.path.join("b", "plaid.csv"), "plaid", None),
+    ]
+    assert sum(item.transaction_count for item in stats) == len(expected)
+    assert stats[0].size == (tree_folder / "mercury.csv").stat().st_size
+
+
+def test_extract_tree_archives(tmp_path: pathlib.Path, fixtures_folder: pathlib.Path):
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "mercury.csv.gz").write_bytes(
+        gzip.compress((fixtures_folder / "mercury.csv").read_bytes())
+    )
+    (root / "broken.csv.gz").write_bytes(b"\x1f\x8b broken")
+    (root / "broken.zip").write_bytes(b"PK\x03\x04 broken")
+    with zipfile.ZipFile(root / "exports.zip", "w") as archive:
+        archive.write(fixtures_folder / "chase_credit_card.csv", "chase.csv")
+        archive.write(fixtures_folder / "other.csv", "other.csv")
+        archive.write(fixtures_folder / "plaid.csv", "2024/plaid.csv")
+    expected = []
+    for path, filename in [
+        ("exports.zip/chase.csv", "chase_credit_card.csv"),
+        ("exports.zip/2024/plaid.csv", "plaid.csv"),
+        ("mercury.csv.gz", "mercury.csv"),
+    ]:
+        expected.extend(
+            dataclasses.replace(txn, file=path)
+            for txn in extract_sequentially(fixtures_folder / filename).transactions
+        )
+    stats: list[FileStats] = []
+    assert list(extract_tree(root, on_file=stats.append)) == expected
+    assert [(item.path, item.extractor, item.error) for item in stats] == [
+        # the files in an archive are extracted in the archive order
+        ("exports.zip/chase.csv", "chase_credit_card", None),
+        ("exports.zip/2024/plaid.csv", "plaid", None),
+        ("mercury.csv.gz", "mercury", None),
+    ]
+
+
+def make_corrupt_gzip(data: bytes) -> bytes:
+    compressed = bytearray(gzip.compress(data))
+    # garble the deflate data after the 10 bytes header
+    compressed[10:20] = b"\xff" * 10
+    return bytes(compressed)
+
+
+def make_corrupt_zip(data: bytes) -> bytes:
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("a.csv", data)
+    compressed = bytearray(output.getvalue())
+    # garble the member header name length, so that the member cannot be opened
+    compressed[26:28] = b"\xff\xff"
+    return bytes(compressed)
+
+
+@pytest.mark.parametrize(
+    "filename, make_content",
+    [
+        ("a.csv.xz", lambda data: b"\xfd7zXZ\x00" + b"\x00" * 100),
+        ("a.csv.xz", lambda data: lzma.compress(data)[:40] + b"\xff" * 40),
+        ("a.csv.gz", make_corrupt_gzip),
+        ("a.zip", make_corrupt_zip),
+    ],
+)
+def test_extract_tree_corrupt_archive(
+    tmp_path: pathlib.Path,
+    fixtures_folder: pathlib.Path,
+    filename: str,
+    make_content: typing.Callable[[bytes], bytes],
+):
+    root = tmp_path / "root"
+    root.mkdir()
+    data = (fixtures_folder / "mercury.csv").read_bytes()
+    (root / filename).write_bytes(make_content(data))
+    shutil.copy(fixtures_folder / "mercury.csv", root / "b.csv")
+    stats: list[FileStats] = []
+    transactions = list(extract_tree(root, on_file=stats.append))
+    # the corrupt archive is skipped, and the other files are still extracted
+    assert transactions == [
+        dataclasses.replace(txn, file="b.csv")
+        for txn in extract_sequentially(fixtures_folder / "mercury.csv").transactions
+    ]
+    assert [item.path for item in stats] == ["b.csv"]
+
+
+def test_extract_tree_callback_error(tree_folder: pathlib.Path):
+    def on_file(stats: FileStats):
+        raise ValueError("callback failed")
+
+    with pytest.raises(ValueError, match="callback failed"):
+        list(extract_tree(tree_folder, on_file=on_file))
+
+
+def test_extract_tree_consumer_error(tree_folder: pathlib.Path):
+    transactions = extract_tree(tree_folder)
+    next(transactions)
+    with pytest.raises(ValueError, match="consumer failed"):
+        transactions.throw(ValueError("consumer failed"))
+
+
+def test_extract_tree_error(tree_folder: pathlib.Path):
+    with open(tree_folder / "mercury.csv", "at") as fo:
+        fo.write("bad-date,x,1,x,x,x,x,x,x,x,x,x,x,x,x,x,x\n")
+    stats: list[FileStats] = []
+    transactions = list(extract_tree(tree_folder, on_file=stats.append))
+    # the other files are still extracted
+    assert transactions[-1].file == os.path.join("b", "plaid.csv")
+    assert stats[0].path == "mercury.csv"
+    assert "ValueError" in stats[0].error
+    assert [item.error for item in stats[1:]] == [None] * 3
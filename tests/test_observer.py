@@ -0,0 +1,166 @@
+import io
+import pathlib
+
+import pytest
+from pytest_mock import MockerFixture
+
+from beanhub_extract.engine import extract_tree
+from beanhub_extract.extractors import ALL_EXTRACTORS
+from beanhub_extract.extractors import detect_extractor
+from beanhub_extract.extractors.base import ExtractorBase
+from beanhub_extract.extractors.mercury import MercuryExtractor
+from beanhub_extract.observer import ExtractorObserver
+from beanhub_extract.observer import PHASE_CONVERT
+from beanhub_extract.observer import PHASE_DETECT
+from beanhub_extract.observer import PHASE_EXTRACT
+from beanhub_extract.observer import PHASE_FINGERPRINT
+from beanhub_extract.observer import PHASE_TOKENIZE
+from beanhub_extract.observer import StatsCollector
+
+
+class RecordingObserver(ExtractorObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_phase(self, extractor, phase, seconds):
+        assert seconds >= 0
+        self.events.append(("phase", phase))
+
+    def on_rows(self, extractor, parsed, emitted):
+        self.events.append(("rows", parsed, emitted))
+
+    def on_bytes_read(self, extractor, size):
+        self.events.append(("bytes", size))
+
+    def on_conversion_error(self, extractor, field, value, lineno, error):
+        self.events.append(("error", field, value, lineno, type(error)))
+
+
+@pytest.mark.parametrize("single_pass", [False, True])
+@pytest.mark.parametrize("extractor_name", list(ALL_EXTRACTORS))
+def test_observer(
+    fixtures_folder: pathlib.Path, extractor_name: str, single_pass: bool
+):
+    path = fixtures_folder / f"{extractor_name}.csv"
+    extractor_cls = ALL_EXTRACTORS[extractor_name]
+    with open(path, "rt") as fo:
+        expected = list(extractor_cls(fo)())
+    observer = RecordingObserver()
+    with open(path, "rt") as fo:
+        assert detect_extractor(fo, observer=observer) is extractor_cls
+        fo.seek(0)
+        extractor = extractor_cls(fo, observer=observer, single_pass=single_pass)
+        assert extractor.detect()
+        fo.seek(0)
+        extractor.fingerprint()
+        fo.seek(0)
+        assert list(extractor()) == expected
+    assert observer.events == [
+        ("phase", PHASE_DETECT),
+        ("phase", PHASE_DETECT),
+        ("phase", PHASE_FINGERPRINT),
+        ("phase", PHASE_TOKENIZE),
+        ("phase", PHASE_CONVERT),
+        ("phase", PHASE_EXTRACT),
+        ("rows", len(expected), len(expected)),
+        # the row counting pass reads the file once more in the two-pass mode
+        ("bytes", path.stat().st_size * (1 if single_pass else 2)),
+    ]
+
+
+def test_observer_partial_consumption(fixtures_folder: pathlib.Path):
+    observer = RecordingObserver()
+    with open(fixtures_folder / "plaid.csv", "rt") as fo:
+        transactions = ALL_EXTRACTORS["plaid"](fo, observer=observer)()
+        next(transactions)
+        next(transactions)
+        transactions.close()
+    assert ("rows", 2, 2) in observer.events
+
+
+def test_observer_text_input_without_buffer(fixtures_folder: pathlib.Path):
+    observer = RecordingObserver()
+    content = (fixtures_folder / "mercury.csv").read_text()
+    list(MercuryExtractor(io.StringIO(content), observer=observer)())
+    assert not [event for event in observer.events if event[0] == "bytes"]
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        (
+            "Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n"
+            "04/09/2024,04/09/2024,PAYMENT,,Payment,123.45,\n"
+            "bad,04/05/2024,APPLE.COM/BILL,Shopping,Sale,oops,\n",
+            [
+                ("Transaction Date", "bad", 2),
+                ("Amount", "oops", 2),
+            ],
+        ),
+        (
+            "Date (UTC),Description,Amount,Status,Source Account,Bank Description,Reference,Note,"
+            "Last Four Digits,Name On Card,Category,GL Code,Timestamp,Original Currency\n"
+            "04-17-2024,GUSTO,1.2.3,Sent,Checking,GUSTO,,,,,,,04-17-2024 21:30:40,\n",
+            [("Amount", "1.2.3", 1)],
+        ),
+    ],
+)
+def test_observer_conversion_errors(content: str, expected: list[tuple[str, str, int]]):
+    observer = RecordingObserver()
+    extractor_cls = detect_extractor(io.StringIO(content))
+    with pytest.raises(Exception):
+        list(extractor_cls(io.StringIO(content), observer=observer)())
+    assert [event[1:4] for event in observer.events if event[0] == "error"] == expected
+
+
+def test_stats_collector(tmp_path: pathlib.Path, fixtures_folder: pathlib.Path):
+    for filename in ["mercury.csv", "plaid.csv", "other.csv"]:
+        (tmp_path / filename).write_bytes((fixtures_folder / filename).read_bytes())
+    (tmp_path / "mercury-2.csv").write_bytes(
+        (fixtures_folder / "mercury.csv").read_bytes()
+    )
+    collector = StatsCollector()
+    transactions = list(extract_tree(tmp_path, observer=collector))
+    mercury_count = sum(1 for txn in transactions if txn.extractor == "mercury")
+    plaid_count = sum(1 for txn in transactions if txn.extractor == "plaid")
+    assert collector.total.extractions == 3
+    assert collector.total.rows_parsed == len(transactions)
+    assert collector.total.rows_emitted == len(transactions)
+    assert collector.by_extractor["mercury"].extractions == 2
+    assert collector.by_extractor["mercury"].rows_emitted == mercury_count
+    assert collector.by_extractor["plaid"].rows_emitted == plaid_count
+    # the files are read twice, for counting the rows and for the extraction
+    assert collector.total.bytes_read == 2 * sum(
+        (tmp_path / filename).stat().st_size
+        for filename in ["mercury.csv", "mercury-2.csv", "plaid.csv"]
+    )
+    assert set(collector.total.phase_seconds) == {
+        PHASE_TOKENIZE,
+        PHASE_CONVERT,
+        PHASE_EXTRACT,
+    }
+    assert not collector.total.conversion_errors
+
+
+def test_stats_collector_conversion_errors():
+    collector = StatsCollector()
+    content = (
+        "date,transaction,description,amount,balance\n"
+        "2024-04-01,INT,Interest,abc,xyz\n"
+    )
+    extractor_cls = detect_extractor(io.StringIO(content), observer=collector)
+    with pytest.raises(Exception):
+        list(extractor_cls(io.StringIO(content), observer=collector)())
+    assert collector.total.conversion_errors == {"amount": 1, "balance": 1}
+    assert collector.by_extractor["wealthsimple"].conversion_errors == {
+        "amount": 1,
+        "balance": 1,
+    }
+    assert collector.total.phase_seconds[PHASE_DETECT] > 0
+
+
+def test_no_observer(fixtures_folder: pathlib.Path, mocker: MockerFixture):
+    spy = mocker.spy(ExtractorBase, "_observe_values")
+    with open(fixtures_folder / "mercury.csv", "rt") as fo:
+        list(MercuryExtractor(fo)())
+    spy.assert_not_called()
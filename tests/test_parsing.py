@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+import pytz
+
+from beanhub_extract.parsing import CACHE_SIZE
+from beanhub_extract.parsing import clear_caches
+from beanhub_extract.parsing import parse_localized_mdy_datetime
+from beanhub_extract.parsing import parse_mdy_date
+from beanhub_extract.parsing import parse_mdy_datetime
+from beanhub_extract.parsing import parse_time
+from beanhub_extract.parsing import parse_ymd_date
+
+
+@pytest.mark.parametrize(
+    "date_str, separator, expected",
+    [
+        ("2024-05-04", "-", datetime.date(2024, 5, 4)),
+        ("2024/12/31", "/", datetime.date(2024, 12, 31)),
+    ],
+)
+def test_parse_ymd_date(date_str: str, separator: str, expected: datetime.date):
+    assert parse_ymd_date(date_str, separator) == expected
+
+
+@pytest.mark.parametrize(
+    "date_str, separator, expected",
+    [
+        ("05/04/2024", "/", datetime.date(2024, 5, 4)),
+        ("12-31-2024", "-", datetime.date(2024, 12, 31)),
+    ],
+)
+def test_parse_mdy_date(date_str: str, separator: str, expected: datetime.date):
+    assert parse_mdy_date(date_str, separator) == expected
+
+
+def test_parse_time():
+    assert parse_time("21:30:40") == datetime.time(21, 30, 40)
+
+
+def test_parse_mdy_datetime():
+    assert parse_mdy_datetime("04-17-2024 21:30:40", "-") == datetime.datetime(
+        2024, 4, 17, 21, 30, 40
+    )
+
+
+def test_parse_localized_mdy_datetime():
+    assert parse_localized_mdy_datetime(
+        "04-17-2024 21:30:40", pytz.UTC, "-"
+    ) == datetime.datetime(2024, 4, 17, 21, 30, 40, tzinfo=datetime.timezone.utc)
+
+
+def test_cache():
+    clear_caches()
+    first = parse_ymd_date("2024-05-04")
+    assert parse_ymd_date("2024-05-04") is first
+    assert parse_ymd_date.cache_info().hits == 1
+    for day in range(CACHE_SIZE * 2):
+        parse_ymd_date(
+            (datetime.date(2000, 1, 1) + datetime.timedelta(days=day)).isoformat()
+        )
+    assert parse_ymd_date.cache_info().currsize == CACHE_SIZE
+
+
+@pytest.mark.parametrize("date_str", ["2024-05", "2024-05-04-01", "abc"])
+def test_parse_ymd_date_invalid(date_str: str):
+    with pytest.raises(ValueError):
+        parse_ymd_date(date_str)
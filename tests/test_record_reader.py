@@ -0,0 +1,27 @@
+import io
+
+import pytest
+
+from beanhub_extract.record_reader import OffsetRecordReader
+
+
+@pytest.mark.parametrize(
+    "content, start, expected",
+    [
+        (b"", 0, []),
+        (b"a,b\n1,2", 0, [(0, 4, ["a", "b"]), (4, 7, ["1", "2"])]),
+        (b"a,b\r\n\r\n1,2\r\n", 0, [(0, 5, ["a", "b"]), (7, 12, ["1", "2"])]),
+        (b'a,b\n"1\r\n2",3\n4,5\n', 4, [(4, 13, ["1\n2", "3"]), (13, 17, ["4", "5"])]),
+        ("a,b\né,中\n".encode("utf8"), 4, [(4, 11, ["é", "中"])]),
+    ],
+)
+def test_offset_record_reader(content: bytes, start: int, expected: list):
+    assert list(OffsetRecordReader(io.BytesIO(content), start=start)) == expected
+
+
+def test_offset_record_reader_read_record():
+    reader = OffsetRecordReader(io.BytesIO(b"a,b\n\n1,2\n"))
+    assert reader.read_record() == (0, 4, ["a", "b"])
+    assert reader.read_record() == (4, 5, [])
+    assert reader.read_record() == (5, 9, ["1", "2"])
+    assert reader.read_record() is None
@@ -0,0 +1,286 @@
+import datetime
+import os
+import pathlib
+
+import pytest
+from pytest_mock import MockerFixture
+
+from beanhub_extract.data_types import DateRange
+from beanhub_extract.extractors.base import ExtractorBase
+from beanhub_extract.extractors.chase import ChaseCreditCardExtractor
+from beanhub_extract.extractors.mercury import MercuryExtractor
+from beanhub_extract.registry import FingerprintRegistry
+
+
+@pytest.fixture
+def exports_folder(
+    tmp_path: pathlib.Path, fixtures_folder: pathlib.Path
+) -> pathlib.Path:
+    """Chase exports with overlapping date ranges, the full one has all the rows"""
+    folder = tmp_path / "exports"
+    folder.mkdir()
+    header, *lines = (
+        (fixtures_folder / "chase_credit_card.csv").read_text().splitlines()
+    )
+    for name, rows in [
+        ("full.csv", lines),
+        ("newer.csv", lines[:3]),
+        ("older.csv", lines[2:]),
+        ("middle.csv", lines[1:4]),
+    ]:
+        (folder / name).write_text("\n".join([header, *rows]) + "\n")
+    return folder
+
+
+@pytest.fixture
+def registry(tmp_path: pathlib.Path) -> FingerprintRegistry:
+    with FingerprintRegistry(tmp_path / "registry.sqlite") as registry:
+        yield registry
+
+
+def test_register(
+    registry: FingerprintRegistry,
+    fixtures_folder: pathlib.Path,
+    exports_folder: pathlib.Path,
+):
+    path = fixtures_folder / "chase_credit_card.csv"
+    record = registry.register(path)
+    with open(path, "rt") as fo:
+        fingerprint = ChaseCreditCardExtractor(fo).fingerprint()
+    assert record.path == str(path)
+    assert record.extractor == "chase_credit_card"
+    assert record.fingerprint == fingerprint
+    assert record.date_range == DateRange(
+        start=datetime.date(2024, 4, 1), end=datetime.date(2024, 4, 9)
+    )
+    assert not record.rows_indexed
+    assert registry.get(path) == record
+    assert len(registry) == 1
+    assert registry.register(fixtures_folder / "other.csv") is None
+    assert registry.register(fixtures_folder / "empty.csv") is None
+    assert len(registry) == 1
+
+    # a copy of the file is seen before
+    copy = exports_folder / "copy.csv"
+    copy.write_bytes(path.read_bytes())
+    assert [item.path for item in registry.find(fingerprint)] == [str(path)]
+    registry.register(copy)
+    assert {item.path for item in registry.find(fingerprint)} == {str(path), str(copy)}
+
+    registry.unregister(copy)
+    assert registry.get(copy) is None
+    assert len(registry) == 1
+
+
+@pytest.mark.parametrize(
+    "input_file, expected",
+    [
+        ("mercury.csv", (datetime.date(2024, 4, 15), datetime.date(2024, 4, 17))),
+        (
+            "chase_credit_card.csv",
+            (datetime.date(2024, 4, 1), datetime.date(2024, 4, 9)),
+        ),
+        ("plaid.csv", (datetime.date(2024, 1, 7), datetime.date(2024, 1, 27))),
+        ("csv.csv", (datetime.date(2025, 6, 28), datetime.date(2025, 7, 3))),
+        ("wealthsimple.csv", (datetime.date(2024, 4, 1), datetime.date(2024, 4, 15))),
+    ],
+)
+def test_register_date_range(
+    registry: FingerprintRegistry,
+    fixtures_folder: pathlib.Path,
+    input_file: str,
+    expected: tuple[datetime.date, datetime.date],
+):
+    record = registry.register(fixtures_folder / input_file)
+    assert (record.date_range.start, record.date_range.end) == expected
+
+
+def test_register_unsorted(
+    registry: FingerprintRegistry,
+    fixtures_folder: pathlib.Path,
+    exports_folder: pathlib.Path,
+):
+    header, *lines = (fixtures_folder / "csv.csv").read_text().splitlines()
+    path = exports_folder / "unsorted.csv"
+    # the oldest row is at the end, after the newest one
+    path.write_text(
+        "\n".join([header, *lines, lines[0].replace("2025-06-28", "2025-06-01", 1)])
+        + "\n"
+    )
+    record = registry.register(path)
+    assert record.date_range == DateRange(
+        start=datetime.date(2025, 6, 1), end=datetime.date(2025, 7, 3)
+    )
+    assert registry.find_overlapping(
+        DateRange(start=datetime.date(2025, 6, 10), end=datetime.date(2025, 6, 20))
+    ) == [record]
+
+
+def test_register_incrementally(
+    registry: FingerprintRegistry, exports_folder: pathlib.Path, mocker: MockerFixture
+):
+    path = exports_folder / "full.csv"
+    spy = mocker.spy(ExtractorBase, "fingerprint")
+    record = registry.register(path)
+    assert registry.register(path) == record
+    assert spy.call_count == 1
+    # the rows are indexed only when asked
+    assert registry.register(path, index_rows=True).rows_indexed
+    assert spy.call_count == 2
+    assert registry.register(path).rows_indexed
+    assert spy.call_count == 2
+
+    lines = path.read_text().splitlines(keepends=True)
+    path.write_text("".join(lines[:-1]))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    new_record = registry.register(path)
+    assert spy.call_count == 3
+    assert new_record.fingerprint != record.fingerprint
+    assert not new_record.rows_indexed
+    assert registry.find(record.fingerprint) == []
+    assert len(registry) == 1
+
+
+def test_registry_persistent(tmp_path: pathlib.Path, exports_folder: pathlib.Path):
+    path = tmp_path / "registry.sqlite"
+    with FingerprintRegistry(path) as registry:
+        record = registry.register(exports_folder / "full.csv")
+    with FingerprintRegistry(path) as registry:
+        assert registry.get(exports_folder / "full.csv") == record
+        assert registry.find(record.fingerprint) == [record]
+
+
+@pytest.mark.parametrize(
+    "date_range, expected",
+    [
+        (DateRange(), ["full.csv", "middle.csv", "newer.csv", "older.csv"]),
+        (DateRange(start=datetime.date(2024, 4, 9)), ["full.csv", "newer.csv"]),
+        (DateRange(end=datetime.date(2024, 4, 1)), ["full.csv", "older.csv"]),
+        (
+            DateRange(start=datetime.date(2024, 4, 3), end=datetime.date(2024, 4, 3)),
+            ["full.csv", "middle.csv", "newer.csv"],
+        ),
+        (DateRange(start=datetime.date(2024, 4, 10)), []),
+    ],
+)
+def test_find_overlapping(
+    registry: FingerprintRegistry,
+    exports_folder: pathlib.Path,
+    date_range: DateRange,
+    expected: list[str],
+):
+    for name in ["full.csv", "newer.csv", "older.csv", "middle.csv"]:
+        registry.register(exports_folder / name)
+    assert [
+        pathlib.Path(record.path).name
+        for record in registry.find_overlapping(date_range)
+    ] == expected
+
+
+@pytest.mark.parametrize("index_rows", [False, True])
+def test_is_superset(
+    registry: FingerprintRegistry, exports_folder: pathlib.Path, index_rows: bool
+):
+    for name in ["full.csv", "newer.csv", "older.csv", "middle.csv"]:
+        registry.register(exports_folder / name, index_rows=index_rows)
+    assert registry.is_superset(
+        exports_folder / "full.csv", exports_folder / "newer.csv"
+    )
+    assert registry.is_superset(
+        exports_folder / "full.csv", exports_folder / "middle.csv"
+    )
+    assert registry.is_superset(
+        exports_folder / "full.csv", exports_folder / "full.csv"
+    )
+    assert not registry.is_superset(
+        exports_folder / "newer.csv", exports_folder / "full.csv"
+    )
+    assert not registry.is_superset(
+        exports_folder / "newer.csv", exports_folder / "older.csv"
+    )
+    assert [
+        pathlib.Path(record.path).name
+        for record in registry.find_supersets(exports_folder / "newer.csv")
+    ] == ["full.csv"]
+    assert registry.find_supersets(exports_folder / "full.csv") == []
+    with pytest.raises(ValueError):
+        registry.is_superset(
+            exports_folder / "full.csv", exports_folder / "missing.csv"
+        )
+    with pytest.raises(ValueError):
+        registry.find_supersets(exports_folder / "missing.csv")
+
+
+def test_is_superset_with_row_hashes(
+    registry: FingerprintRegistry, exports_folder: pathlib.Path
+):
+    header, *lines = (exports_folder / "full.csv").read_text().splitlines()
+    # the same date range with a different row in the middle, only the row hashes can tell
+    changed = exports_folder / "changed.csv"
+    changed.write_text(
+        "\n".join([header, lines[0], lines[1].replace("APPLE", "ORANGE"), *lines[2:]])
+        + "\n"
+    )
+    shifted = exports_folder / "shifted.csv"
+    shifted.write_text(
+        "\n".join([header, lines[1].replace("APPLE", "ORANGE"), lines[2]]) + "\n"
+    )
+    registry.register(exports_folder / "full.csv", index_rows=True)
+    registry.register(changed)
+    registry.register(shifted)
+    assert registry.is_superset(exports_folder / "full.csv", changed)
+    assert not registry.is_superset(exports_folder / "full.csv", shifted)
+    assert registry.is_superset(changed, shifted)
+
+
+def make_chase_export(
+    path: pathlib.Path, start: datetime.date, end: datetime.date, desc: str
+):
+    lines = ["Transaction Date,Post Date,Description,Category,Type,Amount,Memo"]
+    date = end
+    while date >= start:
+        lines.append(f"{date:%m/%d/%Y},{date:%m/%d/%Y},{desc},Shopping,Sale,-1.00,")
+        date -= datetime.timedelta(days=1)
+    path.write_text("\n".join(lines) + "\n")
+
+
+@pytest.mark.parametrize("index_rows", [False, True])
+def test_is_superset_without_shared_rows(
+    registry: FingerprintRegistry, exports_folder: pathlib.Path, index_rows: bool
+):
+    # exports of two different cards, the date range of one covers the other one's
+    card_a = exports_folder / "card-a.csv"
+    card_b = exports_folder / "card-b.csv"
+    make_chase_export(
+        card_a, datetime.date(2024, 1, 1), datetime.date(2024, 12, 31), "CARD A"
+    )
+    make_chase_export(
+        card_b, datetime.date(2024, 3, 1), datetime.date(2024, 3, 31), "CARD B"
+    )
+    registry.register(card_a, index_rows=index_rows)
+    registry.register(card_b, index_rows=index_rows)
+    assert not registry.is_superset(card_a, card_b)
+    assert registry.find_supersets(card_b) == []
+
+
+def test_is_superset_changed_file(
+    registry: FingerprintRegistry, exports_folder: pathlib.Path
+):
+    path = exports_folder / "full.csv"
+    registry.register(path)
+    registry.register(exports_folder / "newer.csv")
+    assert registry.is_superset(path, exports_folder / "newer.csv")
+    # the rows are gone since the file was registered
+    lines = path.read_text().splitlines(keepends=True)
+    path.write_text(lines[0])
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not registry.is_superset(path, exports_folder / "newer.csv")
+
+
+def test_register_with_extractor(
+    registry: FingerprintRegistry, fixtures_folder: pathlib.Path
+):
+    record = registry.register(fixtures_folder / "mercury.csv", MercuryExtractor)
+    assert record.extractor == "mercury"
@@ -0,0 +1,80 @@
+import io
+
+import pytest
+
+from beanhub_extract.reverse_reader import has_stray_quote
+from beanhub_extract.reverse_reader import is_ascii_compatible
+from beanhub_extract.reverse_reader import read_last_record
+
+
+@pytest.mark.parametrize(
+    "encoding, expected",
+    [
+        ("utf8", True),
+        ("UTF-8-SIG", True),
+        ("latin1", True),
+        ("utf-16", False),
+        ("no-such-encoding", False),
+    ],
+)
+def test_is_ascii_compatible(encoding: str, expected: bool):
+    assert is_ascii_compatible(encoding) == expected
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        (b"", None),
+        (b"\n\r\n", None),
+        (b"a,b\n", (0, ["a", "b"])),
+        (b"a,b\n1,2\n3,4", (8, ["3", "4"])),
+        (b"a,b\n1,2\n3,4\n\n\n", (8, ["3", "4"])),
+        (b"a,b\r\n1,2\r\n3,4\r\n", (10, ["3", "4"])),
+        (b'a,b\n1,2\n"3\n5\n6",4\n', (8, ["3\n5\n6", "4"])),
+        (b'a,b\n1,2\n"3\n""5\n""\n6",4\n', (8, ['3\n"5\n"\n6', "4"])),
+        (b'a,b\n"1\n2,3\n4",5\n', (4, ["1\n2,3\n4", "5"])),
+        ("a,b\n1,2\né,中\n".encode("utf8"), (8, ["é", "中"])),
+    ],
+)
+@pytest.mark.parametrize("block_size", [1, 3, 8192])
+def test_read_last_record(
+    content: bytes, expected: tuple[int, list[str]] | None, block_size: int
+):
+    assert read_last_record(io.BytesIO(content), block_size=block_size) == expected
+
+
+def test_read_last_record_start():
+    assert read_last_record(io.BytesIO(b"\xef\xbb\xbfa,b\n"), start=3) == (
+        3,
+        ["a", "b"],
+    )
+    assert read_last_record(io.BytesIO(b"a,b\n\n\n"), start=4) is None
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("a,b", False),
+        ('"a""b",c', False),
+        ('a,"b\nc",""', False),
+        ('12" PIZZA,b', True),
+        ('line2",x', True),
+        ('"a"b"', True),
+    ],
+)
+def test_has_stray_quote(text: str, expected: bool):
+    assert has_stray_quote(text) == expected
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        # the quote in the last record makes the newlines in the quoted field look like record boundaries
+        b'a,b\n"line1\nline2",1\n14" SUB,2\n',
+        b'a,b\n1,2\n3,4"\n',
+    ],
+)
+@pytest.mark.parametrize("block_size", [1, 8192])
+def test_read_last_record_stray_quote(content: bytes, block_size: int):
+    with pytest.raises(ValueError):
+        read_last_record(io.BytesIO(content), block_size=block_size)
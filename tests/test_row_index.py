@@ -0,0 +1,88 @@
+import array
+import io
+import pathlib
+
+import pytest
+
+from beanhub_extract.row_index import make_sidecar_path
+from beanhub_extract.row_index import RowIndex
+
+
+def test_make_sidecar_path():
+    assert make_sidecar_path("/path/to/mercury.csv") == pathlib.Path(
+        "/path/to/mercury.csv.rowindex"
+    )
+
+
+@pytest.mark.parametrize("size, typecode", [(100, "I"), (2**32, "Q")])
+def test_save_and_load(tmp_path: pathlib.Path, size: int, typecode: str):
+    row_index = RowIndex(
+        size=size,
+        mtime_ns=1234567890,
+        offsets=array.array(typecode, [4, 8, size - 1]),
+    )
+    path = tmp_path / "test.csv.rowindex"
+    row_index.save(path)
+    assert RowIndex.load(path) == row_index
+    # no temporary file is left
+    assert list(tmp_path.iterdir()) == [path]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        None,
+        b"",
+        b"BHRI",
+        b"XXXX" + bytes(30),
+        b"BHRI\x02I" + bytes(100),
+        b"BHRI\x02I" + bytes(16) + b"\x05" + bytes(7) + bytes(8),
+        # version 1 built with quote parity
+        b"BHRI\x01I" + bytes(16) + bytes(8),
+    ],
+)
+def test_load_invalid(tmp_path: pathlib.Path, content: bytes | None):
+    path = tmp_path / "test.csv.rowindex"
+    if content is not None:
+        path.write_bytes(content)
+    assert RowIndex.load(path) is None
+
+
+def test_build_and_is_valid(tmp_path: pathlib.Path):
+    path = tmp_path / "test.csv"
+    path.write_bytes(b"a,b\n1,2\n3,4\n")
+    with open(path, "rb") as fo:
+        row_index = RowIndex.build(fo, 4)
+        assert list(row_index.offsets) == [4, 8]
+        assert row_index.offsets.typecode == "I"
+        assert row_index.is_valid(fo)
+    with open(path, "ab") as fo:
+        fo.write(b"5,6\n")
+    with open(path, "rb") as fo:
+        assert not row_index.is_valid(fo)
+
+    buffer = io.BytesIO(b"a,b\n1,2\n")
+    row_index = RowIndex.build(buffer, 4)
+    assert row_index.mtime_ns is None
+    assert row_index.is_valid(buffer)
+    buffer.write(b"3,4\n")
+    assert not row_index.is_valid(buffer)
+
+
+@pytest.mark.parametrize(
+    "content, start, expected",
+    [
+        (b"", 0, []),
+        (b"a,b\n", 4, []),
+        (b"a,b\n1,2\n3,4\n5,6\n", 4, [4, 8, 12]),
+        (b"a,b\n1,2\n3,4\n5,6", 4, [4, 8, 12]),
+        (b"a,b\r\n\r\n1,2\r\n\n\n3,4\r\n", 5, [7, 14]),
+        (b'a,b\n"1\n\n2\n3",4\n5,6\n', 4, [4, 15]),
+        (b'a,b\n"1\n""2\n""",4\n5,6\n', 4, [4, 17]),
+        (b"a,b\n1,2\n\r", 4, [4]),
+        # a quote in an unquoted field is a literal one
+        (b'a,b\n12" PIZZA,1\n"x\ny",2\n3,4\n', 4, [4, 16, 24]),
+    ],
+)
+def test_build_offsets(content: bytes, start: int, expected: list[int]):
+    assert list(RowIndex.build(io.BytesIO(content), start).offsets) == expected
@@ -3,8 +3,10 @@ import pathlib
 import pytest
 
 from beanhub_extract.data_types import Transaction
+from beanhub_extract.utils import replace_file
 from beanhub_extract.utils import strip_base_path
 from beanhub_extract.utils import strip_txn_base_path
+from beanhub_extract.utils import strip_txns_base_path
 
 
 @pytest.mark.parametrize(
@@ -37,3 +39,27 @@ def test_strip_txn_base_path(base_path: str, txn: Transaction, expected: Transac
         strip_txn_base_path(pathlib.PurePosixPath(base_path), txn, pure_posix=True)
         == expected
     )
+
+
+def test_strip_txns_base_path():
+    txns = [
+        Transaction(extractor="", file="/path/to/a.csv", lineno=1, extra={"a": 1}),
+        Transaction(extractor="", file=None, lineno=2),
+        Transaction(extractor="", file="/path/to/nested/b.csv", lineno=3),
+        Transaction(extractor="", file="/path/to/a.csv", lineno=4),
+    ]
+    base = pathlib.PurePosixPath("/path/to")
+    result = list(strip_txns_base_path(base, iter(txns), pure_posix=True))
+    assert result == [strip_txn_base_path(base, txn, pure_posix=True) for txn in txns]
+    assert [txn.file for txn in result] == ["a.csv", None, "nested/b.csv", "a.csv"]
+    # the same relative path object is shared by transactions from the same file
+    assert result[0].file is result[3].file
+
+
+def test_replace_file():
+    txn = Transaction(extractor="mercury", file="a.csv", lineno=3, extra={"a": 1})
+    new_txn = replace_file(txn, "b.csv")
+    assert new_txn == Transaction(
+        extractor="mercury", file="b.csv", lineno=3, extra={"a": 1}
+    )
+    assert new_txn.extra is txn.extra